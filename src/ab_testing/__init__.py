@@ -1,5 +1,9 @@
 """A/B Hypothesis Testing modules for insurance risk analytics."""
 
+from .data_view import (
+    HypothesisDataView,
+    prepare_test_view
+)
 from .hypothesis_tests import (
     calculate_claim_frequency,
     calculate_claim_severity,
@@ -9,13 +13,55 @@ from .hypothesis_tests import (
     test_gender_risk_differences,
     format_test_results
 )
+from .resampling import (
+    permutation_test,
+    bootstrap_mean_difference,
+    permutation_test_groups,
+    bootstrap_group_difference
+)
+from .suite import (
+    HYPOTHESIS_TESTS,
+    run_hypothesis_suite
+)
+from .time_sliced import (
+    monthly_statistics,
+    window_statistics,
+    run_time_sliced_tests
+)
+from .sequential import (
+    SequentialABTest,
+    alpha_spent,
+    run_sequential_test
+)
+from .multiple_testing import (
+    adjust_pvalues,
+    test_all_groups,
+    test_all_zipcodes
+)
 
 __all__ = [
+    'HypothesisDataView',
+    'prepare_test_view',
     'calculate_claim_frequency',
     'calculate_claim_severity',
     'test_province_risk_differences',
     'test_zipcode_risk_differences',
     'test_zipcode_margin_differences',
     'test_gender_risk_differences',
-    'format_test_results'
+    'format_test_results',
+    'adjust_pvalues',
+    'test_all_groups',
+    'test_all_zipcodes',
+    'permutation_test',
+    'bootstrap_mean_difference',
+    'permutation_test_groups',
+    'bootstrap_group_difference',
+    'HYPOTHESIS_TESTS',
+    'run_hypothesis_suite',
+    'monthly_statistics',
+    'window_statistics',
+    'run_time_sliced_tests',
+    'SequentialABTest',
+    'alpha_spent',
+    'run_sequential_test'
 ]
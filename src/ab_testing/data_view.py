@@ -0,0 +1,187 @@
+"""Shared, copy-free data view for the hypothesis tests.
+
+``HypothesisDataView`` extracts the arrays the tests need (group codes,
+HasClaim, TotalClaims and Margin) from a dataframe once. Every test function
+in ``hypothesis_tests`` and ``multiple_testing`` accepts the view in place of
+the dataframe, so a suite of tests shares one preparation and never copies
+the source frame.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Union
+
+from src.eda.aggregation import (
+    Dimension,
+    aggregate_by_codes,
+    compute_group_statistics,
+    dimension_codes,
+    row_statistics
+)
+
+# Grouping columns used by the standard A/B hypotheses
+DEFAULT_GROUP_COLUMNS = ('Province', 'PostalCode', 'Gender')
+
+
+class HypothesisDataView:
+    """
+    Precomputed arrays and per-group statistics for hypothesis testing.
+
+    TotalClaims is held as a view of the source column when it is already
+    float64. Categorical group columns reuse their codes. Group statistics are
+    computed on first use and cached.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe (not copied or modified)
+    group_cols : iterable, optional
+        Grouping columns to encode up front (default: Province, PostalCode,
+        Gender). Other columns are encoded on first use.
+    premium_col : str
+        Premium column name
+    claims_col : str
+        Claims column name
+    """
+
+    def __init__(self, df: pd.DataFrame,
+                 group_cols: Optional[Iterable[Dimension]] = DEFAULT_GROUP_COLUMNS,
+                 premium_col: str = 'TotalPremium',
+                 claims_col: str = 'TotalClaims'):
+        self._df = df
+        self.n_rows = len(df)
+
+        premium = df[premium_col].to_numpy(dtype=np.float64)
+        self.total_claims = df[claims_col].to_numpy(dtype=np.float64)
+        self.has_claim = self.total_claims > 0
+        self.margin = premium - self.total_claims
+        self._premium = premium
+
+        self.codes: Dict[Dimension, np.ndarray] = {}
+        self.groups: Dict[Dimension, pd.Index] = {}
+        for col in group_cols or []:
+            if col in df.columns or isinstance(col, tuple):
+                self._encode(col)
+
+        self._rows = None
+        self._stats: Dict[Dimension, pd.DataFrame] = {}
+
+    def _encode(self, dimension: Dimension) -> None:
+        codes, index = dimension_codes(self._df, dimension)
+        self.codes[dimension] = codes
+        self.groups[dimension] = index
+
+    def group_codes(self, dimension: Dimension) -> np.ndarray:
+        """Group code per row for a dimension (-1 for missing)."""
+        if dimension not in self.codes:
+            if self._df is None:
+                raise KeyError(f"Dimension {dimension!r} is not available in a detached view")
+            self._encode(dimension)
+        return self.codes[dimension]
+
+    def group_statistics(self, dimension: Dimension) -> pd.DataFrame:
+        """Per-group sufficient statistics (see ``compute_group_statistics``)."""
+        if dimension not in self._stats:
+            if self._rows is None:
+                self._rows = row_statistics(self._premium, self.total_claims, self.margin)
+            codes = self.group_codes(dimension)
+            self._stats[dimension] = aggregate_by_codes(codes, self.groups[dimension], self._rows)
+        return self._stats[dimension]
+
+    def detach(self, dimensions: Iterable[Dimension]) -> 'HypothesisDataView':
+        """
+        Statistics-only copy of the view for sending to worker processes.
+
+        The returned view holds the per-group statistics of ``dimensions``
+        (computed here if needed) but no row-level arrays, so it pickles in
+        O(groups) rather than O(rows).
+
+        Parameters
+        ----------
+        dimensions : iterable
+            Dimensions the receiving tests will request
+
+        Returns
+        -------
+        HypothesisDataView
+            View that can only serve the given dimensions
+        """
+        stats = {dim: self.group_statistics(dim) for dim in dimensions}
+        return HypothesisDataView.from_statistics(stats, self.n_rows)
+
+    @classmethod
+    def from_statistics(cls, stats: Dict[Dimension, pd.DataFrame],
+                        n_rows: int = 0) -> 'HypothesisDataView':
+        """
+        Statistics-only view built from precomputed per-group statistics.
+
+        Parameters
+        ----------
+        stats : dict
+            Mapping of dimension to a ``STAT_COLUMNS`` table, e.g. from
+            ``compute_group_statistics`` or a time window
+        n_rows : int
+            Number of rows the statistics summarise
+
+        Returns
+        -------
+        HypothesisDataView
+            View that can only serve the given dimensions
+        """
+        view = object.__new__(cls)
+        view._df = None
+        view.n_rows = n_rows
+        view.total_claims = view.has_claim = view.margin = None
+        view._premium = None
+        view.codes, view.groups = {}, {}
+        view._rows = None
+        view._stats = dict(stats)
+        return view
+
+
+def prepare_test_view(df: pd.DataFrame,
+                      group_cols: Optional[Iterable[Dimension]] = DEFAULT_GROUP_COLUMNS,
+                      premium_col: str = 'TotalPremium',
+                      claims_col: str = 'TotalClaims') -> HypothesisDataView:
+    """
+    Build a view to share across several hypothesis tests.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    group_cols : iterable, optional
+        Grouping columns to encode up front
+    premium_col : str
+        Premium column name
+    claims_col : str
+        Claims column name
+
+    Returns
+    -------
+    HypothesisDataView
+        View accepted by every test function in place of the dataframe
+    """
+    return HypothesisDataView(df, group_cols, premium_col, claims_col)
+
+
+def group_statistics(data: Union[pd.DataFrame, HypothesisDataView],
+                     dimension: Dimension) -> pd.DataFrame:
+    """
+    Per-group sufficient statistics from a dataframe or a shared view.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or HypothesisDataView
+        Input data
+    dimension : str or tuple of str
+        Grouping column(s)
+
+    Returns
+    -------
+    pd.DataFrame
+        Sufficient statistics indexed by group key
+    """
+    if isinstance(data, HypothesisDataView):
+        return data.group_statistics(dimension)
+    return compute_group_statistics(data, [dimension])[dimension]
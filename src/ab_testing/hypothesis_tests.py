@@ -7,20 +7,28 @@ across provinces, zip codes, and demographics.
 import pandas as pd
 import numpy as np
 from scipy import stats
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional, Union
 import warnings
 
+from src.ab_testing.sufficient_stats import (
+    anova_from_moments,
+    chi2_from_counts,
+    ttest_from_moments
+)
+from src.ab_testing.data_view import HypothesisDataView, group_statistics
+from src.eda.aggregation import derive_kpis
+
 warnings.filterwarnings('ignore')
 
 
-def calculate_claim_frequency(df: pd.DataFrame, group_col: str) -> pd.DataFrame:
+def calculate_claim_frequency(df: Union[pd.DataFrame, HypothesisDataView], group_col: str) -> pd.DataFrame:
     """
     Calculate claim frequency (proportion of policies with at least one claim) by group.
     
     Parameters
     ----------
-    df : pd.DataFrame
-        Input dataframe with TotalClaims column
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe with TotalClaims column, or a shared view
     group_col : str
         Column name to group by (e.g., 'Province', 'PostalCode', 'Gender')
     
@@ -29,35 +37,24 @@ def calculate_claim_frequency(df: pd.DataFrame, group_col: str) -> pd.DataFrame:
     pd.DataFrame
         Summary statistics with claim frequency by group
     """
-    df = df.copy()
-    df['HasClaim'] = (df['TotalClaims'] > 0).astype(int)
-    
-    summary = df.groupby(group_col).agg({
-        'HasClaim': ['sum', 'count', 'mean'],
-        'TotalPremium': 'sum',
-        'TotalClaims': 'sum'
-    }).reset_index()
+    kpis = derive_kpis(group_statistics(df, group_col)).reset_index()
     
-    summary.columns = [
+    summary = kpis[[
         group_col, 'Claims_Count', 'Total_Policies', 'Claim_Frequency',
-        'Total_Premium', 'Total_Claims'
-    ]
-    
-    summary['Claim_Severity'] = summary['Total_Claims'] / summary['Claims_Count']
-    summary['Margin'] = summary['Total_Premium'] - summary['Total_Claims']
-    summary['Loss_Ratio'] = summary['Total_Claims'] / summary['Total_Premium']
+        'Total_Premium', 'Total_Claims', 'Claim_Severity', 'Margin', 'Loss_Ratio'
+    ]]
     
     return summary
 
 
-def calculate_claim_severity(df: pd.DataFrame, group_col: str) -> pd.DataFrame:
+def calculate_claim_severity(df: Union[pd.DataFrame, HypothesisDataView], group_col: str) -> pd.DataFrame:
     """
     Calculate claim severity (average claim amount given a claim occurred) by group.
     
     Parameters
     ----------
-    df : pd.DataFrame
-        Input dataframe
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or a view shared across tests (see ``prepare_test_view``)
     group_col : str
         Column name to group by
     
@@ -66,30 +63,107 @@ def calculate_claim_severity(df: pd.DataFrame, group_col: str) -> pd.DataFrame:
     pd.DataFrame
         Claim severity statistics by group
     """
-    df_with_claims = df[df['TotalClaims'] > 0].copy()
+    kpis = derive_kpis(group_statistics(df, group_col))
+    kpis = kpis[kpis['Claims_Count'] > 0].reset_index()
     
-    if len(df_with_claims) == 0:
+    if len(kpis) == 0:
         return pd.DataFrame()
     
-    severity = df_with_claims.groupby(group_col).agg({
-        'TotalClaims': ['mean', 'std', 'count']
-    }).reset_index()
-    
+    severity = kpis[[group_col, 'Mean_Severity', 'Std_Severity', 'Claims_Count']]
     severity.columns = [group_col, 'Mean_Severity', 'Std_Severity', 'Claim_Count']
     
     return severity
 
 
-def test_province_risk_differences(df: pd.DataFrame, alpha: float = 0.05) -> Dict:
+def _test_result(test_name: str, outcome: Dict, alpha: float, **extra) -> Dict:
+    """Standard result dictionary for a completed test."""
+    p_value = outcome['p_value']
+    reject = bool(p_value < alpha)
+    result = {
+        'test': test_name,
+        'statistic': outcome['statistic'],
+        'p_value': p_value,
+    }
+    if 'degrees_of_freedom' in outcome:
+        result['degrees_of_freedom'] = outcome['degrees_of_freedom']
+    result.update({
+        'reject_null': reject,
+        'interpretation': 'Reject H₀' if reject else 'Fail to reject H₀'
+    })
+    result.update(extra)
+    return result
+
+
+def _frequency_test(group_stats: pd.DataFrame, alpha: float, **extra) -> Dict:
+    """Chi-squared test of claim frequency from per-group policy and claim counts."""
+    if len(group_stats) < 2:
+        return {
+            'test': 'chi2_contingency',
+            'statistic': None,
+            'p_value': None,
+            'result': 'Insufficient data'
+        }
+    
+    outcome = chi2_from_counts(group_stats['Claims_Count'].to_numpy(),
+                               group_stats['Total_Policies'].to_numpy())
+    return _test_result('chi2_contingency', outcome, alpha, **extra)
+
+
+def _severity_anova(group_stats: pd.DataFrame, alpha: float) -> Dict:
+    """ANOVA of claim severity from per-group claim moments."""
+    if group_stats['Claims_Count'].sum() == 0:
+        return {
+            'test': 'ANOVA',
+            'statistic': None,
+            'p_value': None,
+            'result': 'No claims data available'
+        }
+    
+    # Remove groups with less than 2 claims
+    groups = group_stats[group_stats['Claims_Count'] >= 2]
+    
+    if len(groups) < 2:
+        return {
+            'test': 'ANOVA',
+            'statistic': None,
+            'p_value': None,
+            'result': 'Insufficient groups for ANOVA'
+        }
+    
+    outcome = anova_from_moments(groups['Claims_Count'].to_numpy(),
+                                 groups['Severity_Sum'].to_numpy(),
+                                 groups['Severity_SumSq'].to_numpy())
+    return _test_result('ANOVA', outcome, alpha)
+
+
+def _overall_interpretation(results: Dict, positive: str, negative: str) -> Dict:
+    """Combine frequency and severity decisions into one interpretation."""
+    freq_reject = results.get('frequency_test', {}).get('reject_null', False)
+    sev_reject = results.get('severity_test', {}).get('reject_null', False)
+    
+    return {
+        'reject_null': freq_reject or sev_reject,
+        'summary': positive if (freq_reject or sev_reject) else negative
+    }
+
+
+def _top_groups(group_stats: pd.DataFrame, top_n: Optional[int]) -> pd.DataFrame:
+    """Largest groups by policy count (the equivalent of value_counts().head())."""
+    group_stats = group_stats.sort_values('Total_Policies', ascending=False, kind='stable')
+    return group_stats if top_n is None else group_stats.head(top_n)
+
+
+def test_province_risk_differences(df: Union[pd.DataFrame, HypothesisDataView], alpha: float = 0.05) -> Dict:
     """
     Test H₀: There are no risk differences across provinces.
     
-    Uses chi-squared test for claim frequency and ANOVA/t-test for claim severity.
+    Uses chi-squared test for claim frequency and ANOVA for claim severity, both
+    computed from per-province sufficient statistics.
     
     Parameters
     ----------
-    df : pd.DataFrame
-        Input dataframe
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or a view shared across tests (see ``prepare_test_view``)
     alpha : float
         Significance level (default: 0.05)
     
@@ -100,104 +174,40 @@ def test_province_risk_differences(df: pd.DataFrame, alpha: float = 0.05) -> Dic
     """
     results = {}
     
-    # Prepare data
-    df = df.copy()
-    df['HasClaim'] = (df['TotalClaims'] > 0).astype(int)
+    group_stats = group_statistics(df, 'Province')
     
     # Test 1: Claim Frequency (Chi-squared test)
-    contingency_table = pd.crosstab(df['Province'], df['HasClaim'])
-    
-    if contingency_table.shape[0] < 2:
-        results['frequency_test'] = {
-            'test': 'chi2_contingency',
-            'statistic': None,
-            'p_value': None,
-            'result': 'Insufficient data'
-        }
-    else:
-        chi2, p_value, dof, expected = stats.chi2_contingency(contingency_table)
-        results['frequency_test'] = {
-            'test': 'chi2_contingency',
-            'statistic': chi2,
-            'p_value': p_value,
-            'degrees_of_freedom': dof,
-            'reject_null': p_value < alpha,
-            'interpretation': 'Reject H₀' if p_value < alpha else 'Fail to reject H₀'
-        }
+    results['frequency_test'] = _frequency_test(group_stats, alpha)
     
-    # Test 2: Claim Severity (ANOVA or Kruskal-Wallis)
-    df_with_claims = df[df['TotalClaims'] > 0].copy()
-    
-    if len(df_with_claims) == 0:
-        results['severity_test'] = {
-            'test': 'ANOVA',
-            'statistic': None,
-            'p_value': None,
-            'result': 'No claims data available'
-        }
-    else:
-        # Group by province
-        groups = [group['TotalClaims'].values 
-                 for name, group in df_with_claims.groupby('Province')]
-        
-        # Remove groups with less than 2 observations
-        groups = [g for g in groups if len(g) >= 2]
-        
-        if len(groups) < 2:
-            results['severity_test'] = {
-                'test': 'ANOVA',
-                'statistic': None,
-                'p_value': None,
-                'result': 'Insufficient groups for ANOVA'
-            }
-        else:
-            # Test normality (Shapiro-Wilk on sample)
-            # Use Kruskal-Wallis if data is not normal
-            try:
-                f_stat, p_value = stats.f_oneway(*groups)
-                test_name = 'ANOVA'
-            except:
-                # Use Kruskal-Wallis (non-parametric alternative)
-                h_stat, p_value = stats.kruskal(*groups)
-                test_name = 'Kruskal-Wallis'
-                f_stat = h_stat
-            
-            results['severity_test'] = {
-                'test': test_name,
-                'statistic': f_stat,
-                'p_value': p_value,
-                'reject_null': p_value < alpha,
-                'interpretation': 'Reject H₀' if p_value < alpha else 'Fail to reject H₀'
-            }
+    # Test 2: Claim Severity (ANOVA)
+    results['severity_test'] = _severity_anova(group_stats, alpha)
     
     # Overall interpretation
-    freq_reject = results.get('frequency_test', {}).get('reject_null', False)
-    sev_reject = results.get('severity_test', {}).get('reject_null', False)
-    
-    results['overall_interpretation'] = {
-        'reject_null': freq_reject or sev_reject,
-        'summary': 'Risk differences exist across provinces' if (freq_reject or sev_reject) 
-                   else 'No significant risk differences across provinces'
-    }
+    results['overall_interpretation'] = _overall_interpretation(
+        results,
+        'Risk differences exist across provinces',
+        'No significant risk differences across provinces'
+    )
     
     return results
 
 
-def test_zipcode_risk_differences(df: pd.DataFrame, alpha: float = 0.05, 
-                                  top_n: int = 10) -> Dict:
+def test_zipcode_risk_differences(df: Union[pd.DataFrame, HypothesisDataView], alpha: float = 0.05, 
+                                  top_n: Optional[int] = 10) -> Dict:
     """
     Test H₀: There are no risk differences between zip codes.
     
     Tests top N zip codes by policy count to ensure sufficient sample sizes.
+    Use ``test_all_zipcodes`` for corrected per-zip-code comparisons.
     
     Parameters
     ----------
-    df : pd.DataFrame
-        Input dataframe
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or a view shared across tests (see ``prepare_test_view``)
     alpha : float
         Significance level
-    top_n : int
-        Number of top zip codes to test (default: 10)
+    top_n : int, optional
+        Number of top zip codes to test (default: 10). None tests all zip codes.
     
     Returns
     -------
@@ -207,87 +217,27 @@ def test_zipcode_risk_differences(df: pd.DataFrame, alpha: float = 0.05,
     results = {}
     
     # Get top N zip codes by policy count
-    zipcode_counts = df['PostalCode'].value_counts().head(top_n)
-    top_zipcodes = zipcode_counts.index.tolist()
-    
-    df_filtered = df[df['PostalCode'].isin(top_zipcodes)].copy()
-    df_filtered['HasClaim'] = (df_filtered['TotalClaims'] > 0).astype(int)
+    group_stats = _top_groups(group_statistics(df, 'PostalCode'), top_n)
+    top_zipcodes = group_stats.index.tolist()
     
     # Test 1: Claim Frequency (Chi-squared test)
-    contingency_table = pd.crosstab(df_filtered['PostalCode'], df_filtered['HasClaim'])
-    
-    if contingency_table.shape[0] < 2:
-        results['frequency_test'] = {
-            'test': 'chi2_contingency',
-            'statistic': None,
-            'p_value': None,
-            'result': 'Insufficient data'
-        }
-    else:
-        chi2, p_value, dof, expected = stats.chi2_contingency(contingency_table)
-        results['frequency_test'] = {
-            'test': 'chi2_contingency',
-            'statistic': chi2,
-            'p_value': p_value,
-            'degrees_of_freedom': dof,
-            'reject_null': p_value < alpha,
-            'interpretation': 'Reject H₀' if p_value < alpha else 'Fail to reject H₀',
-            'top_zipcodes_tested': top_zipcodes
-        }
+    results['frequency_test'] = _frequency_test(group_stats, alpha,
+                                                top_zipcodes_tested=top_zipcodes)
     
     # Test 2: Claim Severity
-    df_with_claims = df_filtered[df_filtered['TotalClaims'] > 0].copy()
-    
-    if len(df_with_claims) == 0:
-        results['severity_test'] = {
-            'test': 'ANOVA',
-            'statistic': None,
-            'p_value': None,
-            'result': 'No claims data available'
-        }
-    else:
-        groups = [group['TotalClaims'].values 
-                 for name, group in df_with_claims.groupby('PostalCode')]
-        groups = [g for g in groups if len(g) >= 2]
-        
-        if len(groups) < 2:
-            results['severity_test'] = {
-                'test': 'ANOVA',
-                'statistic': None,
-                'p_value': None,
-                'result': 'Insufficient groups for ANOVA'
-            }
-        else:
-            try:
-                f_stat, p_value = stats.f_oneway(*groups)
-                test_name = 'ANOVA'
-            except:
-                h_stat, p_value = stats.kruskal(*groups)
-                test_name = 'Kruskal-Wallis'
-                f_stat = h_stat
-            
-            results['severity_test'] = {
-                'test': test_name,
-                'statistic': f_stat,
-                'p_value': p_value,
-                'reject_null': p_value < alpha,
-                'interpretation': 'Reject H₀' if p_value < alpha else 'Fail to reject H₀'
-            }
-    
-    freq_reject = results.get('frequency_test', {}).get('reject_null', False)
-    sev_reject = results.get('severity_test', {}).get('reject_null', False)
+    results['severity_test'] = _severity_anova(group_stats, alpha)
     
-    results['overall_interpretation'] = {
-        'reject_null': freq_reject or sev_reject,
-        'summary': 'Risk differences exist between zip codes' if (freq_reject or sev_reject)
-                   else 'No significant risk differences between zip codes'
-    }
+    results['overall_interpretation'] = _overall_interpretation(
+        results,
+        'Risk differences exist between zip codes',
+        'No significant risk differences between zip codes'
+    )
     
     return results
 
 
-def test_zipcode_margin_differences(df: pd.DataFrame, alpha: float = 0.05,
-                                    top_n: int = 10) -> Dict:
+def test_zipcode_margin_differences(df: Union[pd.DataFrame, HypothesisDataView], alpha: float = 0.05,
+                                    top_n: Optional[int] = 10) -> Dict:
     """
     Test H₀: There is no significant margin (profit) difference between zip codes.
     
@@ -295,12 +245,12 @@ def test_zipcode_margin_differences(df: pd.DataFrame, alpha: float = 0.05,
     
     Parameters
     ----------
-    df : pd.DataFrame
-        Input dataframe
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or a view shared across tests (see ``prepare_test_view``)
     alpha : float
         Significance level
-    top_n : int
-        Number of top zip codes to test
+    top_n : int, optional
+        Number of top zip codes to test. None tests all zip codes.
     
     Returns
     -------
@@ -310,16 +260,10 @@ def test_zipcode_margin_differences(df: pd.DataFrame, alpha: float = 0.05,
     results = {}
     
     # Get top N zip codes
-    zipcode_counts = df['PostalCode'].value_counts().head(top_n)
-    top_zipcodes = zipcode_counts.index.tolist()
+    group_stats = _top_groups(group_statistics(df, 'PostalCode'), top_n)
+    top_zipcodes = group_stats.index.tolist()
     
-    df_filtered = df[df['PostalCode'].isin(top_zipcodes)].copy()
-    df_filtered['Margin'] = df_filtered['TotalPremium'] - df_filtered['TotalClaims']
-    
-    # Group by zip code
-    groups = [group['Margin'].values 
-             for name, group in df_filtered.groupby('PostalCode')]
-    groups = [g for g in groups if len(g) >= 2]
+    groups = group_stats[group_stats['Total_Policies'] >= 2]
     
     if len(groups) < 2:
         results['test'] = {
@@ -329,34 +273,29 @@ def test_zipcode_margin_differences(df: pd.DataFrame, alpha: float = 0.05,
             'result': 'Insufficient groups for ANOVA'
         }
     else:
-        try:
-            f_stat, p_value = stats.f_oneway(*groups)
-            test_name = 'ANOVA'
-        except:
-            h_stat, p_value = stats.kruskal(*groups)
-            test_name = 'Kruskal-Wallis'
-            f_stat = h_stat
-        
-        results['test'] = {
-            'test': test_name,
-            'statistic': f_stat,
-            'p_value': p_value,
-            'reject_null': p_value < alpha,
-            'interpretation': 'Reject H₀' if p_value < alpha else 'Fail to reject H₀',
-            'top_zipcodes_tested': top_zipcodes
-        }
+        outcome = anova_from_moments(
+            groups['Total_Policies'].to_numpy(),
+            (groups['Total_Premium'] - groups['Total_Claims']).to_numpy(),
+            groups['Margin_SumSq'].to_numpy()
+        )
+        results['test'] = _test_result('ANOVA', outcome, alpha,
+                                       top_zipcodes_tested=top_zipcodes)
     
     return results
 
 
-def test_gender_risk_differences(df: pd.DataFrame, alpha: float = 0.05) -> Dict:
+def test_gender_risk_differences(df: Union[pd.DataFrame, HypothesisDataView], alpha: float = 0.05) -> Dict:
     """
     Test H₀: There is no significant risk difference between Women and Men.
     
+    Uses chi-squared test for claim frequency and a pooled-variance t-test
+    (``scipy.stats.ttest_ind``) for claim severity, both computed from
+    per-gender sufficient statistics.
+    
     Parameters
     ----------
-    df : pd.DataFrame
-        Input dataframe
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or a view shared across tests (see ``prepare_test_view``)
     alpha : float
         Significance level
     
@@ -367,41 +306,20 @@ def test_gender_risk_differences(df: pd.DataFrame, alpha: float = 0.05) -> Dict:
     """
     results = {}
     
-    # Filter to only Male and Female (exclude "Not specified")
-    df_filtered = df[df['Gender'].isin(['Male', 'Female'])].copy()
+    # Only Male and Female (exclude "Not specified")
+    group_stats = group_statistics(df, 'Gender')
+    group_stats = group_stats[group_stats.index.isin(['Male', 'Female'])]
     
-    if len(df_filtered) == 0:
+    if len(group_stats) == 0:
         return {
             'error': 'No data with specified gender (Male/Female) available'
         }
     
-    df_filtered['HasClaim'] = (df_filtered['TotalClaims'] > 0).astype(int)
-    
     # Test 1: Claim Frequency (Chi-squared test)
-    contingency_table = pd.crosstab(df_filtered['Gender'], df_filtered['HasClaim'])
-    
-    if contingency_table.shape[0] < 2:
-        results['frequency_test'] = {
-            'test': 'chi2_contingency',
-            'statistic': None,
-            'p_value': None,
-            'result': 'Insufficient data'
-        }
-    else:
-        chi2, p_value, dof, expected = stats.chi2_contingency(contingency_table)
-        results['frequency_test'] = {
-            'test': 'chi2_contingency',
-            'statistic': chi2,
-            'p_value': p_value,
-            'degrees_of_freedom': dof,
-            'reject_null': p_value < alpha,
-            'interpretation': 'Reject H₀' if p_value < alpha else 'Fail to reject H₀'
-        }
-    
-    # Test 2: Claim Severity (t-test or Mann-Whitney U)
-    df_with_claims = df_filtered[df_filtered['TotalClaims'] > 0].copy()
+    results['frequency_test'] = _frequency_test(group_stats, alpha)
     
-    if len(df_with_claims) == 0:
+    # Test 2: Claim Severity (pooled-variance t-test)
+    if group_stats['Claims_Count'].sum() == 0:
         results['severity_test'] = {
             'test': 't-test',
             'statistic': None,
@@ -409,10 +327,9 @@ def test_gender_risk_differences(df: pd.DataFrame, alpha: float = 0.05) -> Dict:
             'result': 'No claims data available'
         }
     else:
-        male_claims = df_with_claims[df_with_claims['Gender'] == 'Male']['TotalClaims'].values
-        female_claims = df_with_claims[df_with_claims['Gender'] == 'Female']['TotalClaims'].values
+        claim_counts = group_stats['Claims_Count']
         
-        if len(male_claims) < 2 or len(female_claims) < 2:
+        if claim_counts.get('Male', 0) < 2 or claim_counts.get('Female', 0) < 2:
             results['severity_test'] = {
                 'test': 't-test',
                 'statistic': None,
@@ -420,33 +337,23 @@ def test_gender_risk_differences(df: pd.DataFrame, alpha: float = 0.05) -> Dict:
                 'result': 'Insufficient data for comparison'
             }
         else:
-            # Try t-test first, use Mann-Whitney U if assumptions not met
-            try:
-                t_stat, p_value = stats.ttest_ind(male_claims, female_claims)
-                test_name = 't-test'
-            except:
-                u_stat, p_value = stats.mannwhitneyu(male_claims, female_claims, alternative='two-sided')
-                test_name = 'Mann-Whitney U'
-                t_stat = u_stat
-            
-            results['severity_test'] = {
-                'test': test_name,
-                'statistic': t_stat,
-                'p_value': p_value,
-                'reject_null': p_value < alpha,
-                'interpretation': 'Reject H₀' if p_value < alpha else 'Fail to reject H₀',
-                'male_mean': np.mean(male_claims),
-                'female_mean': np.mean(female_claims)
-            }
-    
-    freq_reject = results.get('frequency_test', {}).get('reject_null', False)
-    sev_reject = results.get('severity_test', {}).get('reject_null', False)
-    
-    results['overall_interpretation'] = {
-        'reject_null': freq_reject or sev_reject,
-        'summary': 'Risk differences exist between genders' if (freq_reject or sev_reject)
-                   else 'No significant risk differences between genders'
-    }
+            male = group_stats.loc['Male']
+            female = group_stats.loc['Female']
+            outcome = ttest_from_moments(
+                male['Claims_Count'], male['Severity_Sum'], male['Severity_SumSq'],
+                female['Claims_Count'], female['Severity_Sum'], female['Severity_SumSq']
+            )
+            results['severity_test'] = _test_result(
+                't-test', outcome, alpha,
+                male_mean=outcome['mean_a'],
+                female_mean=outcome['mean_b']
+            )
+    
+    results['overall_interpretation'] = _overall_interpretation(
+        results,
+        'Risk differences exist between genders',
+        'No significant risk differences between genders'
+    )
     
     return results
 
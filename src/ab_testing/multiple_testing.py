@@ -0,0 +1,248 @@
+"""Full-population group testing with multiple-comparison correction.
+
+Every group (e.g. every PostalCode) is compared against the rest of the
+portfolio, or against every other group, using tests computed from the
+per-group sufficient statistics of ``src.eda.aggregation``. All comparisons
+are evaluated as NumPy vectors in fixed-size batches, and the p-values are
+adjusted with Benjamini–Hochberg or Holm before ranking.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from typing import Dict, Tuple, Union
+
+from src.ab_testing.data_view import HypothesisDataView, group_statistics
+
+METRICS = ('frequency', 'severity', 'margin')
+CORRECTIONS = ('fdr_bh', 'holm', 'none')
+
+
+def adjust_pvalues(p_values: np.ndarray, method: str = 'fdr_bh') -> np.ndarray:
+    """
+    Adjust p-values for multiple comparisons.
+
+    Parameters
+    ----------
+    p_values : np.ndarray
+        Raw p-values (NaN entries are left as NaN and not counted)
+    method : str
+        'fdr_bh' (Benjamini–Hochberg false discovery rate), 'holm'
+        (Holm–Bonferroni family-wise error rate) or 'none'
+
+    Returns
+    -------
+    np.ndarray
+        Adjusted p-values, capped at 1
+    """
+    if method not in CORRECTIONS:
+        raise ValueError(f"Unknown correction method: {method}. Use one of {CORRECTIONS}")
+
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full_like(p_values, np.nan)
+    valid = ~np.isnan(p_values)
+    p = p_values[valid]
+    m = len(p)
+    if m == 0 or method == 'none':
+        adjusted[valid] = p
+        return adjusted
+
+    order = np.argsort(p)
+    ranked = p[order]
+    ranks = np.arange(1, m + 1)
+
+    if method == 'fdr_bh':
+        scaled = ranked * m / ranks
+        scaled = np.minimum.accumulate(scaled[::-1])[::-1]
+    else:
+        scaled = ranked * (m - ranks + 1)
+        scaled = np.maximum.accumulate(scaled)
+
+    result = np.empty(m)
+    result[order] = np.minimum(scaled, 1.0)
+    adjusted[valid] = result
+    return adjusted
+
+
+def _proportion_ztest(k1, n1, k2, n2) -> Tuple[np.ndarray, np.ndarray]:
+    """Two-proportion z-test (pooled variance), vectorized."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p1, p2 = k1 / n1, k2 / n2
+        pooled = (k1 + k2) / (n1 + n2)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        z = (p1 - p2) / se
+    p_value = 2 * stats.norm.sf(np.abs(z))
+    return z, p_value
+
+
+def _welch_ttest(n1, s1, ss1, n2, s2, ss2) -> Tuple[np.ndarray, np.ndarray]:
+    """Welch's t-test from count, sum and sum of squares, vectorized."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m1, m2 = s1 / n1, s2 / n2
+        v1 = np.maximum(ss1 - s1 * m1, 0.0) / (n1 - 1)
+        v2 = np.maximum(ss2 - s2 * m2, 0.0) / (n2 - 1)
+        a, b = v1 / n1, v2 / n2
+        t = (m1 - m2) / np.sqrt(a + b)
+        df = (a + b) ** 2 / (a ** 2 / (n1 - 1) + b ** 2 / (n2 - 1))
+    p_value = 2 * stats.t.sf(np.abs(t), df)
+    return t, p_value
+
+
+def _metric_moments(group_stats: pd.DataFrame, metric: str) -> Dict[str, np.ndarray]:
+    """Count, sum and sum of squares of the tested metric for each group."""
+    if metric == 'frequency':
+        return {
+            'count': group_stats['Total_Policies'].to_numpy(dtype=np.float64),
+            'sum': group_stats['Claims_Count'].to_numpy(dtype=np.float64),
+        }
+    if metric == 'severity':
+        return {
+            'count': group_stats['Claims_Count'].to_numpy(dtype=np.float64),
+            'sum': group_stats['Severity_Sum'].to_numpy(),
+            'sumsq': group_stats['Severity_SumSq'].to_numpy(),
+        }
+    return {
+        'count': group_stats['Total_Policies'].to_numpy(dtype=np.float64),
+        'sum': (group_stats['Total_Premium'] - group_stats['Total_Claims']).to_numpy(),
+        'sumsq': group_stats['Margin_SumSq'].to_numpy(),
+    }
+
+
+def _compare(metric: str, a: Dict[str, np.ndarray], b: Dict[str, np.ndarray]):
+    """Statistic and p-value for vectors of group-A vs group-B moments."""
+    if metric == 'frequency':
+        return _proportion_ztest(a['sum'], a['count'], b['sum'], b['count'])
+    return _welch_ttest(a['count'], a['sum'], a['sumsq'], b['count'], b['sum'], b['sumsq'])
+
+
+def test_all_groups(df: Union[pd.DataFrame, HypothesisDataView], group_col: str = 'PostalCode',
+                    metric: str = 'frequency', comparison: str = 'one_vs_rest',
+                    correction: str = 'fdr_bh', alpha: float = 0.05,
+                    min_count: int = 30, batch_size: int = 100_000) -> pd.DataFrame:
+    """
+    Test every group of a dimension and rank the results after correction.
+
+    Parameters
+    ----------
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or a shared view
+    group_col : str
+        Column to group by (default: 'PostalCode')
+    metric : str
+        'frequency' (two-proportion z-test on HasClaim), 'severity' (Welch
+        t-test on TotalClaims given a claim) or 'margin' (Welch t-test on
+        TotalPremium - TotalClaims)
+    comparison : str
+        'one_vs_rest' compares each group with the rest of the portfolio;
+        'pairwise' compares every pair of groups
+    correction : str
+        Multiple-comparison correction: 'fdr_bh', 'holm' or 'none'
+    alpha : float
+        Significance level applied to the adjusted p-values
+    min_count : int
+        Groups with fewer observations of the metric (policies, or claims for
+        severity) are not tested
+    batch_size : int
+        Number of comparisons evaluated per vectorized batch
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per comparison with group estimates, difference, statistic,
+        p_value, p_adjusted and reject_null, sorted by p_adjusted
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}. Use one of {METRICS}")
+    if comparison not in ('one_vs_rest', 'pairwise'):
+        raise ValueError(f"Unknown comparison: {comparison}. Use 'one_vs_rest' or 'pairwise'")
+
+    group_stats = group_statistics(df, group_col)
+    moments = _metric_moments(group_stats, metric)
+    labels = group_stats.index.to_numpy()
+
+    # Groups need at least two observations for a variance
+    eligible = np.flatnonzero(moments['count'] >= max(min_count, 2))
+
+    if comparison == 'one_vs_rest':
+        totals = {key: values.sum() for key, values in moments.items()}
+        left = eligible
+        right = None
+    else:
+        left, right = np.triu_indices(len(eligible), k=1)
+        left, right = eligible[left], eligible[right]
+
+    statistic = np.empty(len(left))
+    p_values = np.empty(len(left))
+    for start in range(0, len(left), batch_size):
+        stop = start + batch_size
+        a = {key: values[left[start:stop]] for key, values in moments.items()}
+        if right is None:
+            b = {key: totals[key] - a[key] for key in moments}
+        else:
+            b = {key: values[right[start:stop]] for key, values in moments.items()}
+        statistic[start:stop], p_values[start:stop] = _compare(metric, a, b)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimate_a = moments['sum'][left] / moments['count'][left]
+        if right is None:
+            rest_count = moments['count'].sum() - moments['count'][left]
+            estimate_b = (moments['sum'].sum() - moments['sum'][left]) / rest_count
+        else:
+            estimate_b = moments['sum'][right] / moments['count'][right]
+
+    p_adjusted = adjust_pvalues(p_values, correction)
+
+    results = pd.DataFrame({group_col: labels[left]})
+    if right is not None:
+        results[f'{group_col}_B'] = labels[right]
+    results['n'] = moments['count'][left].astype(np.int64)
+    results['n_B'] = (rest_count if right is None else moments['count'][right]).astype(np.int64)
+    results['estimate'] = estimate_a
+    results['estimate_B'] = estimate_b
+    results['difference'] = estimate_a - estimate_b
+    results['statistic'] = statistic
+    results['p_value'] = p_values
+    results['p_adjusted'] = p_adjusted
+    results['reject_null'] = p_adjusted < alpha
+
+    results = results.sort_values(['p_adjusted', 'p_value'], kind='stable', ignore_index=True)
+    results.attrs.update({
+        'metric': metric,
+        'comparison': comparison,
+        'correction': correction,
+        'alpha': alpha,
+        'groups_tested': int(len(eligible)),
+        'groups_total': int(len(labels)),
+    })
+    return results
+
+
+def test_all_zipcodes(df: Union[pd.DataFrame, HypothesisDataView], metric: str = 'frequency',
+                      comparison: str = 'one_vs_rest', correction: str = 'fdr_bh',
+                      alpha: float = 0.05, min_count: int = 30) -> pd.DataFrame:
+    """
+    Test every PostalCode instead of only the top N (see ``test_all_groups``).
+
+    Parameters
+    ----------
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or a shared view
+    metric : str
+        'frequency', 'severity' or 'margin'
+    comparison : str
+        'one_vs_rest' or 'pairwise'
+    correction : str
+        'fdr_bh', 'holm' or 'none'
+    alpha : float
+        Significance level applied to the adjusted p-values
+    min_count : int
+        Minimum observations for a zip code to be tested
+
+    Returns
+    -------
+    pd.DataFrame
+        Ranked comparison table
+    """
+    return test_all_groups(df, group_col='PostalCode', metric=metric,
+                           comparison=comparison, correction=correction,
+                           alpha=alpha, min_count=min_count)
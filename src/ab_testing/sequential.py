@@ -0,0 +1,342 @@
+"""Sequential A/B testing on data that arrives in chunks.
+
+``SequentialABTest`` keeps running per-group statistics: policy and claim
+counts (the frequency contingency table) plus Welford-style means and sums of
+squared deviations for claim severity and margin. Each new chunk, such as a
+month of data or one chunk from ``load_insurance_data(chunksize=...)``, is
+reduced with ``np.bincount`` and merged into the running state. Ingesting a
+chunk therefore costs time proportional to its rows.
+
+Every look at the data runs one of the registered hypothesis tests on the
+running statistics. The test is compared to an alpha-spending boundary
+(O'Brien–Fleming or Pocock type), so repeated looks keep the overall type I
+error at or below ``alpha``.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.ab_testing.data_view import HypothesisDataView
+from src.ab_testing.suite import HYPOTHESIS_TESTS, result_rows
+from src.eda.aggregation import STAT_COLUMNS, group_codes
+
+SPENDING_FUNCTIONS = ('obrien_fleming', 'pocock')
+
+# Running per-group state: plain sums and Welford (count, mean, M2) triples
+_SUM_FIELDS = ('policies', 'claims', 'premium', 'premium_sq', 'total_claims', 'claims_sq')
+_WELFORD_FIELDS = ('severity_mean', 'severity_m2', 'margin_mean', 'margin_m2')
+
+
+def alpha_spent(information: float, alpha: float = 0.05,
+                spending: str = 'obrien_fleming') -> float:
+    """
+    Cumulative type I error allowed at an information fraction.
+
+    Parameters
+    ----------
+    information : float
+        Fraction of the planned information observed so far, in [0, 1]
+    alpha : float
+        Overall significance level
+    spending : str
+        'obrien_fleming' (strict early, close to alpha at the end) or
+        'pocock' (spends alpha more evenly over the looks)
+
+    Returns
+    -------
+    float
+        Alpha that may have been spent up to this point
+    """
+    if spending not in SPENDING_FUNCTIONS:
+        raise ValueError(f"Unknown spending function: {spending}. Use one of {SPENDING_FUNCTIONS}")
+
+    information = float(np.clip(information, 0.0, 1.0))
+    if information == 0:
+        return 0.0
+    if spending == 'obrien_fleming':
+        z = stats.norm.ppf(1 - alpha / 2)
+        return float(2 * stats.norm.sf(z / np.sqrt(information)))
+    return float(alpha * np.log(1 + (np.e - 1) * information))
+
+
+def _merge_welford(n_a: np.ndarray, mean_a: np.ndarray, m2_a: np.ndarray,
+                   n_b: np.ndarray, mean_b: np.ndarray, m2_b: np.ndarray):
+    """Combine two sets of (count, mean, M2) statistics (Chan et al.)."""
+    n = n_a + n_b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(n > 0, n_b / n, 0.0)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * weight
+    m2 = m2_a + m2_b + delta * delta * n_a * weight
+    return mean, m2
+
+
+def _chunk_welford(codes: np.ndarray, values: np.ndarray, n_groups: int):
+    """Per-group count, mean and M2 of one chunk (two-pass within the chunk)."""
+    count = np.bincount(codes, minlength=n_groups).astype(np.float64)
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(count > 0, total / count, 0.0)
+    deviation = values - mean[codes]
+    m2 = np.bincount(codes, weights=deviation * deviation, minlength=n_groups)
+    return count, mean, m2
+
+
+class SequentialABTest:
+    """
+    Incremental hypothesis test with alpha-spending boundaries.
+
+    Parameters
+    ----------
+    test : str
+        Name from ``HYPOTHESIS_TESTS`` ('province', 'zipcode', 'margin' or
+        'gender')
+    alpha : float
+        Overall significance level across all looks
+    planned_policies : int, optional
+        Expected number of policies at the final look. The information
+        fraction of a look is the policies seen so far over this number.
+    max_looks : int
+        Planned number of looks, used for the information fraction when
+        ``planned_policies`` is not given (default: 19, one per month of the
+        Feb 2014 – Aug 2015 data)
+    spending : str
+        Alpha-spending function: 'obrien_fleming' or 'pocock'
+    premium_col : str
+        Premium column name
+    claims_col : str
+        Claims column name
+    """
+
+    def __init__(self, test: str = 'gender', alpha: float = 0.05,
+                 planned_policies: Optional[int] = None, max_looks: int = 19,
+                 spending: str = 'obrien_fleming',
+                 premium_col: str = 'TotalPremium',
+                 claims_col: str = 'TotalClaims'):
+        if test not in HYPOTHESIS_TESTS:
+            raise ValueError(f"Unknown test: {test}. Use one of {list(HYPOTHESIS_TESTS)}")
+        if spending not in SPENDING_FUNCTIONS:
+            raise ValueError(f"Unknown spending function: {spending}. Use one of {SPENDING_FUNCTIONS}")
+
+        self.test = test
+        self.group_col = HYPOTHESIS_TESTS[test][1]
+        self.alpha = alpha
+        self.planned_policies = planned_policies
+        self.max_looks = max_looks
+        self.spending = spending
+        self.premium_col = premium_col
+        self.claims_col = claims_col
+
+        self.labels = pd.Index([], name=self.group_col)
+        self._state: Dict[str, np.ndarray] = {
+            field: np.zeros(0) for field in _SUM_FIELDS + _WELFORD_FIELDS
+        }
+        self.n_rows = 0
+        self.n_looks = 0
+        self._alpha_spent = 0.0
+        self._information = 0.0
+        self._rejected: Dict[str, int] = {}
+        self._history: List[Dict] = []
+
+    def _global_codes(self, values: pd.Series) -> np.ndarray:
+        """Map a chunk's group values to running group codes, adding new groups."""
+        codes, labels = group_codes(values)
+        positions = self.labels.get_indexer(pd.Index(labels))
+        new = positions < 0
+        if new.any():
+            positions[new] = len(self.labels) + np.arange(new.sum())
+            self.labels = self.labels.append(pd.Index(labels[new], name=self.group_col))
+            for field, state in self._state.items():
+                self._state[field] = np.concatenate([state, np.zeros(new.sum())])
+        # Missing values keep code -1
+        return np.append(positions, -1)[codes]
+
+    def update(self, chunk: pd.DataFrame) -> 'SequentialABTest':
+        """
+        Add a chunk of rows to the running statistics.
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame
+            New rows with the group, premium and claims columns
+
+        Returns
+        -------
+        SequentialABTest
+            self, to allow chaining
+        """
+        codes = self._global_codes(chunk[self.group_col])
+        premium = chunk[self.premium_col].to_numpy(dtype=np.float64)
+        claims = chunk[self.claims_col].to_numpy(dtype=np.float64)
+        keep = codes >= 0
+        codes, premium, claims = codes[keep], premium[keep], claims[keep]
+        n_groups = len(self.labels)
+        state = self._state
+
+        # Merge the chunk's Welford statistics using the counts before this chunk
+        has_claim = claims > 0
+        margin = _chunk_welford(codes, premium - claims, n_groups)
+        severity = _chunk_welford(codes[has_claim], claims[has_claim], n_groups)
+        state['margin_mean'], state['margin_m2'] = _merge_welford(
+            state['policies'], state['margin_mean'], state['margin_m2'], *margin
+        )
+        state['severity_mean'], state['severity_m2'] = _merge_welford(
+            state['claims'], state['severity_mean'], state['severity_m2'], *severity
+        )
+        state['policies'] = state['policies'] + margin[0]
+        state['claims'] = state['claims'] + severity[0]
+
+        for field, values in (('premium', premium), ('premium_sq', premium * premium),
+                              ('total_claims', claims), ('claims_sq', claims * claims)):
+            state[field] = state[field] + np.bincount(codes, weights=values, minlength=n_groups)
+
+        self.n_rows += int(keep.sum())
+        return self
+
+    def group_statistics(self) -> pd.DataFrame:
+        """Running per-group sufficient statistics in the ``STAT_COLUMNS`` layout."""
+        state = self._state
+        policies, claims = state['policies'], state['claims']
+        table = pd.DataFrame({
+            'Total_Policies': policies.round().astype(np.int64),
+            'Claims_Count': claims.round().astype(np.int64),
+            'Total_Premium': state['premium'],
+            'Premium_SumSq': state['premium_sq'],
+            'Total_Claims': state['total_claims'],
+            'Claims_SumSq': state['claims_sq'],
+            'Severity_Sum': claims * state['severity_mean'],
+            'Severity_SumSq': state['severity_m2'] + claims * state['severity_mean'] ** 2,
+            'Margin_SumSq': state['margin_m2'] + policies * state['margin_mean'] ** 2,
+        }, index=self.labels)[STAT_COLUMNS]
+        return table[table['Total_Policies'] > 0]
+
+    def summary(self) -> pd.DataFrame:
+        """Running claim frequency and Welford means/standard deviations per group."""
+        state = self._state
+        with np.errstate(divide='ignore', invalid='ignore'):
+            summary = pd.DataFrame({
+                'Total_Policies': state['policies'].astype(np.int64),
+                'Claims_Count': state['claims'].astype(np.int64),
+                'Claim_Frequency': state['claims'] / state['policies'],
+                'Mean_Severity': np.where(state['claims'] > 0, state['severity_mean'], np.nan),
+                'Std_Severity': np.sqrt(state['severity_m2'] / (state['claims'] - 1)),
+                'Mean_Margin': state['margin_mean'],
+                'Std_Margin': np.sqrt(state['margin_m2'] / (state['policies'] - 1)),
+            }, index=self.labels)
+        summary.loc[summary['Claims_Count'] < 2, 'Std_Severity'] = np.nan
+        summary.loc[summary['Total_Policies'] < 2, 'Std_Margin'] = np.nan
+        return summary[summary['Total_Policies'] > 0]
+
+    def information_fraction(self, look: Optional[int] = None) -> float:
+        """Share of the planned information observed at a look (default: the next look)."""
+        if self.planned_policies:
+            return min(self.n_rows / self.planned_policies, 1.0)
+        look = self.n_looks + 1 if look is None else look
+        return min(look / self.max_looks, 1.0)
+
+    def look(self) -> pd.DataFrame:
+        """
+        Test the data seen so far against the sequential boundary.
+
+        Each look spends the increase in cumulative alpha since the previous
+        look, so the looks together never spend more than ``alpha``. A
+        component that crossed its boundary at an earlier look stays rejected.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per test component with statistic, p_value, nominal_alpha
+            (the boundary at this look), alpha_spent, reject_null and
+            rejected_at_look
+
+        Raises
+        ------
+        ValueError
+            If an earlier look already reached the planned maximum
+            information: the whole alpha is spent, so no further look could
+            reject. Plan for more information with ``planned_policies`` or
+            ``max_looks``.
+        """
+        if self._information >= 1:
+            raise ValueError(
+                f"The planned maximum information was reached at look {self.n_looks}; "
+                "the alpha budget is spent. Increase planned_policies or max_looks "
+                "to plan for more looks."
+            )
+        information = self.information_fraction()
+        self._information = information
+        self.n_looks += 1
+        cumulative = alpha_spent(information, self.alpha, self.spending)
+        nominal = max(cumulative - self._alpha_spent, 0.0)
+        self._alpha_spent = max(cumulative, self._alpha_spent)
+
+        func, _ = HYPOTHESIS_TESTS[self.test]
+        view = HypothesisDataView.from_statistics({self.group_col: self.group_statistics()},
+                                                  self.n_rows)
+        results = func(view, alpha=self.alpha)
+
+        rows = []
+        for row in result_rows(self.test, results, wall_time=np.nan):
+            del row['wall_time'], row['interpretation']
+            component = row['component']
+            p_value = row['p_value']
+            if component not in self._rejected and p_value is not None and p_value < nominal:
+                self._rejected[component] = self.n_looks
+            row.update({
+                'look': self.n_looks,
+                'policies': self.n_rows,
+                'information_fraction': information,
+                'nominal_alpha': nominal,
+                'alpha_spent': self._alpha_spent,
+                'reject_null': component in self._rejected,
+                'rejected_at_look': self._rejected.get(component),
+            })
+            rows.append(row)
+
+        self._history.extend(rows)
+        columns = ['look', 'policies', 'information_fraction', 'hypothesis', 'component',
+                   'test', 'statistic', 'p_value', 'nominal_alpha', 'alpha_spent',
+                   'reject_null', 'rejected_at_look']
+        return pd.DataFrame(rows, columns=columns)
+
+    @property
+    def history(self) -> pd.DataFrame:
+        """Results of every look so far."""
+        if not self._history:
+            return pd.DataFrame()
+        return pd.DataFrame(self._history)[list(self._history[0].keys())]
+
+
+def run_sequential_test(chunks: Iterable[pd.DataFrame], test: str = 'gender',
+                        **kwargs) -> SequentialABTest:
+    """
+    Feed chunks (e.g. monthly batches or loader chunks) and look after each.
+
+    Parameters
+    ----------
+    chunks : iterable of pd.DataFrame
+        Data in arrival order, e.g. ``load_insurance_data(chunksize=...)``
+    test : str
+        Name from ``HYPOTHESIS_TESTS``
+    **kwargs
+        Passed to ``SequentialABTest``
+
+    Returns
+    -------
+    SequentialABTest
+        The test object; see its ``history`` for the result of every look
+
+    Raises
+    ------
+    ValueError
+        If there are more chunks than the planned looks allow (see
+        ``SequentialABTest.look``)
+    """
+    sequential = SequentialABTest(test, **kwargs)
+    for chunk in chunks:
+        sequential.update(chunk)
+        sequential.look()
+    return sequential
@@ -0,0 +1,179 @@
+"""Hypothesis tests computed from per-group sufficient statistics.
+
+Chi-squared, one-way ANOVA and two-sample t-tests only depend on per-group
+counts, sums and sums of squares. Computing those once with a vectorized
+groupby (see ``src.eda.aggregation``) makes every test O(groups) instead of
+O(rows), so testing thousands of PostalCodes costs a single scan.
+"""
+
+import numpy as np
+from scipy import stats
+from typing import Dict, Optional
+
+
+def group_moments(codes: np.ndarray, values: np.ndarray,
+                  n_groups: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Per-group count, sum and sum of squares with ``np.bincount``.
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Integer group code per row (negative codes are ignored)
+    values : np.ndarray
+        Values to summarise
+    n_groups : int, optional
+        Number of groups (default: max code + 1)
+
+    Returns
+    -------
+    dict
+        ``{'count', 'sum', 'sumsq'}`` arrays of length ``n_groups``
+    """
+    codes = np.asarray(codes)
+    values = np.asarray(values, dtype=np.float64)
+    keep = codes >= 0
+    codes, values = codes[keep], values[keep]
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+    return {
+        'count': np.bincount(codes, minlength=n_groups).astype(np.float64),
+        'sum': np.bincount(codes, weights=values, minlength=n_groups),
+        'sumsq': np.bincount(codes, weights=values * values, minlength=n_groups),
+    }
+
+
+def chi2_from_counts(event_counts: np.ndarray, totals: np.ndarray) -> Dict:
+    """
+    Chi-squared test of independence between group and a binary outcome.
+
+    Equivalent to ``chi2_contingency(pd.crosstab(group, outcome))``, built from
+    the per-group event counts instead of the raw rows.
+
+    Parameters
+    ----------
+    event_counts : np.ndarray
+        Number of rows with the event (e.g. a claim) per group
+    totals : np.ndarray
+        Number of rows per group
+
+    Returns
+    -------
+    dict
+        statistic, p_value, degrees_of_freedom and the contingency table
+    """
+    event_counts = np.asarray(event_counts, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+
+    table = np.column_stack([totals - event_counts, event_counts])
+    table = table[totals > 0]
+    # Like crosstab, only keep outcome columns that actually occur
+    table = table[:, table.sum(axis=0) > 0]
+
+    chi2, p_value, dof, _ = stats.chi2_contingency(table)
+    return {
+        'statistic': float(chi2),
+        'p_value': float(p_value),
+        'degrees_of_freedom': int(dof),
+        'table': table,
+    }
+
+
+def anova_from_moments(count: np.ndarray, total: np.ndarray, sumsq: np.ndarray) -> Dict:
+    """
+    One-way ANOVA F-test from per-group count, sum and sum of squares.
+
+    Parameters
+    ----------
+    count : np.ndarray
+        Observations per group (groups with zero observations are ignored)
+    total : np.ndarray
+        Sum of values per group
+    sumsq : np.ndarray
+        Sum of squared values per group
+
+    Returns
+    -------
+    dict
+        statistic (F), p_value, df_between and df_within
+    """
+    count = np.asarray(count, dtype=np.float64)
+    keep = count > 0
+    count, total, sumsq = count[keep], np.asarray(total)[keep], np.asarray(sumsq)[keep]
+
+    n_total = count.sum()
+    k = len(count)
+    df_between = k - 1
+    df_within = n_total - k
+
+    grand_mean = total.sum() / n_total
+    group_means = total / count
+    ss_between = np.sum(count * (group_means - grand_mean) ** 2)
+    ss_within = np.sum(np.maximum(sumsq - total * group_means, 0.0))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_stat = (ss_between / df_between) / (ss_within / df_within)
+    p_value = stats.f.sf(f_stat, df_between, df_within) if np.isfinite(f_stat) else np.nan
+
+    return {
+        'statistic': float(f_stat),
+        'p_value': float(p_value),
+        'df_between': int(df_between),
+        'df_within': int(df_within),
+    }
+
+
+def _mean_std(count: float, total: float, sumsq: float):
+    """Mean and sample standard deviation from count, sum and sum of squares."""
+    mean = total / count
+    variance = max(sumsq - total * mean, 0.0) / (count - 1)
+    return mean, np.sqrt(variance)
+
+
+def ttest_from_moments(count_a: float, total_a: float, sumsq_a: float,
+                       count_b: float, total_b: float, sumsq_b: float,
+                       equal_var: bool = True) -> Dict:
+    """
+    Two-sample t-test from two groups' sufficient statistics.
+
+    Equivalent to ``scipy.stats.ttest_ind`` on the raw values.
+
+    Parameters
+    ----------
+    count_a, total_a, sumsq_a : float
+        Count, sum and sum of squares of group A
+    count_b, total_b, sumsq_b : float
+        Count, sum and sum of squares of group B
+    equal_var : bool
+        Pooled-variance Student t-test (default) or, if False, Welch's
+        unequal-variance t-test
+
+    Returns
+    -------
+    dict
+        statistic (t), p_value and the two group means
+    """
+    mean_a, std_a = _mean_std(count_a, total_a, sumsq_a)
+    mean_b, std_b = _mean_std(count_b, total_b, sumsq_b)
+
+    t_stat, p_value = stats.ttest_ind_from_stats(
+        mean_a, std_a, count_a, mean_b, std_b, count_b, equal_var=equal_var
+    )
+    return {
+        'statistic': float(t_stat),
+        'p_value': float(p_value),
+        'mean_a': float(mean_a),
+        'mean_b': float(mean_b),
+    }
+
+
+def welch_ttest_from_moments(count_a: float, total_a: float, sumsq_a: float,
+                             count_b: float, total_b: float, sumsq_b: float) -> Dict:
+    """
+    Welch's unequal-variance t-test from two groups' sufficient statistics.
+
+    Same as ``ttest_from_moments(..., equal_var=False)``.
+    """
+    return ttest_from_moments(count_a, total_a, sumsq_a, count_b, total_b, sumsq_b,
+                              equal_var=False)
@@ -0,0 +1,156 @@
+"""Batch runner for the A/B hypothesis test suite.
+
+``run_hypothesis_suite`` prepares one shared ``HypothesisDataView``, computes
+the per-group statistics every requested test needs in a single pass, and
+then runs the independent tests either in-process or on a process pool. Only
+the per-group statistics are sent to the workers, never the row data.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.ab_testing.data_view import HypothesisDataView, prepare_test_view
+from src.ab_testing.hypothesis_tests import (
+    test_gender_risk_differences,
+    test_province_risk_differences,
+    test_zipcode_margin_differences,
+    test_zipcode_risk_differences
+)
+
+# Registered tests: name -> (function, grouping column it needs)
+HYPOTHESIS_TESTS: Dict[str, Tuple[Callable, str]] = {
+    'province': (test_province_risk_differences, 'Province'),
+    'zipcode': (test_zipcode_risk_differences, 'PostalCode'),
+    'margin': (test_zipcode_margin_differences, 'PostalCode'),
+    'gender': (test_gender_risk_differences, 'Gender'),
+}
+
+RESULT_COLUMNS = ['hypothesis', 'component', 'test', 'statistic', 'p_value',
+                  'reject_null', 'interpretation', 'wall_time']
+
+
+def _run_test(name: str, view: HypothesisDataView, alpha: float) -> Tuple[str, Dict, float]:
+    """Run one registered test and time it."""
+    func, _ = HYPOTHESIS_TESTS[name]
+    start = time.perf_counter()
+    results = func(view, alpha=alpha)
+    return name, results, time.perf_counter() - start
+
+
+def result_rows(name: str, results: Dict, wall_time: float) -> List[Dict]:
+    """
+    Flatten one test's result dictionary into rows of ``RESULT_COLUMNS``.
+
+    Parameters
+    ----------
+    name : str
+        Hypothesis name written to the 'hypothesis' column
+    results : dict
+        Return value of a registered test: one entry per component with at
+        least a 'test' key, or an 'error' entry
+    wall_time : float
+        Runtime of the test (NaN when not timed)
+
+    Returns
+    -------
+    list of dict
+        One row per component, or a single row carrying the error message
+    """
+    rows = []
+    for component, outcome in results.items():
+        if not isinstance(outcome, dict) or 'test' not in outcome:
+            continue
+        rows.append({
+            'hypothesis': name,
+            'component': component,
+            'test': outcome['test'],
+            'statistic': outcome.get('statistic'),
+            'p_value': outcome.get('p_value'),
+            'reject_null': outcome.get('reject_null'),
+            'interpretation': outcome.get('interpretation', outcome.get('result')),
+            'wall_time': wall_time,
+        })
+    if not rows:
+        rows.append({
+            'hypothesis': name,
+            'component': None,
+            'test': None,
+            'statistic': None,
+            'p_value': None,
+            'reject_null': None,
+            'interpretation': results.get('error'),
+            'wall_time': wall_time,
+        })
+    return rows
+
+
+def run_hypothesis_suite(df, tests: Optional[Sequence[str]] = None,
+                         alpha: float = 0.05, n_jobs: int = 1,
+                         return_details: bool = False):
+    """
+    Run several hypothesis tests as one batch job.
+
+    Parameters
+    ----------
+    df : pd.DataFrame or HypothesisDataView
+        Input dataframe, or an already prepared view
+    tests : sequence of str, optional
+        Names from ``HYPOTHESIS_TESTS`` (default: all of them)
+    alpha : float
+        Significance level
+    n_jobs : int
+        Number of worker processes; 1 runs the tests in-process and -1 uses
+        one process per test (up to the CPU count)
+    return_details : bool
+        Also return the full result dictionary of each test
+
+    Returns
+    -------
+    pd.DataFrame or tuple
+        One row per test component with statistic, p_value, reject_null,
+        interpretation and wall_time (seconds). The preparation time is in
+        ``attrs['preparation_time']``. With ``return_details``, a tuple of the
+        table and a ``{name: results}`` dictionary.
+    """
+    tests = list(HYPOTHESIS_TESTS) if tests is None else list(tests)
+    unknown = [name for name in tests if name not in HYPOTHESIS_TESTS]
+    if unknown:
+        raise ValueError(f"Unknown tests: {unknown}. Use any of {list(HYPOTHESIS_TESTS)}")
+
+    start = time.perf_counter()
+    dimensions = sorted({HYPOTHESIS_TESTS[name][1] for name in tests})
+    view = df if isinstance(df, HypothesisDataView) else prepare_test_view(df, dimensions)
+    for dimension in dimensions:
+        view.group_statistics(dimension)
+    preparation_time = time.perf_counter() - start
+
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(tests))
+
+    if n_jobs <= 1:
+        outputs = [_run_test(name, view, alpha) for name in tests]
+    else:
+        detached = view.detach(dimensions)
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_run_test, name, detached, alpha) for name in tests]
+            outputs = [future.result() for future in futures]
+
+    rows = []
+    details = {}
+    for name, results, wall_time in outputs:
+        rows.extend(result_rows(name, results, wall_time))
+        details[name] = results
+
+    table = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    table.attrs.update({
+        'alpha': alpha,
+        'n_jobs': n_jobs,
+        'preparation_time': preparation_time,
+        'total_time': time.perf_counter() - start,
+    })
+    return (table, details) if return_details else table
@@ -0,0 +1,200 @@
+"""Hypothesis tests per TransactionMonth and over rolling windows.
+
+The per-group sufficient statistics of every month are computed in one scan
+and stored as a dense ``(months, groups, statistics)`` array. A window of
+months is the difference of two cumulative sums of that array, so a rolling
+analysis never rescans the rows: each window costs O(groups), the same as
+the pooled test once its statistics are known.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.ab_testing.data_view import HypothesisDataView
+from src.ab_testing.suite import HYPOTHESIS_TESTS, result_rows
+from src.eda.aggregation import (
+    STAT_COLUMNS,
+    Dimension,
+    aggregate_by_codes,
+    dimension_codes,
+    row_statistics
+)
+
+DEFAULT_SLICED_TESTS = ('province', 'zipcode', 'gender')
+
+# Integer-valued statistics, restored from the float cube after differencing
+_COUNT_COLUMNS = ('Total_Policies', 'Claims_Count')
+
+
+def month_codes(dates: pd.Series) -> Tuple[np.ndarray, pd.PeriodIndex]:
+    """
+    Integer month code per row, with -1 for missing dates.
+
+    Parameters
+    ----------
+    dates : pd.Series
+        Transaction dates (datetime or parseable strings)
+
+    Returns
+    -------
+    tuple
+        (codes, months) where ``months[code]`` is the calendar month. Months
+        without rows between the first and last month are included, so codes
+        are consecutive in time.
+    """
+    periods = pd.DatetimeIndex(pd.to_datetime(dates)).to_period('M')
+    valid = ~periods.isna()
+    if not valid.any():
+        return np.full(len(periods), -1, dtype=np.int64), pd.PeriodIndex([], freq='M')
+
+    ordinals = periods.asi8
+    first, last = ordinals[valid].min(), ordinals[valid].max()
+    codes = np.where(valid, ordinals - first, -1).astype(np.int64)
+    months = pd.period_range(pd.Period(ordinal=first, freq='M'), periods=last - first + 1, freq='M')
+    return codes, months
+
+
+def monthly_statistics(df: pd.DataFrame, dimensions: Sequence[Dimension],
+                       date_col: str = 'TransactionMonth',
+                       premium_col: str = 'TotalPremium',
+                       claims_col: str = 'TotalClaims'
+                       ) -> Tuple[pd.PeriodIndex, np.ndarray, Dict[Dimension, Tuple[np.ndarray, pd.Index]]]:
+    """
+    Sufficient statistics per month and group from a single scan.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    dimensions : sequence
+        Grouping columns (or tuples of columns)
+    date_col : str
+        Transaction date column
+    premium_col : str
+        Premium column name
+    claims_col : str
+        Claims column name
+
+    Returns
+    -------
+    tuple
+        (months, policies, cubes) where ``policies[m]`` is the number of rows
+        in month ``months[m]`` and ``cubes[dimension]`` is a ``(cube, groups)``
+        pair with ``cube[m, g, j]`` holding statistic ``STAT_COLUMNS[j]`` of
+        group ``groups[g]`` in month ``months[m]``
+    """
+    codes_month, months = month_codes(df[date_col])
+    n_months = len(months)
+    policies = np.bincount(codes_month[codes_month >= 0], minlength=n_months)
+    rows = row_statistics(df[premium_col].to_numpy(dtype=np.float64),
+                          df[claims_col].to_numpy(dtype=np.float64))
+
+    cubes = {}
+    for dimension in dimensions:
+        codes, groups = dimension_codes(df, dimension)
+        n_groups = len(groups)
+        combined = np.where((codes_month >= 0) & (codes >= 0),
+                            codes_month * n_groups + codes, -1)
+        table = aggregate_by_codes(combined, pd.RangeIndex(n_months * n_groups), rows,
+                                   drop_empty=False)
+        cube = table.to_numpy(dtype=np.float64).reshape(n_months, n_groups, len(STAT_COLUMNS))
+        cubes[dimension] = (cube, groups)
+
+    return months, policies, cubes
+
+
+def window_statistics(cube: np.ndarray, window: int) -> np.ndarray:
+    """
+    Statistics of every window of ``window`` consecutive months.
+
+    Parameters
+    ----------
+    cube : np.ndarray
+        Monthly statistics from ``monthly_statistics``
+    window : int
+        Number of months per window
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape ``(months - window + 1, groups, statistics)``; entry
+        ``i`` covers months ``i`` to ``i + window - 1``
+    """
+    if window < 1 or window > len(cube):
+        raise ValueError(f"window must be between 1 and {len(cube)} months, got {window}")
+    if window == 1:
+        return cube
+
+    cumulative = np.concatenate([np.zeros_like(cube[:1]), np.cumsum(cube, axis=0)])
+    return cumulative[window:] - cumulative[:-window]
+
+
+def _statistics_table(stats: np.ndarray, groups: pd.Index) -> pd.DataFrame:
+    """Per-group statistics table for one window, like ``aggregate_by_codes``."""
+    table = pd.DataFrame(stats, index=groups, columns=STAT_COLUMNS)
+    for col in _COUNT_COLUMNS:
+        table[col] = table[col].round().astype(np.int64)
+    return table[table['Total_Policies'] > 0]
+
+
+def run_time_sliced_tests(df: pd.DataFrame, tests: Optional[Sequence[str]] = None,
+                          window: int = 1, alpha: float = 0.05,
+                          date_col: str = 'TransactionMonth') -> pd.DataFrame:
+    """
+    Run hypothesis tests for each month or each rolling window of months.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe with a transaction date column
+    tests : sequence of str, optional
+        Names from ``HYPOTHESIS_TESTS`` (default: province, zipcode, gender)
+    window : int
+        Months per window: 1 tests each month separately, larger values test
+        rolling windows ending at each month
+    alpha : float
+        Significance level
+    date_col : str
+        Transaction date column
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per window and test component with window_start, window_end,
+        hypothesis, component, test, statistic, p_value, reject_null,
+        interpretation and policies in the window
+    """
+    tests = list(DEFAULT_SLICED_TESTS) if tests is None else list(tests)
+    unknown = [name for name in tests if name not in HYPOTHESIS_TESTS]
+    if unknown:
+        raise ValueError(f"Unknown tests: {unknown}. Use any of {list(HYPOTHESIS_TESTS)}")
+
+    dimensions = sorted({HYPOTHESIS_TESTS[name][1] for name in tests})
+    months, policies, cubes = monthly_statistics(df, dimensions, date_col)
+    windows = {dim: window_statistics(cube, window) for dim, (cube, _) in cubes.items()}
+    window_policies = window_statistics(policies[:, None, None], window)[:, 0, 0]
+
+    rows = []
+    for i in range(len(months) - window + 1):
+        stats = {dim: _statistics_table(windows[dim][i], cubes[dim][1]) for dim in dimensions}
+        n_policies = int(window_policies[i])
+        view = HypothesisDataView.from_statistics(stats, n_policies)
+
+        for name in tests:
+            func, _ = HYPOTHESIS_TESTS[name]
+            for row in result_rows(name, func(view, alpha=alpha), wall_time=np.nan):
+                del row['wall_time']
+                row.update({
+                    'window_start': months[i],
+                    'window_end': months[i + window - 1],
+                    'policies': n_policies,
+                })
+                rows.append(row)
+
+    columns = ['window_start', 'window_end', 'hypothesis', 'component', 'test',
+               'statistic', 'p_value', 'reject_null', 'interpretation', 'policies']
+    results = pd.DataFrame(rows, columns=columns)
+    results.attrs.update({'window': window, 'alpha': alpha})
+    return results
@@ -0,0 +1,249 @@
+"""Columnar Parquet cache of the raw insurance data.
+
+The first typed load of a raw extract is written to ``PROCESSED_DATA_DIR`` as
+Parquet next to a small JSON sidecar recording the source file's size, mtime
+and SHA-256 hash. Later loads read the Parquet copy (only the requested
+columns) as long as the fingerprint still matches; stale copies are rebuilt.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.config import PROCESSED_DATA_DIR
+
+try:
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Bump when the cached layout or the declared schema changes incompatibly
+CACHE_FORMAT_VERSION = 1
+
+
+def file_content_hash(file_path: Path, block_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 hash of a file in fixed-size blocks.
+
+    Parameters
+    ----------
+    file_path : Path
+        File to hash.
+    block_size : int
+        Number of bytes read per block (default: 1 MiB).
+
+    Returns
+    -------
+    str
+        Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _schema_token(schema: Dict[str, str]) -> str:
+    """Short hash of the declared dtypes so schema edits invalidate the cache."""
+    payload = json.dumps(sorted(schema.items())).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def cache_paths(file_path: Path, cache_dir: Optional[Path] = None) -> Dict[str, Path]:
+    """
+    Return the Parquet and metadata paths used to cache a raw data file.
+
+    The file names combine the stem with a short hash of the resolved source
+    path, so files with the same name in different directories (or with
+    different extensions) get separate caches.
+
+    Parameters
+    ----------
+    file_path : Path
+        Raw data file.
+    cache_dir : Path, optional
+        Directory holding the cache (default: PROCESSED_DATA_DIR).
+
+    Returns
+    -------
+    dict
+        ``{'data': <parquet path>, 'meta': <json path>}``
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else PROCESSED_DATA_DIR
+    source = hashlib.sha256(str(Path(file_path).resolve()).encode('utf-8')).hexdigest()[:8]
+    name = f"{Path(file_path).stem}.{source}"
+    return {
+        'data': cache_dir / f"{name}.parquet",
+        'meta': cache_dir / f"{name}.cache.json",
+    }
+
+
+def is_cache_valid(file_path: Path, schema: Dict[str, str],
+                   cache_dir: Optional[Path] = None) -> bool:
+    """
+    Check whether the Parquet cache of a raw file is present and up to date.
+
+    Size and mtime are compared first. If they differ, the content hash decides:
+    an unchanged file whose mtime moved (e.g. after a checkout) keeps its cache
+    and the recorded mtime is refreshed.
+
+    Parameters
+    ----------
+    file_path : Path
+        Raw data file.
+    schema : dict
+        Declared column dtypes the cache was written with.
+    cache_dir : Path, optional
+        Directory holding the cache.
+
+    Returns
+    -------
+    bool
+        True if the cached copy can be used.
+    """
+    if not PYARROW_AVAILABLE:
+        return False
+
+    paths = cache_paths(file_path, cache_dir)
+    if not paths['data'].exists() or not paths['meta'].exists():
+        return False
+
+    try:
+        meta = json.loads(paths['meta'].read_text())
+    except (OSError, ValueError):
+        return False
+
+    if (meta.get('format_version') != CACHE_FORMAT_VERSION
+            or meta.get('schema') != _schema_token(schema)):
+        return False
+
+    stat = file_path.stat()
+    if meta.get('size') != stat.st_size:
+        return False
+    if meta.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+
+    if meta.get('sha256') != file_content_hash(file_path):
+        return False
+
+    meta['mtime_ns'] = stat.st_mtime_ns
+    paths['meta'].write_text(json.dumps(meta, indent=2))
+    return True
+
+
+def write_cache(df: pd.DataFrame, file_path: Path, schema: Dict[str, str],
+                cache_dir: Optional[Path] = None) -> Optional[Path]:
+    """
+    Write a typed frame to the Parquet cache of its raw source file.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Fully loaded, typed data of ``file_path``.
+    file_path : Path
+        Raw data file the frame was read from.
+    schema : dict
+        Declared column dtypes used to read the frame.
+    cache_dir : Path, optional
+        Directory holding the cache.
+
+    Returns
+    -------
+    Path or None
+        Path of the Parquet file, or None if it could not be written.
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+
+    paths = cache_paths(file_path, cache_dir)
+    paths['data'].parent.mkdir(parents=True, exist_ok=True)
+
+    stat = file_path.stat()
+    meta = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source': str(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_content_hash(file_path),
+        'schema': _schema_token(schema),
+        'rows': len(df),
+    }
+
+    # Write to a temporary name first so an interrupted run never leaves a
+    # truncated file behind a valid sidecar
+    tmp_path = paths['data'].with_suffix('.parquet.tmp')
+    try:
+        df.to_parquet(tmp_path, engine='pyarrow', index=False)
+        os.replace(tmp_path, paths['data'])
+        paths['meta'].write_text(json.dumps(meta, indent=2))
+    except OSError as e:
+        warnings.warn(f"Could not write Parquet cache for {file_path}: {e}")
+        return None
+
+    return paths['data']
+
+
+def read_cache(file_path: Path, columns: Optional[List[str]] = None,
+               filters: Optional[List[Tuple[str, str, Any]]] = None,
+               cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Read the cached copy of a raw file, loading only the requested columns.
+
+    Parameters
+    ----------
+    file_path : Path
+        Raw data file.
+    columns : list, optional
+        Columns to read. All columns are read if None.
+    filters : list of tuple, optional
+        ``(column, op, value)`` predicates combined with AND. They are evaluated
+        inside the Parquet scan, so non-matching rows never reach pandas.
+    cache_dir : Path, optional
+        Directory holding the cache.
+
+    Returns
+    -------
+    pd.DataFrame
+        Typed data from the cache.
+    """
+    return pd.read_parquet(cache_paths(file_path, cache_dir)['data'],
+                           engine='pyarrow', columns=columns, filters=filters or None)
+
+
+def iter_cache(file_path: Path, chunksize: int, columns: Optional[List[str]] = None,
+               filters: Optional[List[Tuple[str, str, Any]]] = None,
+               cache_dir: Optional[Path] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream the cached copy of a raw file in record batches of ``chunksize`` rows.
+
+    Parameters
+    ----------
+    file_path : Path
+        Raw data file.
+    chunksize : int
+        Maximum number of rows per yielded frame.
+    columns : list, optional
+        Columns to read. All columns are read if None.
+    filters : list of tuple, optional
+        ``(column, op, value)`` predicates combined with AND, evaluated in the scan.
+    cache_dir : Path, optional
+        Directory holding the cache.
+
+    Yields
+    ------
+    pd.DataFrame
+        Typed chunks of the cached data.
+    """
+    dataset = ds.dataset(cache_paths(file_path, cache_dir)['data'], format='parquet')
+    expression = pq.filters_to_expression(filters) if filters else None
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=chunksize):
+        if batch.num_rows > 0:
+            yield batch.to_pandas()
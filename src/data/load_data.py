@@ -1,60 +1,387 @@
 """Data loading utilities."""
 
+import operator
 import pandas as pd
+from pandas.api.types import union_categoricals
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from src.utils.config import RAW_DATA_DIR
+from src.data.cache import (
+    PYARROW_AVAILABLE,
+    is_cache_valid,
+    iter_cache,
+    read_cache,
+    write_cache
+)
 
 
-def load_insurance_data(file_path: Optional[str] = None) -> pd.DataFrame:
+# Declared dtypes for the ACIS MachineLearningRating columns. Low-cardinality
+# strings are read straight into categoricals, identifiers and counts are
+# downcast, and monetary columns stay float64 so portfolio sums keep precision.
+INSURANCE_SCHEMA: Dict[str, str] = {
+    'UnderwrittenCoverID': 'int32',
+    'PolicyID': 'int32',
+    'IsVATRegistered': 'bool',
+    'Citizenship': 'category',
+    'LegalType': 'category',
+    'Title': 'category',
+    'Language': 'category',
+    'Bank': 'category',
+    'AccountType': 'category',
+    'MaritalStatus': 'category',
+    'Gender': 'category',
+    'Country': 'category',
+    'Province': 'category',
+    'PostalCode': 'int16',
+    'MainCrestaZone': 'category',
+    'SubCrestaZone': 'category',
+    'ItemType': 'category',
+    'mmcode': 'float64',
+    'VehicleType': 'category',
+    'RegistrationYear': 'int16',
+    'make': 'category',
+    'Model': 'category',
+    'Cylinders': 'float32',
+    'cubiccapacity': 'float32',
+    'kilowatts': 'float32',
+    'bodytype': 'category',
+    'NumberOfDoors': 'float32',
+    'VehicleIntroDate': 'category',
+    'CustomValueEstimate': 'float64',
+    'AlarmImmobiliser': 'category',
+    'TrackingDevice': 'category',
+    'CapitalOutstanding': 'object',
+    'NewVehicle': 'category',
+    'WrittenOff': 'category',
+    'Rebuilt': 'category',
+    'Converted': 'category',
+    'CrossBorder': 'category',
+    'NumberOfVehiclesInFleet': 'float32',
+    'SumInsured': 'float64',
+    'TermFrequency': 'category',
+    'CalculatedPremiumPerTerm': 'float64',
+    'ExcessSelected': 'category',
+    'CoverCategory': 'category',
+    'CoverType': 'category',
+    'CoverGroup': 'category',
+    'Section': 'category',
+    'Product': 'category',
+    'StatutoryClass': 'category',
+    'StatutoryRiskType': 'category',
+    'TotalPremium': 'float64',
+    'TotalClaims': 'float64',
+}
+
+# Columns parsed as datetimes
+DATE_COLUMNS: List[str] = ['TransactionMonth']
+
+# Numeric codes that are read as integers but analysed as categories
+CODE_COLUMNS: List[str] = ['PostalCode']
+
+# Rows per chunk when filtering the raw text file without a cache
+SCAN_CHUNKSIZE = 200_000
+
+# Comparison operators accepted in ``filters`` predicates
+_FILTER_OPS = {
+    '==': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def _find_data_file(file_path: Optional[Union[str, Path]]) -> Path:
+    """Resolve the data file, falling back to the first file in RAW_DATA_DIR."""
+    if file_path is None:
+        # Look for common data file names (CSV and TXT)
+        possible_files = list(RAW_DATA_DIR.glob("*.csv")) + list(RAW_DATA_DIR.glob("*.txt"))
+        if not possible_files:
+            raise FileNotFoundError(
+                f"No data files (CSV or TXT) found in {RAW_DATA_DIR}. "
+                "Please provide a file_path or place data in the raw data directory."
+            )
+        file_path = possible_files[0]
+
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Data file not found: {file_path}")
+
+    return file_path
+
+
+def _detect_delimiter(file_path: Path) -> str:
+    """Detect the delimiter from the header line (pipe for .txt insurance extracts)."""
+    if file_path.suffix.lower() != '.txt':
+        return ','
+
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as fh:
+        header = fh.readline()
+
+    return '|' if '|' in header else ','
+
+
+def _read_options(file_path: Path, sep: str, apply_schema: bool,
+                  columns: Optional[List[str]] = None) -> dict:
+    """Build the read_csv keyword arguments for the columns present in the file."""
+    if not apply_schema:
+        options = {'sep': sep, 'low_memory': False}
+        if columns is not None:
+            options['usecols'] = columns
+        return options
+
+    header = pd.read_csv(file_path, sep=sep, nrows=0).columns
+    if columns is not None:
+        header = [col for col in header if col in columns]
+    dtypes = {col: INSURANCE_SCHEMA[col] for col in header if col in INSURANCE_SCHEMA}
+
+    options = {
+        'sep': sep,
+        'dtype': dtypes,
+        'parse_dates': [col for col in DATE_COLUMNS if col in header],
+    }
+    if columns is not None:
+        options['usecols'] = columns
+    return options
+
+
+def _validate_filters(filters: Optional[List[Tuple[str, str, Any]]]
+                      ) -> Optional[List[Tuple[str, str, Any]]]:
+    """Check ``(column, op, value)`` predicates and return them as a list."""
+    if not filters:
+        return None
+
+    filters = [tuple(f) for f in filters]
+    for predicate in filters:
+        if len(predicate) != 3:
+            raise ValueError(f"Filters must be (column, op, value) tuples, got: {predicate}")
+        op = predicate[1]
+        if op not in _FILTER_OPS and op not in ('in', 'not in'):
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return filters
+
+
+def _scan_columns(columns: Optional[List[str]],
+                  filters: Optional[List[Tuple[str, str, Any]]]) -> Optional[List[str]]:
+    """Columns that must be read to evaluate the filters and return ``columns``."""
+    if columns is None:
+        return None
+    extra = [col for col, _, _ in filters or [] if col not in columns]
+    return list(columns) + list(dict.fromkeys(extra))
+
+
+def _compare(series: pd.Series, op: str, value: Any) -> pd.Series:
+    """Evaluate one comparison; categoricals are compared on their categories."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and op not in ('==', '=', '!='):
+        # Unordered categoricals only support equality, so order the
+        # categories instead (as the pyarrow scan of the cache does)
+        categories = series.cat.categories
+        return series.isin(categories[_FILTER_OPS[op](categories, value)])
+    return _FILTER_OPS[op](series, value)
+
+
+def _filter_frame(df: pd.DataFrame, filters: Optional[List[Tuple[str, str, Any]]],
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Apply AND-combined predicates with one vectorized mask, then project."""
+    if filters:
+        mask = pd.Series(True, index=df.index)
+        for col, op, value in filters:
+            if op == 'in':
+                mask &= df[col].isin(value)
+            elif op == 'not in':
+                mask &= ~df[col].isin(value)
+            else:
+                mask &= _compare(df[col], op, value)
+        df = df.loc[mask.to_numpy()]
+
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def concat_chunks(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate typed chunks, unioning categories so categoricals survive.
+
+    ``pd.concat`` turns categorical columns whose chunks have different
+    categories into object columns; here every chunk is first given the union
+    of the categories (in place).
+
+    Parameters
+    ----------
+    frames : list of pd.DataFrame
+        Chunks with the same columns, e.g. from ``load_insurance_data(...,
+        chunksize=...)``
+
+    Returns
+    -------
+    pd.DataFrame
+        All rows with a fresh RangeIndex
+    """
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = union_categoricals([frame[col] for frame in frames]).categories
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def apply_insurance_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a frame to the declared insurance schema.
+
+    Columns already read with the schema dtypes are left untouched, so this is
+    cheap on frames produced by ``load_insurance_data``. Unknown columns are kept
+    as they are.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw or partially typed insurance data.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with schema dtypes, parsed dates and categorical code columns.
+    """
+    for col, dtype in INSURANCE_SCHEMA.items():
+        if col in df.columns and col not in CODE_COLUMNS and str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    for col in CODE_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    return df
+
+
+def _iter_chunks(reader, apply_schema: bool,
+                 filters: Optional[List[Tuple[str, str, Any]]] = None,
+                 columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Yield typed, filtered frames from a chunked read_csv reader."""
+    with reader:
+        for chunk in reader:
+            if apply_schema:
+                chunk = apply_insurance_schema(chunk)
+            yield _filter_frame(chunk, filters, columns)
+
+
+def load_insurance_data(file_path: Optional[str] = None,
+                        chunksize: Optional[int] = None,
+                        apply_schema: bool = True,
+                        columns: Optional[List[str]] = None,
+                        filters: Optional[List[Tuple[str, str, Any]]] = None,
+                        use_cache: bool = True,
+                        cache_dir: Optional[Union[str, Path]] = None
+                        ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """
     Load insurance data from CSV or text file.
-    
+
+    Typed loads are cached as Parquet under ``PROCESSED_DATA_DIR`` (requires
+    pyarrow). The cache is keyed by the source file's size, mtime and content
+    hash, and is rebuilt automatically when the source changes.
+
     Parameters
     ----------
     file_path : str, optional
         Path to the data file. If None, looks for data in RAW_DATA_DIR.
-    
+    chunksize : int, optional
+        If given, return an iterator yielding typed frames of at most
+        ``chunksize`` rows instead of reading the whole file. Categorical
+        columns only hold the categories seen in each chunk.
+    apply_schema : bool
+        Read columns with the declared ``INSURANCE_SCHEMA`` dtypes (default: True).
+        If False, every column is inferred by pandas and the cache is not used.
+    columns : list, optional
+        Only return these columns. With a valid cache only these columns (plus
+        any filter columns) are read from disk.
+    filters : list of tuple, optional
+        ``(column, op, value)`` predicates combined with AND, e.g.
+        ``[('Gender', 'in', ['Male', 'Female'])]``. Supported operators are
+        ``==, !=, <, <=, >, >=, in, not in``. They are pushed into the Parquet
+        scan, or applied chunk by chunk while reading the raw file, so rows that
+        do not match are never held in one frame.
+    use_cache : bool
+        Read from (and build) the Parquet cache (default: True).
+    cache_dir : str, optional
+        Directory holding the cache (default: PROCESSED_DATA_DIR).
+
     Returns
     -------
-    pd.DataFrame
-        Loaded insurance data.
-    
+    pd.DataFrame or iterator of pd.DataFrame
+        Loaded insurance data, or an iterator of chunks when ``chunksize`` is set.
+
     Raises
     ------
     FileNotFoundError
         If the data file is not found.
+    ValueError
+        If a filter predicate is malformed.
+
+    Examples
+    --------
+    >>> df = load_insurance_data(columns=['Gender', 'TotalClaims'],
+    ...                          filters=[('Gender', 'in', ['Male', 'Female'])])
     """
-    if file_path is None:
-        # Look for common data file names (CSV and TXT)
-        possible_files = list(RAW_DATA_DIR.glob("*.csv")) + list(RAW_DATA_DIR.glob("*.txt"))
-        if not possible_files:
-            raise FileNotFoundError(
-                f"No data files (CSV or TXT) found in {RAW_DATA_DIR}. "
-                "Please provide a file_path or place data in the raw data directory."
-            )
-        file_path = possible_files[0]
-    
-    file_path = Path(file_path)
-    if not file_path.exists():
-        raise FileNotFoundError(f"Data file not found: {file_path}")
-    
+    file_path = _find_data_file(file_path)
+    filters = _validate_filters(filters)
+    use_cache = use_cache and apply_schema and PYARROW_AVAILABLE
+
+    if use_cache and is_cache_valid(file_path, INSURANCE_SCHEMA, cache_dir):
+        print(f"Loading cached data for: {file_path}")
+        if chunksize is not None:
+            batches = iter_cache(file_path, chunksize, columns=columns, filters=filters,
+                                 cache_dir=cache_dir)
+            return (apply_insurance_schema(batch) for batch in batches)
+
+        # Parquet round-trips integer dictionaries as plain integers, so the
+        # schema pass restores the categorical code columns
+        df = apply_insurance_schema(
+            read_cache(file_path, columns=columns, filters=filters, cache_dir=cache_dir)
+        )
+        print(f"Loaded {len(df)} rows and {len(df.columns)} columns")
+        return df
+
     print(f"Loading data from: {file_path}")
-    
-    # Detect delimiter based on file extension and content
-    if file_path.suffix.lower() == '.txt':
-        # Try pipe delimiter first (common for insurance data)
-        # If that fails, try comma
-        try:
-            df = pd.read_csv(file_path, sep='|', low_memory=False)
-        except Exception:
-            df = pd.read_csv(file_path, sep=',', low_memory=False)
+
+    # Detect delimiter based on file extension and header line
+    sep = _detect_delimiter(file_path)
+    scan_columns = _scan_columns(columns, filters)
+
+    if chunksize is not None:
+        options = _read_options(file_path, sep, apply_schema, scan_columns)
+        options.pop('low_memory', None)
+        reader = pd.read_csv(file_path, chunksize=chunksize, **options)
+        return _iter_chunks(reader, apply_schema, filters, columns)
+
+    if use_cache:
+        # The cache always holds every column, so build it from a full read
+        df = pd.read_csv(file_path, **_read_options(file_path, sep, apply_schema))
+        df = apply_insurance_schema(df)
+        cache_path = write_cache(df, file_path, INSURANCE_SCHEMA, cache_dir)
+        if cache_path is not None:
+            print(f"Cached typed data to: {cache_path}")
+        df = _filter_frame(df, filters, columns)
+        if filters:
+            df = df.reset_index(drop=True)
+    elif filters:
+        options = _read_options(file_path, sep, apply_schema, scan_columns)
+        options.pop('low_memory', None)
+        reader = pd.read_csv(file_path, chunksize=SCAN_CHUNKSIZE, **options)
+        df = concat_chunks(list(_iter_chunks(reader, apply_schema, filters, columns)))
     else:
-        # For CSV files, use comma delimiter
-        df = pd.read_csv(file_path, low_memory=False)
-    
+        df = pd.read_csv(file_path, **_read_options(file_path, sep, apply_schema, columns))
+        if apply_schema:
+            df = apply_insurance_schema(df)
+
     print(f"Loaded {len(df)} rows and {len(df.columns)} columns")
-    
+
     return df
 
 
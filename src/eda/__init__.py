@@ -1,2 +1,15 @@
 """Exploratory Data Analysis modules."""
 
+from .loss_ratio import (
+    compute_loss_ratio,
+    valid_loss_ratio_mask,
+    loss_ratio_by_groups,
+    portfolio_loss_summary
+)
+
+__all__ = [
+    'compute_loss_ratio',
+    'valid_loss_ratio_mask',
+    'loss_ratio_by_groups',
+    'portfolio_loss_summary'
+]
@@ -0,0 +1,308 @@
+"""Single-pass aggregation of portfolio KPIs over several dimensions.
+
+The row-level quantities every KPI needs (claim indicator, premium, claims,
+margin and their squares) are computed once. Each requested dimension then
+reduces them with ``np.bincount`` over integer group codes, producing a table
+of sufficient statistics. Claim frequency, severity, margin and loss ratio
+(and their variances) are derived from those tables without touching the rows
+again.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Dimension = Union[str, Tuple[str, ...]]
+
+# Sufficient statistics kept per group
+STAT_COLUMNS: List[str] = [
+    'Total_Policies', 'Claims_Count',
+    'Total_Premium', 'Premium_SumSq',
+    'Total_Claims', 'Claims_SumSq',
+    'Severity_Sum', 'Severity_SumSq',
+    'Margin_SumSq',
+]
+
+
+def group_codes(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integer group codes for a column, with -1 for missing values.
+
+    Categorical columns reuse their existing codes, so no hashing is needed.
+
+    Parameters
+    ----------
+    values : pd.Series
+        Grouping column
+
+    Returns
+    -------
+    tuple
+        (codes, labels) where ``labels[code]`` is the group value
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), np.asarray(values.cat.categories)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, np.asarray(uniques)
+
+
+def dimension_codes(df: pd.DataFrame, dimension: Dimension) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Group codes for a single column or a tuple of columns.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    dimension : str or tuple of str
+        Column name, or several column names for a composite key
+
+    Returns
+    -------
+    tuple
+        (codes, index) where ``index[code]`` is the group key; rows with a
+        missing key get code -1
+    """
+    if isinstance(dimension, str):
+        codes, labels = group_codes(df[dimension])
+        return codes, pd.Index(labels, name=dimension)
+
+    parts = [group_codes(df[col]) for col in dimension]
+    sizes = [max(len(labels), 1) for _, labels in parts]
+    missing = np.zeros(len(df), dtype=bool)
+    for codes, _ in parts:
+        missing |= codes < 0
+
+    combined = np.ravel_multi_index(
+        [np.where(missing, 0, codes) for codes, _ in parts], sizes
+    ).astype(np.int64)
+    combined[missing] = -1
+
+    present, compact = np.unique(combined[~missing], return_inverse=True)
+    codes = np.full(len(df), -1, dtype=np.int64)
+    codes[~missing] = compact
+
+    label_codes = np.unravel_index(present, sizes)
+    index = pd.MultiIndex.from_arrays(
+        [labels[positions] for (_, labels), positions in zip(parts, label_codes)],
+        names=list(dimension)
+    )
+    return codes, index
+
+
+def row_statistics(premium: np.ndarray, claims: np.ndarray,
+                   margin: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Row-level quantities shared by every dimension.
+
+    Parameters
+    ----------
+    premium : np.ndarray
+        TotalPremium per row
+    claims : np.ndarray
+        TotalClaims per row
+    margin : np.ndarray, optional
+        Precomputed TotalPremium - TotalClaims
+
+    Returns
+    -------
+    dict
+        Arrays named after the ``STAT_COLUMNS`` they are summed into
+    """
+    premium = np.asarray(premium, dtype=np.float64)
+    claims = np.asarray(claims, dtype=np.float64)
+    has_claim = claims > 0
+    severity = np.where(has_claim, claims, 0.0)
+    if margin is None:
+        margin = premium - claims
+
+    return {
+        'Claims_Count': has_claim.astype(np.float64),
+        'Total_Premium': premium,
+        'Premium_SumSq': premium * premium,
+        'Total_Claims': claims,
+        'Claims_SumSq': claims * claims,
+        'Severity_Sum': severity,
+        'Severity_SumSq': severity * severity,
+        'Margin_SumSq': margin * margin,
+    }
+
+
+def aggregate_by_codes(codes: np.ndarray, index: pd.Index,
+                       rows: Dict[str, np.ndarray], drop_empty: bool = True) -> pd.DataFrame:
+    """
+    Reduce row-level quantities to per-group sufficient statistics.
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Group code per row (-1 rows are skipped)
+    index : pd.Index
+        Group keys, ``index[code]``
+    rows : dict
+        Output of ``row_statistics``
+    drop_empty : bool
+        Drop groups without rows (default: True)
+
+    Returns
+    -------
+    pd.DataFrame
+        ``STAT_COLUMNS`` statistics for the observed groups, indexed by key
+    """
+    keep = codes >= 0
+    codes_kept = codes[keep]
+    n_groups = len(index)
+
+    stats = {'Total_Policies': np.bincount(codes_kept, minlength=n_groups)}
+    for name, values in rows.items():
+        stats[name] = np.bincount(codes_kept, weights=values[keep], minlength=n_groups)
+    stats['Claims_Count'] = stats['Claims_Count'].round().astype(np.int64)
+
+    table = pd.DataFrame(stats, index=index)[STAT_COLUMNS]
+    return table[table['Total_Policies'] > 0] if drop_empty else table
+
+
+def compute_group_statistics(df: pd.DataFrame,
+                             dimensions: Iterable[Dimension],
+                             premium_col: str = 'TotalPremium',
+                             claims_col: str = 'TotalClaims') -> Dict[Dimension, pd.DataFrame]:
+    """
+    Sufficient statistics for several dimensions from one scan of the data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    dimensions : iterable
+        Column names (or tuples of column names) to group by
+    premium_col : str
+        Premium column name
+    claims_col : str
+        Claims column name
+
+    Returns
+    -------
+    dict
+        Mapping of dimension to a dataframe indexed by group key with the
+        ``STAT_COLUMNS`` statistics. Only observed groups are included; rows
+        with a missing key are skipped, as in ``groupby``.
+    """
+    rows = row_statistics(df[premium_col].to_numpy(dtype=np.float64),
+                          df[claims_col].to_numpy(dtype=np.float64))
+
+    return {
+        dimension: aggregate_by_codes(*dimension_codes(df, dimension), rows)
+        for dimension in dimensions
+    }
+
+
+def _sample_variance(total: pd.Series, sum_sq: pd.Series, count: pd.Series) -> pd.Series:
+    """Unbiased variance from count, sum and sum of squares (NaN below 2 rows)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (sum_sq - total * total / count) / (count - 1)
+    variance = variance.where(count > 1)
+    return variance.clip(lower=0)
+
+
+def derive_kpis(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive portfolio KPIs from a table of sufficient statistics.
+
+    Parameters
+    ----------
+    stats : pd.DataFrame
+        One table returned by ``compute_group_statistics``
+
+    Returns
+    -------
+    pd.DataFrame
+        The statistics plus Claim_Frequency, Claim_Severity, Std_Severity,
+        Margin, Mean_Margin, Std_Margin and Loss_Ratio
+    """
+    kpis = stats.copy()
+    n = kpis['Total_Policies']
+    k = kpis['Claims_Count']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kpis['Claim_Frequency'] = k / n
+        kpis['Claim_Severity'] = kpis['Total_Claims'] / k
+        kpis['Mean_Severity'] = kpis['Severity_Sum'] / k
+        kpis['Std_Severity'] = np.sqrt(
+            _sample_variance(kpis['Severity_Sum'], kpis['Severity_SumSq'], k)
+        )
+        kpis['Margin'] = kpis['Total_Premium'] - kpis['Total_Claims']
+        kpis['Mean_Margin'] = kpis['Margin'] / n
+        kpis['Std_Margin'] = np.sqrt(
+            _sample_variance(kpis['Margin'], kpis['Margin_SumSq'], n)
+        )
+        kpis['Loss_Ratio'] = kpis['Total_Claims'] / kpis['Total_Premium']
+
+    return kpis
+
+
+class PortfolioStatistics:
+    """
+    Cache of per-group sufficient statistics for one dataframe.
+
+    Dimensions requested together are aggregated in a single scan; later
+    requests only aggregate the dimensions not seen before.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    premium_col : str
+        Premium column name
+    claims_col : str
+        Claims column name
+    """
+
+    def __init__(self, df: pd.DataFrame, premium_col: str = 'TotalPremium',
+                 claims_col: str = 'TotalClaims'):
+        self.df = df
+        self.premium_col = premium_col
+        self.claims_col = claims_col
+        self._stats: Dict[Dimension, pd.DataFrame] = {}
+
+    def statistics(self, dimensions: Union[Dimension, Sequence[Dimension]]
+                   ) -> Dict[Dimension, pd.DataFrame]:
+        """Sufficient statistics for the requested dimensions."""
+        if isinstance(dimensions, (str, tuple)):
+            dimensions = [dimensions]
+
+        missing = [dim for dim in dimensions if dim not in self._stats]
+        if missing:
+            self._stats.update(compute_group_statistics(
+                self.df, missing, self.premium_col, self.claims_col
+            ))
+        return {dim: self._stats[dim] for dim in dimensions}
+
+    def kpis(self, dimension: Dimension) -> pd.DataFrame:
+        """KPIs derived from the cached statistics of one dimension."""
+        return derive_kpis(self.statistics(dimension)[dimension])
+
+
+def portfolio_kpis(df: pd.DataFrame, dimensions: Iterable[Dimension],
+                   premium_col: str = 'TotalPremium',
+                   claims_col: str = 'TotalClaims') -> Dict[Dimension, pd.DataFrame]:
+    """
+    KPI tables for several dimensions from a single aggregation pass.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    dimensions : iterable
+        Column names (or tuples of column names) to group by
+    premium_col : str
+        Premium column name
+    claims_col : str
+        Claims column name
+
+    Returns
+    -------
+    dict
+        Mapping of dimension to its KPI table (see ``derive_kpis``)
+    """
+    stats = compute_group_statistics(df, dimensions, premium_col, claims_col)
+    return {dim: derive_kpis(table) for dim, table in stats.items()}
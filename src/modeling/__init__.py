@@ -6,13 +6,20 @@ from .data_preparation import (
     encode_categorical_features,
     create_claim_probability_feature
 )
+from .preprocessing import InsurancePreprocessor
+from .streaming import chunk_source, train_premium_out_of_core
+from .cross_validation import CrossValidator, make_folds
+from .tuning import hyperband, successive_halving
+from .pure_premium import FrequencySeverityModel
+from .glm import InsuranceGLM, fit_claim_cost_glms
 
 from .models import (
     train_linear_regression,
     train_decision_tree,
     train_random_forest,
     evaluate_model,
-    compare_models
+    compare_models,
+    train_models
 )
 
 # Import XGBoost function (it will handle import errors internally)
@@ -32,6 +39,7 @@ __all__ = [
     'prepare_premium_prediction_data',
     'encode_categorical_features',
     'create_claim_probability_feature',
+    'InsurancePreprocessor',
     # Models
     'train_linear_regression',
     'train_decision_tree',
@@ -39,6 +47,16 @@ __all__ = [
     'train_xgboost',
     'evaluate_model',
     'compare_models',
+    'train_models',
+    'chunk_source',
+    'train_premium_out_of_core',
+    'CrossValidator',
+    'make_folds',
+    'successive_halving',
+    'hyperband',
+    'FrequencySeverityModel',
+    'InsuranceGLM',
+    'fit_claim_cost_glms',
     # Interpretability
     'get_feature_importance',
     'plot_feature_importance',
@@ -0,0 +1,288 @@
+"""K-fold cross-validation that encodes every fold once.
+
+``CrossValidator`` computes the fold index arrays once, then encodes and
+scales each fold with its own ``InsurancePreprocessor`` fitted on the fold's
+training rows. The encoded folds are written to memory-mapped column stores
+(the same layout as ``prepare_*_data(use_feature_store=True)``), so the model
+grid trains on a process pool whose workers map the folds instead of
+receiving pickled copies. Evaluating another model later reuses the stored
+folds and never re-encodes the data.
+
+Three split strategies are available: shuffled K-fold, group K-fold over
+``PolicyID`` (all rows of a policy fall in the same fold) and time-ordered
+splits over ``TransactionMonth``, where each fold trains on the months
+before its test months.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GroupKFold, KFold, TimeSeriesSplit
+
+from src.modeling.data_preparation import (
+    PREMIUM_FEATURES,
+    load_prepared,
+    make_preprocessor,
+    resolve_feature_columns,
+    store_prepared
+)
+from src.modeling.feature_store import (
+    column_store_exists,
+    dataframe_fingerprint,
+    store_path
+)
+from src.modeling.models import (
+    MODEL_TRAINERS,
+    THREADED_TRAINERS,
+    normalize_specs,
+    segment_metrics
+)
+
+SPLIT_STRATEGIES = ('kfold', 'group', 'time')
+
+CV_RESULT_COLUMNS = ['Model', 'Fold', 'Train_RMSE', 'Train_R2', 'Test_RMSE', 'Test_R2',
+                     'Test_MAE', 'Test_MAPE', 'N_Train', 'N_Test', 'Fit_Time']
+
+
+def make_folds(df: pd.DataFrame, n_splits: int = 5, split: str = 'kfold',
+               group_col: str = 'PolicyID', date_col: str = 'TransactionMonth',
+               random_state: int = 42) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Positional train/test row indices of every fold.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Rows to split
+    n_splits : int
+        Number of folds
+    split : str
+        'kfold' (shuffled), 'group' (rows sharing ``group_col`` stay
+        together) or 'time' (expanding window over the months of
+        ``date_col``; rows without a date are never used)
+    group_col : str
+        Group column for 'group'
+    date_col : str
+        Date column for 'time'
+    random_state : int
+        Seed of the 'kfold' and 'group' assignments
+
+    Returns
+    -------
+    list of tuple
+        ``(train_index, test_index)`` arrays per fold
+    """
+    if split not in SPLIT_STRATEGIES:
+        raise ValueError(f"Unknown split: {split}. Use any of {list(SPLIT_STRATEGIES)}")
+    rows = np.arange(len(df))
+
+    if split == 'kfold':
+        splitter = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        return list(splitter.split(rows))
+
+    if split == 'group':
+        # GroupKFold only shuffles from scikit-learn 1.6 on; relabelling the
+        # groups with a seeded permutation varies the assignment on any version
+        codes, uniques = pd.factorize(df[group_col])
+        permutation = np.random.default_rng(random_state).permutation(len(uniques))
+        groups = np.where(codes >= 0, permutation[codes], -1)
+        return list(GroupKFold(n_splits=n_splits).split(rows, groups=groups))
+
+    months = pd.DatetimeIndex(pd.to_datetime(df[date_col])).to_period('M')
+    codes, unique_months = pd.factorize(months, sort=True)
+    if len(unique_months) <= n_splits:
+        raise ValueError(f"Time splits need more than {n_splits} months, found {len(unique_months)}")
+    folds = []
+    for train_months, test_months in TimeSeriesSplit(n_splits=n_splits).split(unique_months):
+        folds.append((np.flatnonzero(np.isin(codes, train_months)),
+                      np.flatnonzero(np.isin(codes, test_months))))
+    return folds
+
+
+def _train_fold(path: str, name: str, trainer: Union[str, Callable], kwargs: Dict,
+                fold: int) -> Dict[str, Any]:
+    """Train one model on one memory-mapped fold and score its test rows."""
+    X_train, X_test, y_train, y_test, _, _ = load_prepared(Path(path))
+    func = MODEL_TRAINERS[trainer] if isinstance(trainer, str) else trainer
+
+    start = time.perf_counter()
+    model, train_metrics = func(X_train, y_train.to_numpy(), **kwargs)
+    fit_time = time.perf_counter() - start
+
+    y_pred = model.predict(X_test)
+    test = segment_metrics(y_test.to_numpy(), y_pred, np.zeros(len(y_test), dtype=np.int64), 1)
+    return {
+        'Model': name,
+        'Fold': fold,
+        'Train_RMSE': train_metrics['train_rmse'],
+        'Train_R2': train_metrics['train_r2'],
+        'Test_RMSE': test['rmse'][0],
+        'Test_R2': test['r2'][0],
+        'Test_MAE': test['mae'][0],
+        'Test_MAPE': test['mape'][0],
+        'N_Train': len(y_train),
+        'N_Test': len(y_test),
+        'Fit_Time': fit_time,
+    }
+
+
+class CrossValidator:
+    """
+    Cross-validation over folds that are encoded once and memory-mapped.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe (filter it first, e.g. to claims > 0 for severity)
+    target_col : str
+        Target column; rows with a missing or negative target are dropped
+    features : sequence of str, optional
+        Canonical feature names (default: ``PREMIUM_FEATURES``)
+    n_splits : int
+        Number of folds
+    split : str
+        'kfold', 'group' or 'time' (see ``make_folds``)
+    group_col : str
+        Group column for group splits (default: 'PolicyID')
+    date_col : str
+        Date column for time splits (default: 'TransactionMonth')
+    random_state : int
+        Seed of the fold assignment
+    sparse : bool
+        Encode folds as CSR matrices
+    categorical_encoding : str
+        'onehot' or 'target', as in ``prepare_premium_prediction_data``
+    use_feature_store : bool
+        Keep the encoded folds in the feature store, keyed by the data and
+        the split settings, so later sessions reuse them. Otherwise they live
+        in a temporary directory removed with the validator.
+    store_dir : str, optional
+        Feature store directory (default: FEATURE_STORE_DIR)
+
+    Examples
+    --------
+    >>> cv = CrossValidator(df, split='group', n_splits=5)
+    >>> results = cv.evaluate({'Linear Regression': 'linear_regression',
+    ...                        'XGBoost': 'xgboost'}, n_jobs=-1)
+    >>> cv.summary(results)
+    """
+
+    def __init__(self, df: pd.DataFrame, target_col: str = 'TotalPremium',
+                 features: Optional[Sequence[str]] = None, n_splits: int = 5,
+                 split: str = 'kfold', group_col: str = 'PolicyID',
+                 date_col: str = 'TransactionMonth', random_state: int = 42,
+                 sparse: bool = False, categorical_encoding: str = 'onehot',
+                 use_feature_store: bool = False,
+                 store_dir: Optional[Union[str, Path]] = None):
+        y = df[target_col]
+        self.df = df[(y.notna() & (y >= 0)).to_numpy()]
+        self.target_col = target_col
+        self.feature_cols = list(resolve_feature_columns(
+            self.df.columns, PREMIUM_FEATURES if features is None else features).values())
+        if not self.feature_cols:
+            raise ValueError(f"No feature columns found. Available columns: {list(df.columns)[:10]}")
+        self.n_splits = n_splits
+        self.split = split
+        self.sparse = sparse
+        self.categorical_encoding = categorical_encoding
+
+        self.folds = make_folds(self.df, n_splits, split, group_col, date_col, random_state)
+
+        split_col = {'group': group_col, 'time': date_col}.get(split)
+        if use_feature_store:
+            key = dataframe_fingerprint(
+                self.df, self.feature_cols + [target_col] + ([split_col] if split_col else []),
+                task='cross_validation', n_splits=n_splits, split=split,
+                random_state=random_state, sparse=sparse,
+                categorical_encoding=categorical_encoding
+            )
+            self.store_dir = store_path(key, store_dir)
+        else:
+            self.store_dir = Path(tempfile.mkdtemp(prefix='insurance_cv_'))
+            self._cleanup = weakref.finalize(self, shutil.rmtree, str(self.store_dir), True)
+
+    def fold_path(self, fold: int) -> Path:
+        """Column store of one encoded fold, encoding it on first use."""
+        path = self.store_dir / f"fold_{fold}"
+        if not column_store_exists(path):
+            train, test = self.folds[fold]
+            X = self.df[self.feature_cols]
+            y = pd.Series(self.df[self.target_col].to_numpy(dtype=np.float64),
+                          name=self.target_col)
+            preprocessor = make_preprocessor(self.feature_cols, self.sparse,
+                                              self.categorical_encoding)
+            X_train = preprocessor.fit_transform(X.iloc[train], y.iloc[train])
+            X_test = preprocessor.transform(X.iloc[test])
+            store_prepared(path, X_train, X_test, y.iloc[train], y.iloc[test], preprocessor)
+        return path
+
+    def fold(self, fold: int) -> Tuple:
+        """
+        Encoded data of one fold.
+
+        Returns
+        -------
+        tuple
+            (X_train, X_test, y_train, y_test, feature_names, preprocessor)
+            with memory-mapped matrices, like ``prepare_*_data``
+        """
+        return load_prepared(self.fold_path(fold))
+
+    def evaluate(self, specs, n_jobs: int = 1) -> pd.DataFrame:
+        """
+        Train and score every model on every fold.
+
+        Parameters
+        ----------
+        specs : dict or list
+            Models as accepted by ``train_models``
+        n_jobs : int
+            Total number of cores (default: 1, sequential in this process
+            with the trainers' own thread defaults); -1 uses all of them.
+            They are split between (model, fold) tasks and the threads of
+            each model.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per model and fold with train and test metrics, the
+            fold sizes and the fitting time
+        """
+        specs = normalize_specs(specs)
+        paths = [str(self.fold_path(fold)) for fold in range(len(self.folds))]
+        tasks = [(paths[fold], name, trainer, kwargs, fold)
+                 for name, (trainer, kwargs) in specs.items()
+                 for fold in range(len(self.folds))]
+
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        n_workers = max(min(n_jobs, len(tasks)), 1)
+
+        if n_workers == 1:
+            rows = [_train_fold(*task) for task in tasks]
+        else:
+            threads = max(n_jobs // n_workers, 1)
+            for _, _, trainer, kwargs, _ in tasks:
+                if trainer in THREADED_TRAINERS:
+                    kwargs.setdefault('n_jobs', threads)
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(_train_fold, *task) for task in tasks]
+                rows = [future.result() for future in futures]
+
+        results = pd.DataFrame(rows, columns=CV_RESULT_COLUMNS)
+        results.attrs.update({'split': self.split, 'n_splits': len(self.folds)})
+        return results
+
+    @staticmethod
+    def summary(results: pd.DataFrame) -> pd.DataFrame:
+        """Mean and standard deviation of the fold metrics per model."""
+        metrics = ['Train_RMSE', 'Train_R2', 'Test_RMSE', 'Test_R2', 'Test_MAE', 'Test_MAPE']
+        return results.groupby('Model', sort=False)[metrics].agg(['mean', 'std'])
@@ -4,16 +4,84 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder, OneHotEncoder
-from typing import Tuple, List, Optional
+from pathlib import Path
+from scipy import sparse as sp
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple, List, Optional, Union
 import warnings
 
+from src.modeling.feature_store import (
+    column_store_exists,
+    dataframe_fingerprint,
+    read_column_store,
+    store_path,
+    write_column_store
+)
+from src.modeling.preprocessing import (
+    HIGH_CARDINALITY_COLUMNS,
+    InsurancePreprocessor,
+    category_vocabulary,
+    one_hot_csr
+)
+
 warnings.filterwarnings('ignore')
 
+# Canonical model features; dataset columns are matched case-insensitively
+SEVERITY_FEATURES = [
+    'Province', 'PostalCode', 'Gender', 'MaritalStatus',
+    'VehicleType', 'make', 'RegistrationYear', 'cubiccapacity', 'kilowatts',
+    'SumInsured', 'CoverType', 'CalculatedPremiumPerTerm'
+]
+PREMIUM_FEATURES = SEVERITY_FEATURES + ['bodytype', 'NumberOfDoors']
+
+
+def resolve_feature_columns(columns: Iterable[str], features: Iterable[str]) -> Dict[str, str]:
+    """
+    Map canonical feature names to the columns of a dataset.
+    
+    An exact match wins; otherwise the name is matched case-insensitively
+    (``make``/``Make``, ``cubiccapacity``/``Cubiccapacity``, ...). The result
+    is cached per column set, so the mapping is built once per loaded file.
+    
+    Parameters
+    ----------
+    columns : iterable of str
+        Dataset columns
+    features : iterable of str
+        Canonical feature names
+    
+    Returns
+    -------
+    dict
+        ``{canonical: column}`` in ``features`` order, for the features found
+    """
+    return dict(_resolve_columns(tuple(columns), tuple(features)))
+
+
+@lru_cache(maxsize=64)
+def _resolve_columns(columns: Tuple[str, ...], features: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """Cached body of ``resolve_feature_columns``."""
+    exact = set(columns)
+    by_lower = {}
+    for col in columns:
+        by_lower.setdefault(col.lower(), col)
+    
+    resolved = {}
+    for feature in features:
+        col = feature if feature in exact else by_lower.get(feature.lower())
+        if col is not None and col not in resolved.values():
+            resolved[feature] = col
+    return tuple(resolved.items())
+
 
 def prepare_claim_severity_data(df: pd.DataFrame, 
                                 target_col: str = 'TotalClaims',
                                 test_size: float = 0.2,
-                                random_state: int = 42) -> Tuple:
+                                random_state: int = 42,
+                                use_feature_store: bool = False,
+                                store_dir: Optional[Union[str, Path]] = None,
+                                sparse: bool = False,
+                                categorical_encoding: str = 'onehot') -> Tuple:
     """
     Prepare data for claim severity prediction (policies with claims > 0).
     
@@ -27,6 +95,17 @@ def prepare_claim_severity_data(df: pd.DataFrame,
         Proportion of data for testing (default: 0.2)
     random_state : int
         Random seed for reproducibility
+    use_feature_store : bool
+        Reuse (or write) the encoded, scaled matrices in the memory-mapped
+        feature store. Returned X arrays are then read-only memmaps.
+    store_dir : str, optional
+        Feature store directory (default: FEATURE_STORE_DIR)
+    sparse : bool
+        Return X as CSR matrices with sparse-aware scaling (default: False)
+    categorical_encoding : str
+        'onehot' (default) or 'target' to replace the high-cardinality
+        PostalCode and make columns with smoothed out-of-fold target means
+        and frequencies
     
     Returns
     -------
@@ -34,7 +113,7 @@ def prepare_claim_severity_data(df: pd.DataFrame,
         (X_train, X_test, y_train, y_test, feature_names, preprocessor)
     """
     # Filter to policies with claims
-    df_claims = df[df[target_col] > 0].copy()
+    df_claims = df[df[target_col] > 0]
     
     if len(df_claims) == 0:
         raise ValueError("No policies with claims found in the dataset")
@@ -42,78 +121,53 @@ def prepare_claim_severity_data(df: pd.DataFrame,
     # Debug: Print available columns
     print(f"Available columns in dataset: {list(df_claims.columns)[:15]}...")
     
-    # Select features for modeling (try both case variations)
-    feature_cols = [
-        'Province', 'PostalCode', 'Gender', 'MaritalStatus',
-        'VehicleType', 'make', 'Make', 'RegistrationYear', 
-        'cubiccapacity', 'Cubiccapacity', 'kilowatts', 'Kilowatts',
-        'SumInsured', 'CoverType', 'CalculatedPremiumPerTerm'
-    ]
-    
-    # Create a mapping of lowercase column names to actual column names
-    col_mapping = {col.lower(): col for col in df_claims.columns}
-    
-    # Find available columns (case-insensitive matching)
-    available_cols = []
-    for col in feature_cols:
-        # Try exact match first
-        if col in df_claims.columns:
-            if col not in available_cols:
-                available_cols.append(col)
-        # Try case-insensitive match
-        elif col.lower() in col_mapping:
-            actual_col = col_mapping[col.lower()]
-            if actual_col not in available_cols:
-                available_cols.append(actual_col)
-    
+    available_cols = list(resolve_feature_columns(df_claims.columns, SEVERITY_FEATURES).values())
     if len(available_cols) == 0:
         raise ValueError(f"No feature columns found. Available columns: {list(df_claims.columns)[:10]}")
     
     print(f"Using {len(available_cols)} features: {available_cols[:5]}...")
     
-    X = df_claims[available_cols].copy()
-    y = df_claims[target_col].copy()
-    
-    # Handle missing values
-    # For numerical: fill with median
-    numerical_cols = X.select_dtypes(include=[np.number]).columns
-    for col in numerical_cols:
-        if X[col].isna().any():
-            median_val = X[col].median()
-            if pd.isna(median_val):
-                # If median is NaN (all values are NaN), fill with 0
-                X[col].fillna(0, inplace=True)
-            else:
-                X[col].fillna(median_val, inplace=True)
-    
-    # For categorical: fill with mode
-    categorical_cols = X.select_dtypes(include=['object']).columns
-    for col in categorical_cols:
-        X[col].fillna(X[col].mode()[0] if len(X[col].mode()) > 0 else 'Unknown', inplace=True)
-    
-    # Encode categorical variables
-    X_encoded = encode_categorical_features(X, categorical_cols)
-    
-    # Split data
+    if use_feature_store:
+        key = dataframe_fingerprint(df_claims, available_cols + [target_col],
+                                    task='claim_severity', test_size=test_size,
+                                    random_state=random_state, sparse=sparse,
+                                    categorical_encoding=categorical_encoding)
+        path = store_path(key, store_dir)
+        if column_store_exists(path):
+            print(f"Loading prepared features from store: {path}")
+            return load_prepared(path)
+    
+    X = df_claims[available_cols]
+    y = df_claims[target_col]
+    
+    # Split first so imputation, vocabularies and scaling are learned from
+    # the training rows only
     X_train, X_test, y_train, y_test = train_test_split(
-        X_encoded, y, test_size=test_size, random_state=random_state
+        X, y, test_size=test_size, random_state=random_state
     )
     
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    preprocessor = make_preprocessor(available_cols, sparse, categorical_encoding)
+    X_train_scaled = preprocessor.fit_transform(X_train, y_train)
+    X_test_scaled = preprocessor.transform(X_test)
+    
+    feature_names = preprocessor.feature_names_
     
-    feature_names = X_encoded.columns.tolist()
+    if use_feature_store:
+        return store_prepared(path, X_train_scaled, X_test_scaled, y_train, y_test,
+                               preprocessor)
     
     return (X_train_scaled, X_test_scaled, y_train, y_test, 
-            feature_names, {'scaler': scaler, 'encoders': {}})
+            feature_names, _preprocessor_dict(preprocessor))
 
 
 def prepare_premium_prediction_data(df: pd.DataFrame,
                                     target_col: str = 'TotalPremium',
                                     test_size: float = 0.2,
-                                    random_state: int = 42) -> Tuple:
+                                    random_state: int = 42,
+                                    use_feature_store: bool = False,
+                                    store_dir: Optional[Union[str, Path]] = None,
+                                    sparse: bool = False,
+                                    categorical_encoding: str = 'onehot') -> Tuple:
     """
     Prepare data for premium prediction.
     
@@ -127,87 +181,141 @@ def prepare_premium_prediction_data(df: pd.DataFrame,
         Proportion of data for testing
     random_state : int
         Random seed
+    use_feature_store : bool
+        Reuse (or write) the encoded, scaled matrices in the memory-mapped
+        feature store. Returned X arrays are then read-only memmaps.
+    store_dir : str, optional
+        Feature store directory (default: FEATURE_STORE_DIR)
+    sparse : bool
+        Return X as CSR matrices with sparse-aware scaling (default: False)
+    categorical_encoding : str
+        'onehot' (default) or 'target' to replace the high-cardinality
+        PostalCode and make columns with smoothed out-of-fold target means
+        and frequencies
     
     Returns
     -------
     tuple
         (X_train, X_test, y_train, y_test, feature_names, preprocessor)
     """
-    df_clean = df.copy()
-    
-    # Select features (try both case variations)
-    feature_cols = [
-        'Province', 'PostalCode', 'Gender', 'MaritalStatus',
-        'VehicleType', 'make', 'Make', 'RegistrationYear', 
-        'cubiccapacity', 'Cubiccapacity', 'kilowatts', 'Kilowatts',
-        'SumInsured', 'CoverType', 'CalculatedPremiumPerTerm',
-        'bodytype', 'BodyType', 'NumberOfDoors'
-    ]
-    
-    # Create a mapping of lowercase column names to actual column names
-    col_mapping = {col.lower(): col for col in df_clean.columns}
-    
-    # Find available columns (case-insensitive matching, remove duplicates)
-    available_cols = []
-    seen_lower = set()
-    for col in feature_cols:
-        # Try exact match first
-        if col in df_clean.columns and col.lower() not in seen_lower:
-            available_cols.append(col)
-            seen_lower.add(col.lower())
-        # Try case-insensitive match
-        elif col.lower() in col_mapping:
-            actual_col = col_mapping[col.lower()]
-            if actual_col not in available_cols:
-                available_cols.append(actual_col)
-                seen_lower.add(col.lower())
-    
+    available_cols = list(resolve_feature_columns(df.columns, PREMIUM_FEATURES).values())
     if len(available_cols) == 0:
-        raise ValueError(f"No feature columns found. Available columns: {list(df_clean.columns)[:10]}")
+        raise ValueError(f"No feature columns found. Available columns: {list(df.columns)[:10]}")
     
-    X = df_clean[available_cols].copy()
-    y = df_clean[target_col].copy()
+    if use_feature_store:
+        key = dataframe_fingerprint(df, available_cols + [target_col],
+                                    task='premium_prediction', test_size=test_size,
+                                    random_state=random_state, sparse=sparse,
+                                    categorical_encoding=categorical_encoding)
+        path = store_path(key, store_dir)
+        if column_store_exists(path):
+            print(f"Loading prepared features from store: {path}")
+            return load_prepared(path)
+    
+    X = df[available_cols]
+    y = df[target_col]
     
     # Remove rows with missing target
     mask = y.notna() & (y >= 0)  # Also filter negative premiums
-    X = X[mask].copy()
-    y = y[mask].copy()
-    
-    # Handle missing values
-    numerical_cols = X.select_dtypes(include=[np.number]).columns
-    for col in numerical_cols:
-        if X[col].isna().any():
-            median_val = X[col].median()
-            if pd.isna(median_val):
-                # If median is NaN (all values are NaN), fill with 0
-                X[col].fillna(0, inplace=True)
-            else:
-                X[col].fillna(median_val, inplace=True)
-    
-    categorical_cols = X.select_dtypes(include=['object']).columns
-    for col in categorical_cols:
-        X[col].fillna(X[col].mode()[0] if len(X[col].mode()) > 0 else 'Unknown', inplace=True)
-    
-    # Encode categorical variables
-    X_encoded = encode_categorical_features(X, categorical_cols)
-    
-    # Split data
+    X = X[mask]
+    y = y[mask]
+    
+    # Split first so imputation, vocabularies and scaling are learned from
+    # the training rows only
     X_train, X_test, y_train, y_test = train_test_split(
-        X_encoded, y, test_size=test_size, random_state=random_state
+        X, y, test_size=test_size, random_state=random_state
     )
     
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    preprocessor = make_preprocessor(available_cols, sparse, categorical_encoding)
+    X_train_scaled = preprocessor.fit_transform(X_train, y_train)
+    X_test_scaled = preprocessor.transform(X_test)
     
-    feature_names = X_encoded.columns.tolist()
+    feature_names = preprocessor.feature_names_
+    
+    if use_feature_store:
+        return store_prepared(path, X_train_scaled, X_test_scaled, y_train, y_test,
+                               preprocessor)
     
     return (X_train_scaled, X_test_scaled, y_train, y_test,
-            feature_names, {'scaler': scaler, 'encoders': {}})
+            feature_names, _preprocessor_dict(preprocessor))
+
+
+def make_preprocessor(available_cols: List[str], sparse: bool,
+                       categorical_encoding: str) -> InsurancePreprocessor:
+    """Preprocessor for the prepare_* functions and the chosen categorical encoding."""
+    if categorical_encoding not in ('onehot', 'target'):
+        raise ValueError(f"Unknown categorical_encoding: {categorical_encoding}. Use 'onehot' or 'target'")
+    
+    target_encoded = []
+    if categorical_encoding == 'target':
+        resolved = resolve_feature_columns(available_cols, HIGH_CARDINALITY_COLUMNS)
+        target_encoded = list(resolved.values())
+    return InsurancePreprocessor(sparse=sparse, target_encoded=target_encoded)
+
 
+def _preprocessor_dict(preprocessor: InsurancePreprocessor) -> dict:
+    """The preprocessor entry of the prepare_* return tuple."""
+    return {
+        'scaler': preprocessor.scaler_,
+        'encoders': preprocessor.vocabularies_,
+        'preprocessor': preprocessor
+    }
 
-def encode_categorical_features(X: pd.DataFrame, categorical_cols: List[str]) -> pd.DataFrame:
+
+def store_prepared(path: Path, X_train: np.ndarray, X_test: np.ndarray,
+                    y_train: pd.Series, y_test: pd.Series,
+                    preprocessor: InsurancePreprocessor) -> Tuple:
+    """Write prepared matrices to the feature store and return them memory-mapped."""
+    arrays = {}
+    for name, X in (('X_train', X_train), ('X_test', X_test)):
+        if sp.issparse(X):
+            # CSR matrices are stored as their three component arrays
+            arrays.update({f'{name}_data': X.data, f'{name}_indices': X.indices,
+                           f'{name}_indptr': X.indptr})
+        else:
+            arrays[name] = X
+    arrays.update({
+        'y_train': y_train.to_numpy(dtype=np.float64),
+        'y_test': y_test.to_numpy(dtype=np.float64),
+        'train_index': y_train.index.to_numpy(),
+        'test_index': y_test.index.to_numpy(),
+    })
+    metadata = {
+        'feature_names': preprocessor.feature_names_,
+        'target': y_train.name,
+        'preprocessor': preprocessor.to_dict(),
+    }
+    write_column_store(path, arrays, metadata)
+    print(f"Saved prepared features to store: {path}")
+    return load_prepared(path)
+
+
+def load_prepared(path: Path) -> Tuple:
+    """Rebuild the prepare_* return tuple from a memory-mapped feature store."""
+    arrays, metadata = read_column_store(path, mmap_mode='r')
+    preprocessor = InsurancePreprocessor.from_dict(metadata['preprocessor'])
+    
+    y_train = pd.Series(arrays['y_train'], index=arrays['train_index'], name=metadata['target'])
+    y_test = pd.Series(arrays['y_test'], index=arrays['test_index'], name=metadata['target'])
+    
+    n_features = len(metadata['feature_names'])
+    X = {}
+    for name, y in (('X_train', y_train), ('X_test', y_test)):
+        if name in arrays:
+            X[name] = arrays[name]
+        else:
+            X[name] = sp.csr_matrix(
+                (arrays[f'{name}_data'], arrays[f'{name}_indices'], arrays[f'{name}_indptr']),
+                shape=(len(y), n_features), copy=False
+            )
+    
+    return (X['X_train'], X['X_test'], y_train, y_test,
+            metadata['feature_names'], _preprocessor_dict(preprocessor))
+
+
+def encode_categorical_features(X: pd.DataFrame, categorical_cols: List[str],
+                                sparse: bool = False
+                                ) -> Union[pd.DataFrame, Tuple[sp.csr_matrix, List[str]]]:
     """
     Encode categorical features using one-hot encoding.
     
@@ -217,22 +325,37 @@ def encode_categorical_features(X: pd.DataFrame, categorical_cols: List[str]) ->
         Input dataframe
     categorical_cols : list
         List of categorical column names
+    sparse : bool
+        Build a single CSR matrix from the category codes instead of a dense
+        dataframe (default: False)
     
     Returns
     -------
-    pd.DataFrame
-        Dataframe with encoded categorical features
+    pd.DataFrame or tuple
+        Dataframe with encoded categorical features, or with ``sparse=True``
+        a tuple of (CSR matrix, feature names) with the same columns
     """
-    X_encoded = X.copy()
-    
-    # One-hot encode categorical variables
-    for col in categorical_cols:
-        if col in X_encoded.columns:
-            # Get dummies
-            dummies = pd.get_dummies(X_encoded[col], prefix=col, drop_first=True)
-            X_encoded = pd.concat([X_encoded.drop(columns=[col]), dummies], axis=1)
-    
-    return X_encoded
+    categorical_cols = [col for col in categorical_cols if col in X.columns]
+    other = X.drop(columns=categorical_cols)
+    
+    if not sparse:
+        if not categorical_cols:
+            return X.copy()
+        # One get_dummies call and one concat for all columns
+        dummies = pd.get_dummies(X[categorical_cols], prefix=categorical_cols, drop_first=True)
+        return pd.concat([other, dummies], axis=1)
+    
+    vocabularies = [category_vocabulary(X[col]) for col in categorical_cols]
+    codes = [pd.Categorical(X[col], categories=vocabulary).codes
+             for col, vocabulary in zip(categorical_cols, vocabularies)]
+    one_hot = one_hot_csr(codes, [len(vocabulary) for vocabulary in vocabularies])
+    
+    matrix = sp.hstack([sp.csr_matrix(other.to_numpy(dtype=np.float64)), one_hot], format='csr')
+    feature_names = list(other.columns) + [
+        f"{col}_{value}" for col, vocabulary in zip(categorical_cols, vocabularies)
+        for value in vocabulary[1:]
+    ]
+    return matrix, feature_names
 
 
 def create_claim_probability_feature(df: pd.DataFrame) -> pd.DataFrame:
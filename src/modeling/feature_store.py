@@ -0,0 +1,146 @@
+"""Memory-mapped NumPy column store for encoded feature matrices.
+
+A store is a directory of ``.npy`` files (one per array) plus a
+``metadata.json`` file. Arrays are read back with ``mmap_mode='r'`` so
+repeated training runs and worker processes share the same pages from the
+OS cache instead of each rebuilding a private copy of the feature matrix.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import FEATURE_STORE_DIR
+
+METADATA_FILE = "metadata.json"
+
+
+def dataframe_fingerprint(df: pd.DataFrame, columns: Optional[List[str]] = None,
+                          **params) -> str:
+    """
+    Hash the contents of a dataframe together with preparation parameters.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe.
+    columns : list, optional
+        Columns to include in the hash (default: all columns).
+    **params
+        Extra parameters (target, test size, seed, ...) that change the output.
+
+    Returns
+    -------
+    str
+        Hex digest identifying the prepared data.
+    """
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(map(str, df.columns))).encode('utf-8'))
+    digest.update(json.dumps({k: str(v) for k, v in sorted(params.items())}).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:24]
+
+
+def store_path(key: str, store_dir: Optional[Union[str, Path]] = None) -> Path:
+    """Directory holding the store identified by ``key``."""
+    store_dir = Path(store_dir) if store_dir is not None else FEATURE_STORE_DIR
+    return store_dir / key
+
+
+def column_store_exists(path: Union[str, Path]) -> bool:
+    """Return True if ``path`` holds a complete column store."""
+    return (Path(path) / METADATA_FILE).exists()
+
+
+def write_column_store(path: Union[str, Path], arrays: Dict[str, np.ndarray],
+                       metadata: Optional[dict] = None) -> Path:
+    """
+    Write arrays as ``.npy`` files plus a metadata file.
+
+    The store is written to a temporary directory and renamed into place, so
+    readers never observe a partially written store.
+
+    Parameters
+    ----------
+    path : str or Path
+        Target store directory.
+    arrays : dict
+        Mapping of array name to numeric array.
+    metadata : dict, optional
+        JSON-serialisable metadata (feature names, parameters, ...).
+
+    Returns
+    -------
+    Path
+        The store directory.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{path.name}.", dir=path.parent))
+
+    try:
+        shapes = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype == object:
+                raise ValueError(f"Array '{name}' has object dtype; encode it before storing")
+            np.save(tmp_dir / f"{name}.npy", array, allow_pickle=False)
+            shapes[name] = {'shape': list(array.shape), 'dtype': str(array.dtype)}
+
+        meta = dict(metadata or {})
+        meta['arrays'] = shapes
+        (tmp_dir / METADATA_FILE).write_text(json.dumps(meta, indent=2))
+
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp_dir, path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return path
+
+
+def read_column_store(path: Union[str, Path],
+                      mmap_mode: Optional[str] = 'r') -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Open a column store with its arrays memory-mapped.
+
+    Parameters
+    ----------
+    path : str or Path
+        Store directory.
+    mmap_mode : str, optional
+        Passed to ``np.load`` (default: 'r', read-only zero-copy). Use None to
+        load the arrays into memory.
+
+    Returns
+    -------
+    tuple
+        (arrays, metadata)
+
+    Raises
+    ------
+    FileNotFoundError
+        If the store does not exist.
+    """
+    path = Path(path)
+    if not column_store_exists(path):
+        raise FileNotFoundError(f"Column store not found: {path}")
+
+    metadata = json.loads((path / METADATA_FILE).read_text())
+    arrays = {
+        name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+        for name in metadata['arrays']
+    }
+    return arrays, metadata
@@ -0,0 +1,339 @@
+"""Log-link GLMs for claim frequency, severity and pure premium.
+
+``InsuranceGLM`` fits Tweedie-family models with a log link: Poisson
+(``power=1``) for claim frequency, Gamma (``power=2``) for claim severity and
+compound Poisson-Gamma Tweedie (``1 < power < 2``) for the zero-inflated,
+skewed pure premium. Exposure enters as an offset ``log(exposure)``, so the
+fitted mean of a row is ``exposure * exp(intercept + X @ coef)``.
+
+The design matrix is typically the CSR output of
+``InsurancePreprocessor(sparse=True)``. Two solvers work on it directly:
+
+- 'irls' (default) takes Newton (iteratively reweighted least squares)
+  steps with step halving. Each step forms the sparse ``X.T @ W @ X``; with
+  a few non-zeros per row this is cheap, and a handful of steps fits a
+  1M-row portfolio in seconds.
+- 'lbfgs' minimizes the same objective with L-BFGS. Each iteration costs
+  only two sparse matrix-vector products but many more iterations are
+  needed; it suits very wide designs where the dense Newton system becomes
+  the bottleneck.
+
+The objective is the weighted mean of the unit losses plus
+``alpha / 2 * ||coef||²`` (the intercept is not penalized), as in
+scikit-learn's ``TweedieRegressor``.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, optimize
+from scipy import sparse
+
+from src.modeling.data_preparation import SEVERITY_FEATURES, resolve_feature_columns
+from src.modeling.preprocessing import InsurancePreprocessor
+
+# Variance power of each named family
+GLM_FAMILIES = {'poisson': 1.0, 'gamma': 2.0, 'tweedie': 1.5}
+
+GLM_SOLVERS = ('lbfgs', 'irls')
+
+
+def _loss_terms(y: np.ndarray, eta: np.ndarray, power: float) -> tuple:
+    """
+    Unit loss, its derivative in eta and the mean, for a log link.
+
+    The loss is the negative log-likelihood up to terms free of eta; the
+    derivative is ``(mu - y) * mu^(1 - p)``. Each power reuses the same
+    exponentials for all three.
+    """
+    mu = np.exp(eta)
+    if power == 1:
+        return mu - y * eta, mu - y, mu
+    if power == 2:
+        inverse = 1 / mu
+        return y * inverse + eta, 1 - y * inverse, mu
+    lower = np.exp((1 - power) * eta)
+    upper = lower * mu
+    return upper / (2 - power) - y * lower / (1 - power), upper - y * lower, mu
+
+
+def tweedie_deviance(y: np.ndarray, mu: np.ndarray, power: float,
+                     weights: Optional[np.ndarray] = None) -> float:
+    """
+    Total (weighted) Tweedie deviance.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        Observed values
+    mu : np.ndarray
+        Predicted means
+    power : float
+        Variance power: 1 (Poisson), 2 (Gamma) or in (1, 2) (Tweedie)
+    weights : np.ndarray, optional
+        Row weights
+
+    Returns
+    -------
+    float
+        Sum of the weighted unit deviances
+    """
+    y = np.asarray(y, dtype=np.float64)
+    mu = np.asarray(mu, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if power == 1:
+            unit = 2 * (np.where(y > 0, y * np.log(y / mu), 0.0) - (y - mu))
+        elif power == 2:
+            unit = 2 * (np.log(mu / y) + y / mu - 1)
+        else:
+            unit = 2 * (np.power(y, 2 - power) / ((1 - power) * (2 - power))
+                        - y * np.power(mu, 1 - power) / (1 - power)
+                        + np.power(mu, 2 - power) / (2 - power))
+    return float(np.sum(unit if weights is None else weights * unit))
+
+
+class InsuranceGLM:
+    """
+    Log-link Tweedie-family GLM with exposure offsets.
+
+    Parameters
+    ----------
+    family : str
+        'poisson', 'gamma' or 'tweedie'
+    power : float, optional
+        Variance power for 'tweedie' (default: 1.5); ignored otherwise
+    alpha : float
+        L2 penalty on the coefficients (not the intercept)
+    solver : str
+        'irls' (default) or 'lbfgs'
+    max_iter : int
+        Maximum solver iterations
+    tol : float
+        Convergence tolerance on the gradient ('lbfgs') or the Newton step
+        ('irls')
+    """
+
+    def __init__(self, family: str = 'tweedie', power: Optional[float] = None,
+                 alpha: float = 0.0, solver: str = 'irls', max_iter: int = 500,
+                 tol: float = 1e-8):
+        if family not in GLM_FAMILIES:
+            raise ValueError(f"Unknown family: {family}. Use any of {list(GLM_FAMILIES)}")
+        if solver not in GLM_SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}. Use any of {list(GLM_SOLVERS)}")
+        if family == 'tweedie':
+            power = GLM_FAMILIES['tweedie'] if power is None else float(power)
+            if not 1 < power < 2:
+                raise ValueError(f"Tweedie power must be between 1 and 2, got {power}")
+        else:
+            power = GLM_FAMILIES[family]
+        self.family = family
+        self.power = power
+        self.alpha = alpha
+        self.solver = solver
+        self.max_iter = max_iter
+        self.tol = tol
+        self.fitted_ = False
+
+    def _objective(self, params: np.ndarray, X, y: np.ndarray, offset: np.ndarray,
+                   weights: np.ndarray) -> tuple:
+        """Penalized mean loss, its gradient and the eta-space quantities."""
+        eta = params[0] + X @ params[1:] + offset
+        unit_loss, derivative, mu = _loss_terms(y, eta, self.power)
+        loss = np.dot(weights, unit_loss)
+        residual = weights * derivative
+        gradient = np.concatenate([[residual.sum()], X.T @ residual])
+        gradient[1:] += self.alpha * params[1:]
+        value = loss + 0.5 * self.alpha * np.dot(params[1:], params[1:])
+        return value, gradient, mu
+
+    def _fit_lbfgs(self, params: np.ndarray, X, y, offset, weights) -> np.ndarray:
+        """Minimize the objective with L-BFGS."""
+        def fun(p):
+            value, gradient, _ = self._objective(p, X, y, offset, weights)
+            return value, gradient
+
+        result = optimize.minimize(fun, params, jac=True, method='L-BFGS-B',
+                                   options={'maxiter': self.max_iter, 'gtol': self.tol,
+                                            'ftol': 64 * np.finfo(float).eps})
+        self.n_iter_ = int(result.nit)
+        self.converged_ = bool(result.success)
+        return result.x
+
+    def _fit_irls(self, params: np.ndarray, X, y, offset, weights) -> np.ndarray:
+        """Newton / IRLS steps with step halving."""
+        value, gradient, mu = self._objective(params, X, y, offset, weights)
+        self.converged_ = False
+        for iteration in range(1, self.max_iter + 1):
+            # Expected Hessian in eta space: w * mu^(2 - p)
+            working = weights * np.power(mu, 2 - self.power)
+            if sparse.issparse(X):
+                XtWX = (X.T @ X.multiply(working[:, None]).tocsr()).toarray()
+            else:
+                XtWX = X.T @ (X * working[:, None])
+            XtW1 = np.asarray(X.T @ working).ravel()
+            hessian = np.block([[np.array([[working.sum()]]), XtW1[None, :]],
+                                [XtW1[:, None], XtWX + self.alpha * np.eye(len(XtW1))]])
+            # A tiny ridge keeps the system solvable when the intercept is
+            # collinear with a full one-hot block; the fixed point is unchanged
+            hessian[np.diag_indices_from(hessian)] += 1e-10 * hessian.diagonal().max()
+            step = linalg.solve(hessian, -gradient, assume_a='pos')
+
+            scale = 1.0
+            while True:
+                candidate = params + scale * step
+                new_value, new_gradient, new_mu = self._objective(candidate, X, y, offset, weights)
+                if new_value <= value or scale < 1e-10:
+                    break
+                scale /= 2
+            params, value, gradient, mu = candidate, new_value, new_gradient, new_mu
+
+            if np.max(np.abs(scale * step)) < self.tol * max(1.0, np.max(np.abs(params))):
+                self.converged_ = True
+                break
+        self.n_iter_ = iteration
+        return params
+
+    def fit(self, X, y, exposure: Optional[np.ndarray] = None,
+            sample_weight: Optional[np.ndarray] = None) -> 'InsuranceGLM':
+        """
+        Fit the GLM.
+
+        Parameters
+        ----------
+        X : scipy.sparse matrix or np.ndarray
+            Design matrix without an intercept column
+        y : array-like
+            Target: counts (Poisson), positive amounts (Gamma) or
+            non-negative amounts (Tweedie)
+        exposure : array-like, optional
+            Exposure per row, used as the offset ``log(exposure)``
+        sample_weight : array-like, optional
+            Row weights, e.g. claim counts for an average-severity Gamma model
+
+        Returns
+        -------
+        InsuranceGLM
+            self
+        """
+        if sparse.issparse(X):
+            X = sparse.csr_matrix(X)
+        y = np.asarray(y, dtype=np.float64)
+        n_rows = len(y)
+        if self.power == 2 and np.any(y <= 0):
+            raise ValueError("Gamma GLM needs strictly positive targets")
+        if np.any(y < 0):
+            raise ValueError(f"{self.family} GLM needs non-negative targets")
+
+        exposure = np.ones(n_rows) if exposure is None else np.asarray(exposure, dtype=np.float64)
+        if np.any(exposure <= 0):
+            raise ValueError("Exposure must be positive")
+        offset = np.log(exposure)
+        weights = np.ones(n_rows) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        # Mean loss, so alpha has the same meaning whatever the number of rows
+        weights = weights / weights.sum()
+
+        params = np.zeros(X.shape[1] + 1)
+        params[0] = np.log(max(np.dot(weights, y), 1e-12) / np.dot(weights, exposure))
+
+        if self.solver == 'lbfgs':
+            params = self._fit_lbfgs(params, X, y, offset, weights)
+        else:
+            params = self._fit_irls(params, X, y, offset, weights)
+
+        self.intercept_ = float(params[0])
+        self.coef_ = params[1:]
+        self.fitted_ = True
+
+        mu = self.predict(X, exposure)
+        raw_weights = np.ones(n_rows) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        null_mu = exposure * np.dot(raw_weights, y) / np.dot(raw_weights, exposure)
+        self.deviance_ = tweedie_deviance(y, mu, self.power, raw_weights)
+        self.null_deviance_ = tweedie_deviance(y, null_mu, self.power, raw_weights)
+        return self
+
+    def predict(self, X, exposure: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Predicted mean per row, including the exposure.
+
+        Parameters
+        ----------
+        X : scipy.sparse matrix or np.ndarray
+            Design matrix
+        exposure : array-like, optional
+            Exposure per row (default: 1)
+
+        Returns
+        -------
+        np.ndarray
+            ``exposure * exp(intercept + X @ coef)``
+        """
+        if not self.fitted_:
+            raise ValueError("InsuranceGLM is not fitted yet. Call fit() first.")
+        mu = np.exp(self.intercept_ + np.asarray(X @ self.coef_).ravel())
+        return mu if exposure is None else mu * np.asarray(exposure, dtype=np.float64)
+
+    def score(self, X, y, exposure: Optional[np.ndarray] = None) -> float:
+        """Share of the null deviance explained (D²) on the given data."""
+        y = np.asarray(y, dtype=np.float64)
+        exposure_ = np.ones(len(y)) if exposure is None else np.asarray(exposure, dtype=np.float64)
+        null_mu = exposure_ * y.sum() / exposure_.sum()
+        return 1 - (tweedie_deviance(y, self.predict(X, exposure), self.power)
+                    / tweedie_deviance(y, null_mu, self.power))
+
+
+def fit_claim_cost_glms(df: pd.DataFrame, features: Optional[Sequence[str]] = None,
+                        claims_col: str = 'TotalClaims',
+                        exposure_col: Optional[str] = None,
+                        power: float = 1.5, alpha: float = 1e-4,
+                        solver: str = 'irls') -> Dict[str, Any]:
+    """
+    Fit frequency, severity and pure premium GLMs on one sparse design.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Policies with the feature columns and the claims column
+    features : sequence of str, optional
+        Canonical feature names (default: ``SEVERITY_FEATURES``)
+    claims_col : str
+        Claim amount column
+    exposure_col : str, optional
+        Exposure column (e.g. policy years); every row has exposure 1 if None
+    power : float
+        Tweedie power of the pure premium model
+    alpha : float
+        L2 penalty of all three models
+    solver : str
+        'irls' or 'lbfgs'
+
+    Returns
+    -------
+    dict
+        ``preprocessor`` (sparse ``InsurancePreprocessor``), ``frequency``
+        (Poisson on the claim indicator), ``severity`` (Gamma on the claims
+        of policies with a claim) and ``pure_premium`` (Tweedie on all
+        claims) models
+    """
+    claims = df[claims_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(claims)
+    df, claims = df[valid], claims[valid]
+    exposure = None if exposure_col is None else df[exposure_col].to_numpy(dtype=np.float64)
+
+    feature_cols = list(resolve_feature_columns(
+        df.columns, SEVERITY_FEATURES if features is None else features).values())
+    if not feature_cols:
+        raise ValueError(f"No feature columns found. Available columns: {list(df.columns)[:10]}")
+    preprocessor = InsurancePreprocessor(sparse=True)
+    X = preprocessor.fit_transform(df[feature_cols])
+
+    claimed = np.flatnonzero(claims > 0)
+    return {
+        'preprocessor': preprocessor,
+        'frequency': InsuranceGLM('poisson', alpha=alpha, solver=solver).fit(
+            X, (claims > 0).astype(np.float64), exposure=exposure),
+        'severity': InsuranceGLM('gamma', alpha=alpha, solver=solver).fit(
+            X[claimed], claims[claimed]),
+        'pure_premium': InsuranceGLM('tweedie', power=power, alpha=alpha, solver=solver).fit(
+            X, claims, exposure=exposure),
+    }
@@ -1,12 +1,20 @@
 """Machine learning models for insurance risk analytics."""
 
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.linear_model import LinearRegression
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-from typing import Dict, Tuple, Any
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Any, Union
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -15,8 +23,42 @@ warnings.filterwarnings('ignore')
 XGBOOST_AVAILABLE = None
 XGBRegressor = None
 
+TRAIN_METRICS_MODES = ('full', 'cheap', 'none')
+
+
+def _regression_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict:
+    """Training RMSE, R² and MAE, ignoring rows without a prediction."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    valid = ~np.isnan(y_pred)
+    y_true, y_pred = y_true[valid], y_pred[valid]
+    
+    return {
+        'train_rmse': np.sqrt(mean_squared_error(y_true, y_pred)),
+        'train_r2': r2_score(y_true, y_pred),
+        'train_mae': mean_absolute_error(y_true, y_pred)
+    }
+
+
+def _check_train_metrics(mode: Optional[str]) -> str:
+    """Validate a ``train_metrics`` mode before any fitting, mapping None to 'none'."""
+    mode = 'none' if mode is None else mode
+    if mode not in TRAIN_METRICS_MODES:
+        raise ValueError(f"Unknown train_metrics: {mode}. Use any of {list(TRAIN_METRICS_MODES)} or None")
+    return mode
+
+
+def _training_metrics(model: Any, X_train: np.ndarray, y_train: np.ndarray,
+                      mode: Optional[str]) -> Dict:
+    """Training metrics from a full prediction pass, or NaN when skipped."""
+    mode = _check_train_metrics(mode)
+    if mode == 'none':
+        return {'train_rmse': np.nan, 'train_r2': np.nan, 'train_mae': np.nan}
+    return _regression_metrics(y_train, model.predict(X_train))
+
 
 def train_linear_regression(X_train: np.ndarray, y_train: np.ndarray,
+                            train_metrics: Optional[str] = 'full',
                             **kwargs) -> Tuple[Any, Dict]:
     """
     Train a linear regression model.
@@ -27,6 +69,9 @@ def train_linear_regression(X_train: np.ndarray, y_train: np.ndarray,
         Training features
     y_train : np.ndarray
         Training target
+    train_metrics : str, optional
+        'full' (default) predicts on X_train for the training metrics; None
+        or 'none' skips them (NaN). 'cheap' equals 'full' for this model.
     **kwargs
         Additional arguments for LinearRegression
     
@@ -35,20 +80,12 @@ def train_linear_regression(X_train: np.ndarray, y_train: np.ndarray,
     tuple
         (model, training_metrics)
     """
+    _check_train_metrics(train_metrics)
     model = LinearRegression(**kwargs)
     model.fit(X_train, y_train)
     
     # Training metrics
-    y_pred_train = model.predict(X_train)
-    train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-    train_r2 = r2_score(y_train, y_pred_train)
-    train_mae = mean_absolute_error(y_train, y_pred_train)
-    
-    metrics = {
-        'train_rmse': train_rmse,
-        'train_r2': train_r2,
-        'train_mae': train_mae
-    }
+    metrics = _training_metrics(model, X_train, y_train, train_metrics)
     
     return model, metrics
 
@@ -56,6 +93,7 @@ def train_linear_regression(X_train: np.ndarray, y_train: np.ndarray,
 def train_decision_tree(X_train: np.ndarray, y_train: np.ndarray,
                        max_depth: int = 10,
                        min_samples_split: int = 5,
+                       train_metrics: Optional[str] = 'full',
                        **kwargs) -> Tuple[Any, Dict]:
     """
     Train a decision tree regressor.
@@ -70,6 +108,9 @@ def train_decision_tree(X_train: np.ndarray, y_train: np.ndarray,
         Maximum depth of the tree
     min_samples_split : int
         Minimum samples required to split
+    train_metrics : str, optional
+        'full' (default) predicts on X_train for the training metrics; None
+        or 'none' skips them (NaN). 'cheap' equals 'full' for this model.
     **kwargs
         Additional arguments for DecisionTreeRegressor
     
@@ -78,6 +119,7 @@ def train_decision_tree(X_train: np.ndarray, y_train: np.ndarray,
     tuple
         (model, training_metrics)
     """
+    _check_train_metrics(train_metrics)
     model = DecisionTreeRegressor(
         max_depth=max_depth,
         min_samples_split=min_samples_split,
@@ -86,16 +128,7 @@ def train_decision_tree(X_train: np.ndarray, y_train: np.ndarray,
     )
     model.fit(X_train, y_train)
     
-    y_pred_train = model.predict(X_train)
-    train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-    train_r2 = r2_score(y_train, y_pred_train)
-    train_mae = mean_absolute_error(y_train, y_pred_train)
-    
-    metrics = {
-        'train_rmse': train_rmse,
-        'train_r2': train_r2,
-        'train_mae': train_mae
-    }
+    metrics = _training_metrics(model, X_train, y_train, train_metrics)
     
     return model, metrics
 
@@ -104,6 +137,8 @@ def train_random_forest(X_train: np.ndarray, y_train: np.ndarray,
                        n_estimators: int = 100,
                        max_depth: int = 10,
                        min_samples_split: int = 5,
+                       n_jobs: int = -1,
+                       train_metrics: Optional[str] = 'full',
                        **kwargs) -> Tuple[Any, Dict]:
     """
     Train a random forest regressor.
@@ -120,6 +155,12 @@ def train_random_forest(X_train: np.ndarray, y_train: np.ndarray,
         Maximum depth of trees
     min_samples_split : int
         Minimum samples required to split
+    n_jobs : int
+        Threads used to build the trees (default: all cores)
+    train_metrics : str, optional
+        'full' (default) predicts on X_train for the training metrics,
+        'cheap' uses the out-of-bag predictions instead (a generalization
+        estimate, needs ``bootstrap=True``), None or 'none' skips them (NaN)
     **kwargs
         Additional arguments for RandomForestRegressor
     
@@ -128,26 +169,25 @@ def train_random_forest(X_train: np.ndarray, y_train: np.ndarray,
     tuple
         (model, training_metrics)
     """
+    train_metrics = _check_train_metrics(train_metrics)
+    # 'cheap' needs the out-of-bag predictions; keep a caller's oob_score too
+    oob_score = kwargs.pop('oob_score', False) or train_metrics == 'cheap'
     model = RandomForestRegressor(
         n_estimators=n_estimators,
         max_depth=max_depth,
         min_samples_split=min_samples_split,
         random_state=42,
-        n_jobs=-1,
+        n_jobs=n_jobs,
+        oob_score=oob_score,
         **kwargs
     )
     model.fit(X_train, y_train)
     
-    y_pred_train = model.predict(X_train)
-    train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-    train_r2 = r2_score(y_train, y_pred_train)
-    train_mae = mean_absolute_error(y_train, y_pred_train)
-    
-    metrics = {
-        'train_rmse': train_rmse,
-        'train_r2': train_r2,
-        'train_mae': train_mae
-    }
+    if train_metrics == 'cheap':
+        # Out-of-bag predictions come with the fit, no second inference pass
+        metrics = _regression_metrics(y_train, model.oob_prediction_)
+    else:
+        metrics = _training_metrics(model, X_train, y_train, train_metrics)
     
     return model, metrics
 
@@ -156,6 +196,7 @@ def train_xgboost(X_train: np.ndarray, y_train: np.ndarray,
                  n_estimators: int = 100,
                  max_depth: int = 6,
                  learning_rate: float = 0.1,
+                 train_metrics: Optional[str] = 'full',
                  **kwargs) -> Tuple[Any, Dict]:
     """
     Train an XGBoost regressor.
@@ -172,6 +213,11 @@ def train_xgboost(X_train: np.ndarray, y_train: np.ndarray,
         Maximum depth of trees
     learning_rate : float
         Learning rate
+    train_metrics : str, optional
+        'full' (default) predicts on X_train for the training metrics,
+        'cheap' reads them from the last round of the training-set
+        evaluation history (adding 'rmse' and 'mae' to eval_metric),
+        None or 'none' skips them (NaN)
     **kwargs
         Additional arguments for XGBRegressor
     
@@ -185,6 +231,8 @@ def train_xgboost(X_train: np.ndarray, y_train: np.ndarray,
     ImportError
         If XGBoost is not available
     """
+    train_metrics = _check_train_metrics(train_metrics)
+    
     # Try to import XGBoost only when needed
     global XGBOOST_AVAILABLE, XGBRegressor
     
@@ -215,22 +263,80 @@ def train_xgboost(X_train: np.ndarray, y_train: np.ndarray,
         random_state=42,
         **kwargs
     )
-    model.fit(X_train, y_train)
     
-    y_pred_train = model.predict(X_train)
-    train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-    train_r2 = r2_score(y_train, y_pred_train)
-    train_mae = mean_absolute_error(y_train, y_pred_train)
-    
-    metrics = {
-        'train_rmse': train_rmse,
-        'train_r2': train_r2,
-        'train_mae': train_mae
-    }
+    eval_metric = model.get_params().get('eval_metric')
+    if train_metrics == 'cheap' and not callable(eval_metric):
+        # Boosting already tracks the training predictions; read the final
+        # round of the evaluation history instead of predicting again. The
+        # caller's metrics are kept, and stay last for early stopping.
+        if eval_metric is None:
+            eval_metric = []
+        elif isinstance(eval_metric, str):
+            eval_metric = [eval_metric]
+        missing = [name for name in ('rmse', 'mae') if name not in eval_metric]
+        model.set_params(eval_metric=missing + list(eval_metric))
+        model.fit(X_train, y_train, eval_set=[(X_train, y_train)], verbose=False)
+        history = model.evals_result()['validation_0']
+        train_rmse = history['rmse'][-1]
+        variance = np.var(y_train)
+        metrics = {
+            'train_rmse': train_rmse,
+            'train_r2': 1 - train_rmse ** 2 / variance if variance > 0 else np.nan,
+            'train_mae': history['mae'][-1]
+        }
+    else:
+        model.fit(X_train, y_train)
+        # A custom eval_metric function cannot be combined with 'rmse' and
+        # 'mae', so 'cheap' falls back to a prediction pass
+        mode = 'full' if train_metrics == 'cheap' else train_metrics
+        metrics = _training_metrics(model, X_train, y_train, mode)
     
     return model, metrics
 
 
+def segment_metrics(y_true: np.ndarray, y_pred: np.ndarray, codes: np.ndarray,
+                     n_segments: int) -> Dict[str, np.ndarray]:
+    """
+    Test metrics of every segment from one set of per-segment sums.
+    
+    The residuals are computed once and every metric is derived from
+    ``np.bincount`` sums over the segment codes, instead of one pass per
+    metric and segment.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    keep = codes >= 0
+    codes, y_true, y_pred = codes[keep], y_true[keep], y_pred[keep]
+    
+    error = y_true - y_pred
+    # Shift by the overall mean so the variance sums do not cancel
+    shift = y_true.mean() if len(y_true) else 0.0
+    centred = y_true - shift
+    
+    def total(weights: np.ndarray) -> np.ndarray:
+        return np.bincount(codes, weights=weights, minlength=n_segments)
+    
+    count = np.bincount(codes, minlength=n_segments).astype(np.float64)
+    sum_y = total(centred)
+    sum_y2 = total(centred * centred)
+    sse = total(error * error)
+    sae = total(np.abs(error))
+    sape = total(np.abs(error / (y_true + 1e-8)))
+    sum_pred = total(y_pred)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sst = sum_y2 - sum_y ** 2 / count
+        return {
+            'rmse': np.sqrt(sse / count),
+            'r2': np.where(sst > 0, 1 - sse / sst, np.nan),
+            'mae': sae / count,
+            'mape': sape / count * 100,
+            'mean_actual': sum_y / count + shift,
+            'mean_predicted': sum_pred / count,
+            'n': count.astype(np.int64),
+        }
+
+
 def evaluate_model(model: Any, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
     """
     Evaluate a trained model on test data.
@@ -250,59 +356,331 @@ def evaluate_model(model: Any, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
         Dictionary with evaluation metrics
     """
     y_pred = model.predict(X_test)
-    
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    r2 = r2_score(y_test, y_pred)
-    mae = mean_absolute_error(y_test, y_pred)
-    
-    # Calculate percentage errors
-    mape = np.mean(np.abs((y_test - y_pred) / (y_test + 1e-8))) * 100
+    segment = segment_metrics(y_test, y_pred, np.zeros(len(y_pred), dtype=np.int64), 1)
     
     metrics = {
-        'rmse': rmse,
-        'r2': r2,
-        'mae': mae,
-        'mape': mape,
-        'mean_actual': np.mean(y_test),
-        'mean_predicted': np.mean(y_pred)
+        key: float(segment[key][0])
+        for key in ('rmse', 'r2', 'mae', 'mape', 'mean_actual', 'mean_predicted')
     }
     
     return metrics
 
 
+def _stack_test_sets(test_sets: Mapping[str, Tuple[Any, Any]]) -> Tuple[Any, np.ndarray, np.ndarray]:
+    """One feature matrix, target and segment label array from named test sets."""
+    names = list(test_sets)
+    matrices = [test_sets[name][0] for name in names]
+    targets = [np.asarray(test_sets[name][1], dtype=np.float64) for name in names]
+    if any(sparse.issparse(X) for X in matrices):
+        X = sparse.vstack(matrices, format='csr')
+    else:
+        X = np.concatenate([np.asarray(X) for X in matrices])
+    labels = np.repeat(np.array(names, dtype=object), [len(y) for y in targets])
+    return X, np.concatenate(targets), labels
+
+
 def compare_models(models_dict: Dict[str, Tuple[Any, Dict]],
-                   X_test: np.ndarray, y_test: np.ndarray) -> pd.DataFrame:
+                   X_test, y_test=None, segments=None,
+                   n_jobs: int = 1) -> pd.DataFrame:
     """
     Compare multiple models on test data.
     
+    Each model predicts the test rows once; the metrics of the whole test set
+    and of every segment are then computed from those predictions in a
+    single fused pass. Models are evaluated concurrently on a thread pool,
+    which shares the test matrix instead of copying it.
+    
     Parameters
     ----------
     models_dict : dict
         Dictionary with model names as keys and (model, train_metrics) tuples as values
-    X_test : np.ndarray
-        Test features
+    X_test : np.ndarray, scipy.sparse matrix or dict
+        Test features, or ``{segment: (X, y)}`` with several test sets (e.g.
+        one per province or month) that are scored in the same pass
     y_test : np.ndarray
-        Test target
+        Test target (not used with a dict of test sets)
+    segments : array-like, optional
+        Segment label of every test row, e.g. the province or month, for a
+        model × segment metric grid
+    n_jobs : int
+        Models evaluated in parallel; -1 uses one thread per model (up to
+        the CPU count)
     
     Returns
     -------
     pd.DataFrame
-        Comparison dataframe with metrics for all models
+        Comparison dataframe with metrics for all models. With segments
+        (or a dict of test sets) there is one row per model and segment,
+        with a Segment column ('All' for the whole test set) and N_Test.
     """
+    if isinstance(X_test, Mapping):
+        X_test, y_test, segments = _stack_test_sets(X_test)
+    y_test = np.asarray(y_test, dtype=np.float64)
+    
+    overall = np.zeros(len(y_test), dtype=np.int64)
+    if segments is None:
+        codes, labels = overall, []
+    else:
+        codes, labels = pd.factorize(np.asarray(segments), sort=True)
+    
+    def evaluate(model: Any) -> Dict[str, np.ndarray]:
+        y_pred = model.predict(X_test)
+        metrics = segment_metrics(y_test, y_pred, overall, 1)
+        if segments is not None:
+            by_segment = segment_metrics(y_test, y_pred, codes, len(labels))
+            metrics = {key: np.concatenate([metrics[key], by_segment[key]]) for key in metrics}
+        return metrics
+    
+    models = [model for model, _ in models_dict.values()]
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = max(min(n_jobs, len(models)), 1)
+    if n_jobs == 1:
+        test_metrics = [evaluate(model) for model in models]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            test_metrics = list(executor.map(evaluate, models))
+    
+    segment_names = ['All'] + list(labels)
     results = []
     
-    for model_name, (model, train_metrics) in models_dict.items():
-        test_metrics = evaluate_model(model, X_test, y_test)
-        
-        results.append({
-            'Model': model_name,
-            'Train_RMSE': train_metrics['train_rmse'],
-            'Train_R2': train_metrics['train_r2'],
-            'Test_RMSE': test_metrics['rmse'],
-            'Test_R2': test_metrics['r2'],
-            'Test_MAE': test_metrics['mae'],
-            'Test_MAPE': test_metrics['mape']
-        })
+    for (model_name, (_, train_metrics)), metrics in zip(models_dict.items(), test_metrics):
+        for position in range(len(metrics['rmse'])):
+            row = {'Model': model_name}
+            if segments is not None:
+                row['Segment'] = segment_names[position]
+            row.update({
+                'Train_RMSE': train_metrics['train_rmse'],
+                'Train_R2': train_metrics['train_r2'],
+                'Test_RMSE': metrics['rmse'][position],
+                'Test_R2': metrics['r2'][position],
+                'Test_MAE': metrics['mae'][position],
+                'Test_MAPE': metrics['mape'][position]
+            })
+            if segments is not None:
+                row['N_Test'] = metrics['n'][position]
+            results.append(row)
     
     return pd.DataFrame(results)
 
+
+# Registered trainers for train_models: name -> training function
+MODEL_TRAINERS: Dict[str, Callable] = {
+    'linear_regression': train_linear_regression,
+    'decision_tree': train_decision_tree,
+    'random_forest': train_random_forest,
+    'xgboost': train_xgboost,
+}
+
+# Trainers whose model builds in parallel threads and takes ``n_jobs``
+THREADED_TRAINERS = ('random_forest', 'xgboost')
+
+# Training data, set once per process (in-process or in each pool worker)
+_SHARED: Dict[str, Any] = {}
+
+
+def _npy_file(array: np.ndarray) -> Optional[str]:
+    """The ``.npy`` file that ``array`` memory-maps in full, if any."""
+    filename = getattr(array, 'filename', None)
+    if not isinstance(array, np.memmap) or not filename or not str(filename).endswith('.npy'):
+        return None
+    on_disk = np.load(filename, mmap_mode='r')
+    if (on_disk.shape == array.shape and on_disk.dtype == array.dtype
+            and on_disk.offset == array.offset and array.flags.c_contiguous):
+        return str(filename)
+    return None
+
+
+def _share_arrays(arrays: Dict[str, np.ndarray], directory: Path) -> Dict[str, str]:
+    """``.npy`` paths for the arrays, reusing files they already memory-map."""
+    paths = {}
+    for name, array in arrays.items():
+        path = _npy_file(array)
+        if path is None:
+            path = str(directory / f"{name}.npy")
+            np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+        paths[name] = path
+    return paths
+
+
+def _init_shared(paths: Dict[str, str], shape: Optional[Tuple[int, int]]) -> None:
+    """Memory-map the shared training data in this process."""
+    arrays = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+    if shape is None:
+        X = arrays['X']
+    else:
+        X = sparse.csr_matrix((arrays['X_data'], arrays['X_indices'], arrays['X_indptr']),
+                              shape=shape, copy=False)
+    _SHARED.clear()
+    _SHARED.update({'X': X, 'y': arrays['y']})
+
+
+@contextmanager
+def shared_training_pool(X, y, n_workers: int = 1,
+                         temp_dir: Optional[Union[str, Path]] = None
+                         ) -> Iterator[Callable[[Callable, List[Tuple]], List[Any]]]:
+    """
+    Run tasks on the same training data without copying it to every task.
+    
+    Task functions read the data with ``shared_training_data()``. With more
+    than one worker the tasks run on a process pool whose workers memory-map
+    ``.npy`` copies of X and y written once (or the files X and y already
+    memory-map); with one worker they run in this process on X and y as given.
+    
+    Parameters
+    ----------
+    X : np.ndarray or scipy.sparse matrix
+        Training features
+    y : array-like
+        Training target
+    n_workers : int
+        Number of worker processes
+    temp_dir : str, optional
+        Directory for the shared arrays (default: system temp)
+    
+    Yields
+    ------
+    callable
+        ``run(func, tasks)`` returning ``[func(*task) for task in tasks]`` in
+        order; ``func`` must be a picklable module-level function
+    
+    Examples
+    --------
+    >>> with shared_training_pool(X, y, n_workers=4) as run:
+    ...     scores = run(score_depth, [(2,), (4,), (8,)])
+    """
+    y = np.asarray(y, dtype=np.float64)
+    
+    if n_workers <= 1:
+        _SHARED.clear()
+        _SHARED.update({'X': X, 'y': y})
+        try:
+            yield lambda func, tasks: [func(*task) for task in tasks]
+        finally:
+            _SHARED.clear()
+        return
+    
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+        arrays = {'X_data': X.data, 'X_indices': X.indices, 'X_indptr': X.indptr, 'y': y}
+        shape = X.shape
+    else:
+        arrays = {'X': X, 'y': y}
+        shape = None
+    
+    with tempfile.TemporaryDirectory(dir=temp_dir) as tmp:
+        paths = _share_arrays(arrays, Path(tmp))
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_shared,
+                                 initargs=(paths, shape)) as executor:
+            def run(func: Callable, tasks: List[Tuple]) -> List[Any]:
+                futures = [executor.submit(func, *task) for task in tasks]
+                return [future.result() for future in futures]
+            yield run
+
+
+def shared_training_data() -> Tuple[Any, np.ndarray]:
+    """
+    The (X, y) of the enclosing ``shared_training_pool``.
+    
+    Returns
+    -------
+    tuple
+        (X, y), memory-mapped in pool workers
+    
+    Raises
+    ------
+    RuntimeError
+        If called outside a task of ``shared_training_pool``
+    """
+    if not _SHARED:
+        raise RuntimeError("No shared training data; run the task through shared_training_pool()")
+    return _SHARED['X'], _SHARED['y']
+
+
+def _train_shared(name: str, trainer: Union[str, Callable], kwargs: Dict) -> Tuple[str, Any, Dict]:
+    """Train one model on the shared data and time it."""
+    func = MODEL_TRAINERS[trainer] if isinstance(trainer, str) else trainer
+    start = time.perf_counter()
+    X, y = shared_training_data()
+    model, metrics = func(X, y, **kwargs)
+    metrics = dict(metrics, train_time=time.perf_counter() - start)
+    return name, model, metrics
+
+
+def normalize_specs(specs) -> Dict[str, Tuple[Union[str, Callable], Dict]]:
+    """``{name: (trainer, kwargs)}`` from the accepted spec forms."""
+    if not isinstance(specs, Mapping):
+        specs = {trainer: trainer for trainer in specs}
+    normalized = {}
+    for name, spec in specs.items():
+        trainer, kwargs = spec if isinstance(spec, tuple) else (spec, {})
+        if isinstance(trainer, str) and trainer not in MODEL_TRAINERS:
+            raise ValueError(f"Unknown trainer: {trainer}. Use any of {list(MODEL_TRAINERS)}")
+        normalized[name] = (trainer, dict(kwargs))
+    return normalized
+
+
+def train_models(specs, X_train, y_train, n_jobs: int = 1,
+                 temp_dir: Optional[Union[str, Path]] = None) -> Dict[str, Tuple[Any, Dict]]:
+    """
+    Train several models on the same data, optionally concurrently.
+    
+    By default the models are trained one after the other in this process.
+    With ``n_jobs`` above 1 the training data is written once to ``.npy``
+    files (or reused when it is already a memory-mapped ``.npy`` file, e.g.
+    from the feature store) and every worker process memory-maps it, so the
+    matrix is never pickled. The ``n_jobs`` cores are split between the
+    workers and the threads of the random forest and XGBoost models to avoid
+    oversubscription.
+    
+    Parameters
+    ----------
+    specs : dict or list
+        ``{name: trainer}`` or ``{name: (trainer, kwargs)}`` where trainer is
+        a key of ``MODEL_TRAINERS`` or a picklable function with the
+        ``train_*`` signature; a list of ``MODEL_TRAINERS`` keys uses the keys
+        as names
+    X_train : np.ndarray or scipy.sparse matrix
+        Training features
+    y_train : array-like
+        Training target
+    n_jobs : int
+        Total number of cores (default: 1, sequential in this process with
+        the trainers' own thread defaults); -1 uses all of them. Worth it for
+        several models on large data, where the pool start-up and the copy to
+        disk are small next to the fits.
+    temp_dir : str, optional
+        Directory for the shared arrays (default: system temp)
+    
+    Returns
+    -------
+    dict
+        ``{name: (model, training_metrics)}`` in spec order, as expected by
+        ``compare_models``. Metrics include the fitting ``train_time``.
+    
+    Examples
+    --------
+    >>> models = train_models({
+    ...     'Linear Regression': 'linear_regression',
+    ...     'Random Forest': ('random_forest', {'n_estimators': 200}),
+    ... }, X_train, y_train, n_jobs=-1)
+    >>> compare_models(models, X_test, y_test)
+    """
+    specs = normalize_specs(specs)
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_workers = max(min(n_jobs, len(specs)), 1)
+    
+    if n_workers > 1:
+        # Split the cores between the workers and each model's threads; run
+        # sequentially, the trainers keep their own defaults
+        threads = max(n_jobs // n_workers, 1)
+        for trainer, kwargs in specs.values():
+            if trainer in THREADED_TRAINERS:
+                kwargs.setdefault('n_jobs', threads)
+    
+    tasks = [(name, trainer, kwargs) for name, (trainer, kwargs) in specs.items()]
+    with shared_training_pool(X_train, y_train, n_workers, temp_dir) as run:
+        outputs = run(_train_shared, tasks)
+    
+    return {name: (model, metrics) for name, model, metrics in outputs}
@@ -0,0 +1,539 @@
+"""Fitted, serializable preprocessing for the modeling pipeline.
+
+``InsurancePreprocessor`` learns everything the model features depend on from
+the training data: medians for numerical columns, modes and category
+vocabularies for categorical columns, and the scaler statistics of the
+encoded matrix. New batches are transformed with those stored values in one
+vectorized pass, so scoring data is encoded exactly like the training data
+and nothing is refitted.
+
+With ``sparse=True`` the one-hot block is built directly as a CSR matrix from
+the category codes. Scaling is then sparse-aware: numerical columns are
+centred and scaled, one-hot columns are only divided by their standard
+deviation, so no zero entry is ever densified.
+
+High-cardinality columns such as PostalCode and make can instead be target
+encoded: each becomes a smoothed mean of the target per category plus the
+category's frequency. Training rows receive out-of-fold target means, so a
+row's own target never leaks into its feature.
+"""
+
+import json
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import StandardScaler
+
+PREPROCESSOR_FORMAT_VERSION = 1
+
+# Columns with hundreds of levels, target encoded when requested
+HIGH_CARDINALITY_COLUMNS = ['PostalCode', 'make']
+
+
+def _json_value(value: Any) -> Any:
+    """Convert NumPy scalars to plain Python values for JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def category_vocabulary(values: pd.Series) -> List[Any]:
+    """
+    Categories of a column in ``pd.get_dummies`` order.
+
+    Parameters
+    ----------
+    values : pd.Series
+        Categorical or object column
+
+    Returns
+    -------
+    list
+        The categories of a categorical column, otherwise the sorted
+        non-missing unique values
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return [_json_value(v) for v in values.cat.categories]
+    return sorted(_json_value(v) for v in values.dropna().unique())
+
+
+def one_hot_csr(codes: Sequence[np.ndarray], sizes: Sequence[int],
+                values: Optional[Sequence[np.ndarray]] = None,
+                drop_first: bool = True) -> sparse.csr_matrix:
+    """
+    One-hot encode several columns of category codes into one CSR matrix.
+
+    Parameters
+    ----------
+    codes : sequence of np.ndarray
+        Category code per row for each column (-1 for missing or unseen)
+    sizes : sequence of int
+        Number of categories of each column
+    values : sequence of np.ndarray, optional
+        Value to store for each category of each column (default: 1)
+    drop_first : bool
+        Drop the first category of each column, as ``pd.get_dummies`` does
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Matrix with one block of ``size - drop_first`` columns per column
+    """
+    n_rows = len(codes[0]) if len(codes) else 0
+    drop = int(drop_first)
+    rows, cols, data = [], [], []
+    offset = 0
+    for position, (column_codes, size) in enumerate(zip(codes, sizes)):
+        hit = np.flatnonzero(column_codes >= drop)
+        hit_codes = column_codes[hit]
+        rows.append(hit)
+        cols.append(offset + hit_codes - drop)
+        if values is None:
+            data.append(np.ones(len(hit)))
+        else:
+            data.append(np.asarray(values[position], dtype=np.float64)[hit_codes - drop])
+        offset += size - drop
+
+    if not rows:
+        return sparse.csr_matrix((n_rows, 0))
+    return sparse.csr_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_rows, offset)
+    )
+
+
+def target_encoding(codes: np.ndarray, n_categories: int, y: np.ndarray,
+                    smoothing: float = 20.0, n_folds: int = 5,
+                    random_state: Optional[int] = 42) -> Dict[str, np.ndarray]:
+    """
+    Smoothed target means and frequencies per category, with out-of-fold values.
+
+    The smoothed mean of a category is ``(sum_y + m * prior) / (count + m)``,
+    which shrinks rare categories towards the overall mean ``prior``. All
+    per-category and per-fold sums come from ``np.bincount``.
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Category code per row (-1 for missing, which maps to the prior)
+    n_categories : int
+        Number of categories
+    y : np.ndarray
+        Target per row
+    smoothing : float
+        Prior weight ``m`` in rows
+    n_folds : int
+        Number of folds for the out-of-fold means
+    random_state : int, optional
+        Seed for the fold assignment
+
+    Returns
+    -------
+    dict
+        ``target_mean`` and ``frequency`` per category (from all rows),
+        ``prior`` and ``out_of_fold`` (the encoded value of every row computed
+        without its own fold)
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n_rows = len(y)
+    known = codes >= 0
+    prior = float(y.mean()) if n_rows else 0.0
+
+    counts = np.bincount(codes[known], minlength=n_categories).astype(np.float64)
+    sums = np.bincount(codes[known], weights=y[known], minlength=n_categories)
+    target_mean = (sums + smoothing * prior) / (counts + smoothing)
+
+    folds = np.random.default_rng(random_state).permutation(n_rows) % n_folds
+    cells = folds * n_categories + np.where(known, codes, 0)
+    fold_counts = np.bincount(cells[known], minlength=n_folds * n_categories)
+    fold_sums = np.bincount(cells[known], weights=y[known], minlength=n_folds * n_categories)
+    fold_counts = fold_counts.reshape(n_folds, n_categories)
+    fold_sums = fold_sums.reshape(n_folds, n_categories)
+
+    fold_rows = np.bincount(folds, minlength=n_folds)
+    fold_y = np.bincount(folds, weights=y, minlength=n_folds)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fold_prior = np.where(fold_rows < n_rows, (y.sum() - fold_y) / (n_rows - fold_rows), prior)
+    oof_means = ((sums - fold_sums) + smoothing * fold_prior[:, None]) / \
+        ((counts - fold_counts) + smoothing)
+
+    out_of_fold = np.where(known, oof_means[folds, np.where(known, codes, 0)], fold_prior[folds])
+    return {
+        'target_mean': target_mean,
+        'frequency': counts / max(n_rows, 1),
+        'prior': prior,
+        'out_of_fold': out_of_fold,
+    }
+
+
+class InsurancePreprocessor:
+    """
+    Impute, one-hot encode and scale insurance features.
+
+    Numerical columns are filled with their training median (0 when a column
+    has no values). Categorical columns are filled with their training mode
+    ('Unknown' when there is none) and one-hot encoded against the training
+    vocabulary, dropping the first category as ``pd.get_dummies(...,
+    drop_first=True)`` does. Categories not seen during fitting encode as the
+    dropped baseline. Columns listed in ``target_encoded`` are replaced by a
+    smoothed target mean and a frequency feature (see ``target_encoding``).
+    Other columns are passed through unchanged.
+
+    Parameters
+    ----------
+    scale : bool
+        Standardize the encoded features (default: True)
+    sparse : bool
+        Return CSR matrices instead of dense arrays (default: False)
+    target_encoded : sequence of str
+        Categorical columns to target/frequency encode instead of one-hot
+        encoding, e.g. ``HIGH_CARDINALITY_COLUMNS``. Fitting then needs ``y``.
+    smoothing : float
+        Prior weight of the target encoding, in rows
+    n_folds : int
+        Folds for the out-of-fold target means of the training rows
+    random_state : int, optional
+        Seed for the fold assignment
+    """
+
+    def __init__(self, scale: bool = True, sparse: bool = False,
+                 target_encoded: Sequence[str] = (), smoothing: float = 20.0,
+                 n_folds: int = 5, random_state: Optional[int] = 42):
+        self.scale = scale
+        self.sparse = sparse
+        self.target_encoded = list(target_encoded)
+        self.smoothing = smoothing
+        self.n_folds = n_folds
+        self.random_state = random_state
+        self.fitted_ = False
+
+    def fit(self, X: pd.DataFrame, y=None) -> 'InsurancePreprocessor':
+        """
+        Learn imputation values, vocabularies and scaler statistics.
+
+        Parameters
+        ----------
+        X : pd.DataFrame
+            Training features
+        y : array-like, optional
+            Training target, required when ``target_encoded`` is set
+
+        Returns
+        -------
+        InsurancePreprocessor
+            self
+        """
+        self._fit(X, y)
+        return self
+
+    def _fit(self, X: pd.DataFrame, y=None) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Learn the fitted values and return the training columns."""
+        self.columns_ = list(X.columns)
+        self.target_cols_ = [col for col in self.target_encoded if col in self.columns_]
+        if self.target_cols_ and y is None:
+            raise ValueError("Target encoding needs y: call fit(X, y)")
+        self.numerical_cols_ = [
+            col for col in X.select_dtypes(include=[np.number]).columns
+            if col not in self.target_cols_
+        ]
+        self.categorical_cols_ = [
+            col for col in X.select_dtypes(include=['object', 'category']).columns
+            if col not in self.target_cols_
+        ]
+        self.passthrough_cols_ = [
+            col for col in self.columns_
+            if col not in self.numerical_cols_ and col not in self.categorical_cols_
+            and col not in self.target_cols_
+        ]
+
+        # Medians of the whole numerical block and modes from category counts
+        numeric = X[self.numerical_cols_].to_numpy(dtype=np.float64, na_value=np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            medians = np.nanmedian(numeric, axis=0) if len(numeric) else np.full(numeric.shape[1], np.nan)
+        self.medians_: Dict[str, float] = {
+            col: 0.0 if np.isnan(median) else float(median)
+            for col, median in zip(self.numerical_cols_, medians)
+        }
+
+        self.modes_: Dict[str, Any] = {}
+        self.vocabularies_: Dict[str, List[Any]] = {}
+        for col in self.categorical_cols_:
+            vocabulary = category_vocabulary(X[col])
+            codes = pd.Categorical(X[col], categories=vocabulary).codes
+            counts = np.bincount(codes[codes >= 0], minlength=len(vocabulary))
+            # Ties go to the first category, as with Series.mode()
+            fill = vocabulary[int(counts.argmax())] if counts.any() else 'Unknown'
+            if fill not in vocabulary:
+                vocabulary.append(fill)
+            self.modes_[col] = fill
+            self.vocabularies_[col] = vocabulary
+
+        self.target_encodings_: Dict[str, Dict[str, Any]] = {}
+        out_of_fold = {}
+        for col in self.target_cols_:
+            vocabulary = category_vocabulary(X[col])
+            codes = pd.Categorical(X[col], categories=vocabulary).codes
+            encoding = target_encoding(codes, len(vocabulary), np.asarray(y),
+                                       self.smoothing, self.n_folds, self.random_state)
+            self.target_encodings_[col] = {
+                'vocabulary': vocabulary,
+                'target_mean': encoding['target_mean'].tolist(),
+                'frequency': encoding['frequency'].tolist(),
+                'prior': encoding['prior'],
+            }
+            out_of_fold[col] = encoding['out_of_fold']
+
+        self.feature_names_ = (
+            self._dense_columns()
+            + [f"{col}_{value}" for col in self.categorical_cols_
+               for value in self.vocabularies_[col][1:]]
+        )
+
+        self.fitted_ = True
+        dense, codes = self._columns(X)
+        # Training rows get out-of-fold target means instead of the full-data ones
+        dense_names = self._dense_columns()
+        for col, values in out_of_fold.items():
+            dense[:, dense_names.index(f"{col}_target_mean")] = values
+        self.scaler_ = self._fit_scaler(dense, codes) if self.scale else None
+        return dense, codes
+
+    def _dense_columns(self) -> List[str]:
+        """Numerical and passthrough columns in input order, then target encodings."""
+        base = [col for col in self.columns_
+                if col not in self.categorical_cols_ and col not in self.target_cols_]
+        encoded = [f"{col}_{kind}" for col in self.target_cols_
+                   for kind in ('target_mean', 'frequency')]
+        return base + encoded
+
+    def _check_fitted(self) -> None:
+        """Raise if ``fit`` has not been called."""
+        if not self.fitted_:
+            raise ValueError("InsurancePreprocessor is not fitted yet. Call fit() first.")
+
+    def _columns(self, X: pd.DataFrame) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Imputed dense block and category codes of every categorical column."""
+        missing = [col for col in self.columns_ if col not in X.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+
+        dense_cols = self._dense_columns()
+        dense = np.empty((len(X), len(dense_cols)), dtype=np.float64)
+        n_base = len(dense_cols) - 2 * len(self.target_cols_)
+        base_cols = dense_cols[:n_base]
+        # One imputation over the whole numerical block; passthrough columns keep NaN
+        fill = np.array([self.medians_.get(col, np.nan) for col in base_cols])
+        block = X[base_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        dense[:, :n_base] = np.where(np.isnan(block), fill, block)
+
+        for position, col in enumerate(self.target_cols_):
+            encoding = self.target_encodings_[col]
+            column_codes = pd.Categorical(X[col], categories=encoding['vocabulary']).codes
+            # Missing and unseen categories (code -1) get the prior and zero frequency
+            target_mean = np.append(encoding['target_mean'], encoding['prior'])
+            frequency = np.append(encoding['frequency'], 0.0)
+            dense[:, n_base + 2 * position] = target_mean[column_codes]
+            dense[:, n_base + 2 * position + 1] = frequency[column_codes]
+
+        if not self.categorical_cols_:
+            return dense, []
+        codes = np.column_stack([
+            pd.Categorical(X[col], categories=self.vocabularies_[col]).codes
+            for col in self.categorical_cols_
+        ]).astype(np.int64)
+        # Missing values take the training mode; unseen values stay -1
+        mode_codes = np.array([self.vocabularies_[col].index(self.modes_[col])
+                               for col in self.categorical_cols_])
+        codes = np.where(X[self.categorical_cols_].isna().to_numpy(), mode_codes, codes)
+        return dense, list(codes.T)
+
+    def _fit_scaler(self, dense: np.ndarray, codes: List[np.ndarray]) -> StandardScaler:
+        """Scaler statistics from the dense block and one-hot category counts."""
+        n_rows = max(len(dense), 1)
+        means = [dense.mean(axis=0)] if len(dense) else [np.zeros(dense.shape[1])]
+        variances = [dense.var(axis=0)] if len(dense) else [np.zeros(dense.shape[1])]
+        for col, column_codes in zip(self.categorical_cols_, codes):
+            size = len(self.vocabularies_[col])
+            share = np.bincount(column_codes[column_codes >= 0], minlength=size)[1:] / n_rows
+            means.append(share)
+            variances.append(share * (1 - share))
+
+        scaler = StandardScaler(with_mean=not self.sparse)
+        scaler.mean_ = np.concatenate(means)
+        scaler.var_ = np.concatenate(variances)
+        scale = np.sqrt(scaler.var_)
+        scaler.scale_ = np.where(scale < 10 * np.finfo(np.float64).eps, 1.0, scale)
+        scaler.n_features_in_ = len(self.feature_names_)
+        scaler.n_samples_seen_ = len(dense)
+        return scaler
+
+    def _output(self, dense: np.ndarray, codes: List[np.ndarray]
+                ) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Scale the columns and assemble the dense or CSR feature matrix."""
+        n_dense = dense.shape[1]
+        sizes = [len(self.vocabularies_[col]) for col in self.categorical_cols_]
+        if self.scaler_ is not None:
+            dense -= self.scaler_.mean_[:n_dense]
+            dense /= self.scaler_.scale_[:n_dense]
+            one_hot_mean = self.scaler_.mean_[n_dense:]
+            one_hot_scale = self.scaler_.scale_[n_dense:]
+        else:
+            one_hot_mean = np.zeros(len(self.feature_names_) - n_dense)
+            one_hot_scale = np.ones(len(self.feature_names_) - n_dense)
+
+        bounds = np.cumsum([0] + [size - 1 for size in sizes])
+        if self.sparse:
+            # One-hot columns are scaled but not centred, so zeros stay zero
+            values = [1.0 / one_hot_scale[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+            one_hot = one_hot_csr(codes, sizes, values)
+            return sparse.hstack([sparse.csr_matrix(dense), one_hot], format='csr')
+
+        out = np.empty((len(dense), len(self.feature_names_)), dtype=np.float64)
+        out[:, :n_dense] = dense
+        # Every one-hot column starts at its "absent" value, then hits are set
+        out[:, n_dense:] = -one_hot_mean / one_hot_scale
+        present = (1 - one_hot_mean) / one_hot_scale
+        for start, column_codes in zip(bounds[:-1], codes):
+            hit = np.flatnonzero(column_codes >= 1)
+            feature = start + column_codes[hit] - 1
+            out[hit, n_dense + feature] = present[feature]
+        return out
+
+    def transform(self, X: pd.DataFrame) -> Union[np.ndarray, sparse.csr_matrix]:
+        """
+        Transform a batch with the fitted values.
+
+        Parameters
+        ----------
+        X : pd.DataFrame
+            Features with (at least) the columns seen during fitting
+
+        Returns
+        -------
+        np.ndarray or scipy.sparse.csr_matrix
+            Encoded (and scaled) matrix with columns ``feature_names_``
+        """
+        self._check_fitted()
+        return self._output(*self._columns(X))
+
+    def fit_transform(self, X: pd.DataFrame, y=None) -> Union[np.ndarray, sparse.csr_matrix]:
+        """
+        Fit on ``X`` and return its transformed matrix (encoded only once).
+
+        Target-encoded columns hold out-of-fold means here, while ``transform``
+        uses the means learned from all training rows.
+        """
+        return self._output(*self._fit(X, y))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-serializable state of the fitted preprocessor.
+
+        Returns
+        -------
+        dict
+            Columns, imputation values, vocabularies and scaler statistics
+        """
+        self._check_fitted()
+        state = {
+            'format_version': PREPROCESSOR_FORMAT_VERSION,
+            'scale': self.scale,
+            'sparse': self.sparse,
+            'target_encoded': self.target_encoded,
+            'smoothing': self.smoothing,
+            'n_folds': self.n_folds,
+            'random_state': self.random_state,
+            'columns': self.columns_,
+            'numerical_cols': self.numerical_cols_,
+            'categorical_cols': self.categorical_cols_,
+            'passthrough_cols': self.passthrough_cols_,
+            'medians': self.medians_,
+            'modes': self.modes_,
+            'vocabularies': self.vocabularies_,
+            'target_cols': self.target_cols_,
+            'target_encodings': self.target_encodings_,
+            'feature_names': self.feature_names_,
+            'scaler': None,
+        }
+        if self.scaler_ is not None:
+            state['scaler'] = {
+                'mean': self.scaler_.mean_.tolist(),
+                'scale': self.scaler_.scale_.tolist(),
+                'var': self.scaler_.var_.tolist(),
+                'n_samples_seen': int(np.max(self.scaler_.n_samples_seen_)),
+            }
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'InsurancePreprocessor':
+        """
+        Rebuild a fitted preprocessor from ``to_dict`` output.
+
+        Parameters
+        ----------
+        state : dict
+            Serialized state
+
+        Returns
+        -------
+        InsurancePreprocessor
+            Fitted preprocessor
+        """
+        if state.get('format_version') != PREPROCESSOR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported preprocessor format: {state.get('format_version')}")
+
+        preprocessor = cls(scale=state['scale'], sparse=state.get('sparse', False),
+                           target_encoded=state.get('target_encoded', ()),
+                           smoothing=state.get('smoothing', 20.0),
+                           n_folds=state.get('n_folds', 5),
+                           random_state=state.get('random_state', 42))
+        preprocessor.columns_ = list(state['columns'])
+        preprocessor.numerical_cols_ = list(state['numerical_cols'])
+        preprocessor.categorical_cols_ = list(state['categorical_cols'])
+        preprocessor.passthrough_cols_ = list(state['passthrough_cols'])
+        preprocessor.medians_ = dict(state['medians'])
+        preprocessor.modes_ = dict(state['modes'])
+        preprocessor.vocabularies_ = {col: list(v) for col, v in state['vocabularies'].items()}
+        preprocessor.target_cols_ = list(state.get('target_cols', []))
+        preprocessor.target_encodings_ = dict(state.get('target_encodings', {}))
+        preprocessor.feature_names_ = list(state['feature_names'])
+
+        preprocessor.scaler_ = None
+        if state['scaler'] is not None:
+            scaler = StandardScaler(with_mean=not preprocessor.sparse)
+            scaler.mean_ = np.asarray(state['scaler']['mean'])
+            scaler.scale_ = np.asarray(state['scaler']['scale'])
+            scaler.var_ = np.asarray(state['scaler']['var'])
+            scaler.n_features_in_ = len(preprocessor.feature_names_)
+            scaler.n_samples_seen_ = state['scaler']['n_samples_seen']
+            preprocessor.scaler_ = scaler
+
+        preprocessor.fitted_ = True
+        return preprocessor
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Write the fitted state to a JSON file.
+
+        Parameters
+        ----------
+        path : str or Path
+            Output file
+
+        Returns
+        -------
+        Path
+            The written file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'InsurancePreprocessor':
+        """Read a preprocessor written by ``save``."""
+        return cls.from_dict(json.loads(Path(path).read_text()))
@@ -0,0 +1,194 @@
+"""Frequency–severity (two-part) model of the risk-based pure premium.
+
+The expected claim cost of a policy is split into the probability of a claim
+and the expected claim amount given a claim::
+
+    pure premium = P(claim) * E[TotalClaims | claim]
+
+``FrequencySeverityModel`` fits one ``InsurancePreprocessor`` on all training
+policies and uses the same encoded features for both stages: a classifier for
+``HasClaim`` (as defined by ``create_claim_probability_feature``) on every
+policy, and a severity regressor on the policies with claims.
+``predict_pure_premium`` scores in fixed-size batches, encoding each batch
+once for both stages and writing into one preallocated array.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from src.modeling.data_preparation import SEVERITY_FEATURES, resolve_feature_columns
+from src.modeling.models import MODEL_TRAINERS
+from src.modeling.preprocessing import InsurancePreprocessor
+
+
+def _xgboost_classifier(**params) -> Any:
+    """XGBClassifier, imported only when needed."""
+    try:
+        from xgboost import XGBClassifier
+    except Exception as e:
+        raise ImportError(
+            f"XGBoost is not available: {e}\n"
+            "Please install it with: pip install xgboost"
+        ) from e
+    return XGBClassifier(**{'n_estimators': 100, 'max_depth': 6, 'learning_rate': 0.1,
+                            'random_state': 42, **params})
+
+
+# Claim classifiers: name -> factory taking the estimator parameters
+CLAIM_CLASSIFIERS = {
+    'logistic_regression': lambda **params: LogisticRegression(**{'max_iter': 1000, **params}),
+    'random_forest': lambda **params: RandomForestClassifier(
+        **{'n_estimators': 100, 'max_depth': 10, 'min_samples_leaf': 20,
+           'random_state': 42, 'n_jobs': -1, **params}),
+    'xgboost': _xgboost_classifier,
+}
+
+
+class FrequencySeverityModel:
+    """
+    Two-part model: claim probability times expected claim severity.
+
+    Parameters
+    ----------
+    classifier : str
+        Claim classifier from ``CLAIM_CLASSIFIERS`` (default: 'xgboost')
+    regressor : str
+        Severity trainer from ``MODEL_TRAINERS`` (default: 'xgboost')
+    features : sequence of str, optional
+        Canonical feature names (default: ``SEVERITY_FEATURES``)
+    claims_col : str
+        Claim amount column (default: 'TotalClaims')
+    sparse : bool
+        Encode features as CSR matrices
+    classifier_params : dict, optional
+        Parameters for the classifier
+    regressor_params : dict, optional
+        Parameters for the severity trainer
+
+    Examples
+    --------
+    >>> model = FrequencySeverityModel().fit(train_df)
+    >>> portfolio['PurePremium'] = model.predict_pure_premium(portfolio)
+    """
+
+    def __init__(self, classifier: str = 'xgboost', regressor: str = 'xgboost',
+                 features: Optional[Sequence[str]] = None,
+                 claims_col: str = 'TotalClaims', sparse: bool = False,
+                 classifier_params: Optional[Dict] = None,
+                 regressor_params: Optional[Dict] = None):
+        if classifier not in CLAIM_CLASSIFIERS:
+            raise ValueError(f"Unknown classifier: {classifier}. Use any of {list(CLAIM_CLASSIFIERS)}")
+        if regressor not in MODEL_TRAINERS:
+            raise ValueError(f"Unknown regressor: {regressor}. Use any of {list(MODEL_TRAINERS)}")
+        self.classifier = classifier
+        self.regressor = regressor
+        self.features = list(SEVERITY_FEATURES if features is None else features)
+        self.claims_col = claims_col
+        self.sparse = sparse
+        self.classifier_params = dict(classifier_params or {})
+        self.regressor_params = dict(regressor_params or {})
+        self.fitted_ = False
+
+    def fit(self, df: pd.DataFrame) -> 'FrequencySeverityModel':
+        """
+        Fit the shared preprocessor, the claim classifier and the severity model.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Training policies with the feature columns and the claims column
+
+        Returns
+        -------
+        FrequencySeverityModel
+            self
+        """
+        claims = df[self.claims_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(claims)
+        df, claims = df[valid], claims[valid]
+        has_claim = (claims > 0).astype(int)
+        if has_claim.sum() == 0 or has_claim.all():
+            raise ValueError("Training data needs policies with and without claims")
+
+        self.feature_cols_ = list(resolve_feature_columns(df.columns, self.features).values())
+        if not self.feature_cols_:
+            raise ValueError(f"No feature columns found. Available columns: {list(df.columns)[:10]}")
+
+        self.preprocessor_ = InsurancePreprocessor(sparse=self.sparse)
+        X = self.preprocessor_.fit_transform(df[self.feature_cols_])
+
+        self.classifier_ = CLAIM_CLASSIFIERS[self.classifier](**self.classifier_params)
+        self.classifier_.fit(X, has_claim)
+
+        claimed = np.flatnonzero(has_claim)
+        self.regressor_, _ = MODEL_TRAINERS[self.regressor](
+            X[claimed], claims[claimed], train_metrics=None, **self.regressor_params
+        )
+
+        self.claim_rate_ = float(has_claim.mean())
+        self.mean_severity_ = float(claims[claimed].mean())
+        self.fitted_ = True
+        return self
+
+    def _check_fitted(self) -> None:
+        """Raise if ``fit`` has not been called."""
+        if not self.fitted_:
+            raise ValueError("FrequencySeverityModel is not fitted yet. Call fit() first.")
+
+    def predict_components(self, df: pd.DataFrame, batch_size: int = 250_000) -> pd.DataFrame:
+        """
+        Claim probability, expected severity and pure premium per policy.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Policies to score (at least the feature columns seen during fit)
+        batch_size : int
+            Policies encoded and scored per batch
+
+        Returns
+        -------
+        pd.DataFrame
+            ClaimProbability, ExpectedSeverity and PurePremium, indexed like ``df``
+        """
+        self._check_fitted()
+        n_rows = len(df)
+        probability = np.empty(n_rows)
+        severity = np.empty(n_rows)
+        features = df[self.feature_cols_]
+
+        for start in range(0, n_rows, batch_size):
+            stop = min(start + batch_size, n_rows)
+            X = self.preprocessor_.transform(features.iloc[start:stop])
+            probability[start:stop] = self.classifier_.predict_proba(X)[:, 1]
+            severity[start:stop] = self.regressor_.predict(X)
+
+        # Least-squares severity models can predict below zero
+        np.maximum(severity, 0, out=severity)
+        return pd.DataFrame({
+            'ClaimProbability': probability,
+            'ExpectedSeverity': severity,
+            'PurePremium': probability * severity,
+        }, index=df.index)
+
+    def predict_pure_premium(self, df: pd.DataFrame, batch_size: int = 250_000) -> np.ndarray:
+        """
+        Risk-based pure premium ``P(claim) * E[claim | claim]`` per policy.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Policies to score
+        batch_size : int
+            Policies encoded and scored per batch
+
+        Returns
+        -------
+        np.ndarray
+            Pure premium per row of ``df``
+        """
+        return self.predict_components(df, batch_size)['PurePremium'].to_numpy()
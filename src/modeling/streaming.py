@@ -0,0 +1,288 @@
+"""Out-of-core premium training on chunked portfolio data.
+
+``train_premium_out_of_core`` never holds the encoded portfolio in memory.
+It reads the data as a stream of chunks (``load_insurance_data(...,
+chunksize=...)``) and works in passes over that stream:
+
+1. A uniform random sample of at most ``sample_rows`` rows is kept while
+   scanning, and the ``InsurancePreprocessor`` is fitted on it.
+2. Every chunk is encoded with the fitted preprocessor and either fed to an
+   ``SGDRegressor.partial_fit`` or handed to XGBoost through a ``DataIter``
+   that builds an external-memory quantile matrix on disk.
+3. A final pass accumulates train and test metrics from running sums.
+
+The train/test assignment of each row is drawn from a generator seeded with
+``(random_state, chunk number)``, so every pass sees the same split. Peak
+memory is bounded by ``sample_rows`` plus one encoded chunk, whatever the
+number of rows.
+"""
+
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDRegressor
+
+from src.data.load_data import concat_chunks, load_insurance_data
+from src.modeling.data_preparation import PREMIUM_FEATURES, resolve_feature_columns
+from src.modeling.preprocessing import InsurancePreprocessor
+
+ChunkSource = Callable[[], Iterable[pd.DataFrame]]
+
+STREAMING_MODELS = ('sgd', 'xgboost')
+
+
+def chunk_source(file_path: Optional[Union[str, Path]] = None, chunksize: int = 200_000,
+                 **load_kwargs) -> ChunkSource:
+    """
+    Re-iterable chunk stream over an insurance data file.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Data file (default: the file found in RAW_DATA_DIR)
+    chunksize : int
+        Rows per chunk
+    **load_kwargs
+        Further arguments for ``load_insurance_data`` (columns, filters,
+        use_cache, cache_dir)
+
+    Returns
+    -------
+    callable
+        Function returning a fresh chunk iterator on every call, one per pass
+    """
+    def chunks() -> Iterator[pd.DataFrame]:
+        return load_insurance_data(file_path, chunksize=chunksize, **load_kwargs)
+    return chunks
+
+
+def _prepared_chunks(chunks: ChunkSource, target_col: str
+                     ) -> Iterator[Tuple[int, pd.DataFrame, np.ndarray]]:
+    """Yield (chunk number, feature frame, target) with invalid targets removed."""
+    for number, chunk in enumerate(chunks()):
+        y = chunk[target_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Same row filter as prepare_premium_prediction_data
+        valid = ~np.isnan(y) & (y >= 0)
+        features = list(resolve_feature_columns(chunk.columns, PREMIUM_FEATURES).values())
+        yield number, chunk.loc[valid, features], y[valid]
+
+
+def _test_mask(number: int, n_rows: int, test_size: float, random_state: int) -> np.ndarray:
+    """Deterministic test-row mask of one chunk."""
+    return np.random.default_rng([random_state, number]).random(n_rows) < test_size
+
+
+def sample_stream(chunks: ChunkSource, target_col: str = 'TotalPremium',
+                  sample_rows: int = 200_000, random_state: int = 42,
+                  test_size: float = 0.0) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Uniform random sample of the rows of a chunk stream in one pass.
+
+    Every row gets a random key and the ``sample_rows`` rows with the smallest
+    keys are kept after each chunk, so memory stays bounded by the sample and
+    one chunk.
+
+    Parameters
+    ----------
+    chunks : callable
+        Chunk source, e.g. from ``chunk_source``
+    target_col : str
+        Target column
+    sample_rows : int
+        Maximum number of sampled rows
+    random_state : int
+        Seed of the sampling keys and the train/test split
+    test_size : float
+        Share of held-out test rows, which are never sampled
+
+    Returns
+    -------
+    tuple
+        (features, target) of the sampled rows in stream order
+    """
+    rng = np.random.default_rng(random_state)
+    sample, target, keys = None, None, None
+    for number, X, y in _prepared_chunks(chunks, target_col):
+        train = ~_test_mask(number, len(y), test_size, random_state)
+        X, y = X[train], y[train]
+        chunk_keys = rng.random(len(y))
+        if sample is None:
+            sample, target, keys = X.reset_index(drop=True), y, chunk_keys
+        else:
+            sample = concat_chunks([sample, X.reset_index(drop=True)])
+            target = np.concatenate([target, y])
+            keys = np.concatenate([keys, chunk_keys])
+        if len(keys) > sample_rows:
+            keep = np.sort(np.argpartition(keys, sample_rows)[:sample_rows])
+            sample = sample.iloc[keep].reset_index(drop=True)
+            target, keys = target[keep], keys[keep]
+
+    if sample is None:
+        raise ValueError("The chunk stream has no training rows with a valid target")
+    return sample, target
+
+
+class _Metrics:
+    """Running sums for RMSE, R² and MAE over streamed predictions."""
+
+    def __init__(self):
+        self.sums = np.zeros(5)
+
+    def update(self, y: np.ndarray, y_pred: np.ndarray) -> None:
+        error = y - y_pred
+        self.sums += [len(y), y.sum(), np.dot(y, y), np.dot(error, error), np.abs(error).sum()]
+
+    def result(self, prefix: str) -> Dict[str, float]:
+        n, total, total_sq, sse, sae = self.sums
+        if n == 0:
+            return {f'{prefix}_rmse': np.nan, f'{prefix}_r2': np.nan, f'{prefix}_mae': np.nan}
+        sst = total_sq - total ** 2 / n
+        return {
+            f'{prefix}_rmse': float(np.sqrt(sse / n)),
+            f'{prefix}_r2': float(1 - sse / sst) if sst > 0 else np.nan,
+            f'{prefix}_mae': float(sae / n),
+        }
+
+
+def _predict(model: Any, X) -> np.ndarray:
+    """Predictions of a scikit-learn model or an XGBoost booster."""
+    if hasattr(model, 'inplace_predict'):
+        return model.inplace_predict(X)
+    return model.predict(X)
+
+
+def _import_xgboost():
+    """Import XGBoost, with the install hint used by ``train_xgboost``."""
+    try:
+        import xgboost
+    except Exception as e:
+        raise ImportError(
+            f"XGBoost is not available: {e}\n"
+            "Please install it with: pip install xgboost"
+        ) from e
+    return xgboost
+
+
+def _train_xgboost(chunks: ChunkSource, preprocessor: InsurancePreprocessor,
+                   target_col: str, test_size: float, random_state: int,
+                   n_estimators: int, max_depth: int, learning_rate: float,
+                   cache_dir: Optional[Union[str, Path]], **params) -> Any:
+    """Boost on an external-memory quantile matrix fed chunk by chunk."""
+    xgb = _import_xgboost()
+
+    class ChunkIter(xgb.DataIter):
+        """Encoded training rows of one chunk per ``next`` call."""
+
+        def __init__(self, cache_prefix: str):
+            self._batches = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def reset(self) -> None:
+            self._batches = None
+
+        def next(self, input_data: Callable) -> bool:
+            if self._batches is None:
+                self._batches = _prepared_chunks(chunks, target_col)
+            for number, X, y in self._batches:
+                train = ~_test_mask(number, len(y), test_size, random_state)
+                if train.any():
+                    input_data(data=preprocessor.transform(X[train]), label=y[train])
+                    return True
+            return False
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        iterator = ChunkIter(cache_prefix=str(Path(tmp) / 'premium'))
+        if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+            dtrain = xgb.ExtMemQuantileDMatrix(iterator)
+        else:
+            dtrain = xgb.DMatrix(iterator)
+        params = {'max_depth': max_depth, 'learning_rate': learning_rate,
+                  'seed': random_state, 'tree_method': 'hist', **params}
+        booster = xgb.train(params, dtrain, num_boost_round=n_estimators)
+        # Release the matrix while its page cache still exists
+        del dtrain
+    return booster
+
+
+def train_premium_out_of_core(chunks: ChunkSource, model: str = 'sgd',
+                              target_col: str = 'TotalPremium',
+                              test_size: float = 0.2,
+                              random_state: int = 42,
+                              sample_rows: int = 200_000,
+                              sparse: bool = False,
+                              n_epochs: int = 1,
+                              n_estimators: int = 100,
+                              max_depth: int = 6,
+                              learning_rate: float = 0.1,
+                              cache_dir: Optional[Union[str, Path]] = None,
+                              **model_kwargs) -> Tuple[Any, Dict, InsurancePreprocessor]:
+    """
+    Train a premium model without loading the encoded portfolio in memory.
+
+    Parameters
+    ----------
+    chunks : callable
+        Function returning a fresh iterator of raw data chunks per call, e.g.
+        ``chunk_source(file_path, chunksize=200_000)``
+    model : str
+        'sgd' for an ``SGDRegressor`` trained with ``partial_fit``, or
+        'xgboost' for a booster trained on an external-memory matrix
+    target_col : str
+        Target column name (default: 'TotalPremium')
+    test_size : float
+        Share of rows held out for the test metrics
+    random_state : int
+        Seed of the sample, the split and the model
+    sample_rows : int
+        Rows used to fit the preprocessor. Categories that do not occur in
+        the sample encode as the baseline category.
+    sparse : bool
+        Encode chunks as CSR matrices (default: False)
+    n_epochs : int
+        Passes over the stream for 'sgd'
+    n_estimators, max_depth, learning_rate
+        Boosting settings for 'xgboost', as in ``train_xgboost``
+    cache_dir : str, optional
+        Directory for the temporary XGBoost page cache (default: system temp)
+    **model_kwargs
+        Additional arguments for SGDRegressor or XGBoost training parameters
+
+    Returns
+    -------
+    tuple
+        (model, metrics, preprocessor) with train_/test_ rmse, r2 and mae
+        plus n_train and n_test in ``metrics``. An XGBoost model is returned
+        as a ``Booster``.
+    """
+    if model not in STREAMING_MODELS:
+        raise ValueError(f"Unknown model: {model}. Use any of {list(STREAMING_MODELS)}")
+
+    X_sample, _ = sample_stream(chunks, target_col, sample_rows, random_state, test_size)
+    preprocessor = InsurancePreprocessor(sparse=sparse).fit(X_sample)
+    del X_sample
+
+    if model == 'sgd':
+        estimator = SGDRegressor(random_state=random_state, **model_kwargs)
+        for _ in range(n_epochs):
+            for number, X, y in _prepared_chunks(chunks, target_col):
+                train = ~_test_mask(number, len(y), test_size, random_state)
+                if train.any():
+                    estimator.partial_fit(preprocessor.transform(X[train]), y[train])
+    else:
+        estimator = _train_xgboost(chunks, preprocessor, target_col, test_size, random_state,
+                                   n_estimators, max_depth, learning_rate, cache_dir,
+                                   **model_kwargs)
+
+    train_metrics, test_metrics = _Metrics(), _Metrics()
+    for number, X, y in _prepared_chunks(chunks, target_col):
+        test = _test_mask(number, len(y), test_size, random_state)
+        y_pred = _predict(estimator, preprocessor.transform(X))
+        train_metrics.update(y[~test], y_pred[~test])
+        test_metrics.update(y[test], y_pred[test])
+
+    metrics = {**train_metrics.result('train'), **test_metrics.result('test'),
+               'n_train': int(train_metrics.sums[0]), 'n_test': int(test_metrics.sums[0])}
+    return estimator, metrics, preprocessor
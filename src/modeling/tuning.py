@@ -0,0 +1,253 @@
+"""Successive-halving and Hyperband search over the tree-model trainers.
+
+Instead of fitting every configuration of a grid on all rows, successive
+halving evaluates many sampled configurations on a small budget, keeps the
+best ``1 / eta`` of them and repeats with ``eta`` times the budget until the
+survivors are fitted on the full budget. The budget of a rung is a share of
+the training rows (nested subsamples of one fixed permutation) and, for
+XGBoost, the same share of the boosting rounds. Hyperband runs several such
+brackets that trade the number of configurations against their starting
+budget.
+
+All candidates of a rung are trained in parallel through
+``models.shared_training_pool``: the feature matrix is written once and
+every worker memory-maps it, then slices out its subsample. Candidates are scored by the
+RMSE on a held-out validation split, and training-set predictions are
+skipped (``train_metrics=None``).
+"""
+
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.model_selection import ParameterSampler
+
+from src.modeling.models import (
+    MODEL_TRAINERS,
+    THREADED_TRAINERS,
+    shared_training_data,
+    shared_training_pool
+)
+
+# Default search spaces: parameter -> candidate values
+SEARCH_SPACES: Dict[str, Dict[str, List[Any]]] = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200, 300],
+        'max_depth': [6, 10, 14, 20, None],
+        'min_samples_split': [2, 5, 10, 20, 50],
+        'max_features': [0.33, 0.5, 0.75, 1.0],
+    },
+    'xgboost': {
+        'max_depth': [3, 4, 6, 8, 10],
+        'learning_rate': [0.03, 0.05, 0.1, 0.2, 0.3],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.5, 0.75, 1.0],
+        'min_child_weight': [1, 5, 20, 50],
+    },
+}
+
+# Trainers whose boosting rounds grow with the rung budget
+_ROUND_BUDGET_TRAINERS = ('xgboost',)
+
+
+def _score_candidate(trainer: str, params: Dict, rows: np.ndarray,
+                     validation: np.ndarray) -> Dict[str, float]:
+    """Fit one configuration on a row subsample and score it on the validation rows."""
+    X, y = shared_training_data()
+    start = time.perf_counter()
+    model, _ = MODEL_TRAINERS[trainer](X[rows], y[rows], train_metrics=None, **params)
+    fit_time = time.perf_counter() - start
+    error = y[validation] - model.predict(X[validation])
+    return {'score': float(np.sqrt(np.mean(error * error))), 'fit_time': fit_time}
+
+
+def _rung_budgets(n_rungs: int, eta: float) -> List[float]:
+    """Budget share of every rung, ending at the full budget."""
+    return [eta ** (rung - n_rungs + 1) for rung in range(n_rungs)]
+
+
+def _halving_bracket(run, model: str, candidates: List[Dict], n_rungs: int, eta: float,
+                     order: np.ndarray, validation: np.ndarray, min_rows: int,
+                     max_rounds: int, threads: Optional[int], bracket: int) -> List[Dict]:
+    """Run one successive-halving bracket and return its history rows."""
+    history = []
+    survivors = list(range(len(candidates)))
+    for rung, budget in enumerate(_rung_budgets(n_rungs, eta)):
+        n_rows = min(max(int(round(budget * len(order))), min_rows), len(order))
+        rows = np.sort(order[:n_rows])
+        tasks = []
+        for candidate in survivors:
+            params = dict(candidates[candidate])
+            if model in _ROUND_BUDGET_TRAINERS:
+                params['n_estimators'] = max(int(round(budget * max_rounds)), 1)
+            if threads is not None and model in THREADED_TRAINERS:
+                params.setdefault('n_jobs', threads)
+            tasks.append((model, params, rows, validation))
+
+        outcomes = run(_score_candidate, tasks)
+        for candidate, (_, params, _, _), outcome in zip(survivors, tasks, outcomes):
+            history.append({
+                'bracket': bracket,
+                'rung': rung,
+                'candidate': candidate,
+                'n_rows': n_rows,
+                'n_estimators': params.get('n_estimators'),
+                'params': candidates[candidate],
+                'score': outcome['score'],
+                'fit_time': outcome['fit_time'],
+                'full_budget': rung == n_rungs - 1,
+            })
+
+        n_keep = max(int(math.ceil(len(survivors) / eta)), 1)
+        ranked = np.argsort([outcome['score'] for outcome in outcomes], kind='stable')
+        survivors = [survivors[i] for i in ranked[:n_keep]]
+    return history
+
+
+def _search(model: str, X, y, brackets: Sequence[Dict[str, int]],
+            param_space: Optional[Dict[str, List[Any]]], eta: float, min_rows: int,
+            max_rounds: int, validation_size: float, X_val, y_val,
+            random_state: int, n_jobs: int, refit: bool,
+            temp_dir: Optional[Union[str, Path]]) -> Dict[str, Any]:
+    """Shared driver of ``successive_halving`` and ``hyperband``."""
+    if model not in SEARCH_SPACES:
+        raise ValueError(f"Unknown model: {model}. Use any of {list(SEARCH_SPACES)}")
+    if eta <= 1:
+        raise ValueError(f"eta must be greater than 1, got {eta}")
+    param_space = SEARCH_SPACES[model] if param_space is None else param_space
+
+    y = np.asarray(y, dtype=np.float64)
+    rng = np.random.default_rng(random_state)
+    if X_val is None:
+        permutation = rng.permutation(len(y))
+        n_validation = max(int(round(validation_size * len(y))), 1)
+        validation, train = np.sort(permutation[:n_validation]), permutation[n_validation:]
+        X_all, y_all = X, y
+    else:
+        train = rng.permutation(len(y))
+        validation = np.arange(len(y), len(y) + len(y_val))
+        X_all = sparse.vstack([X, X_val], format='csr') if sparse.issparse(X) else np.concatenate([X, X_val])
+        y_all = np.concatenate([y, np.asarray(y_val, dtype=np.float64)])
+
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    largest_rung = max(bracket['n_candidates'] for bracket in brackets)
+    n_workers = max(min(n_jobs, largest_rung), 1)
+    # Run sequentially, the trainers keep their own thread defaults
+    threads = max(n_jobs // n_workers, 1) if n_workers > 1 else None
+
+    start = time.perf_counter()
+    history = []
+    with shared_training_pool(X_all, y_all, n_workers, temp_dir) as run:
+        for number, bracket in enumerate(brackets):
+            n_candidates = bracket['n_candidates']
+            if all(isinstance(values, (list, tuple)) for values in param_space.values()):
+                # Finite grids are sampled without replacement
+                n_candidates = min(n_candidates, math.prod(len(values) for values in param_space.values()))
+            candidates = list(ParameterSampler(param_space, n_candidates,
+                                               random_state=random_state + number))
+            history.extend(_halving_bracket(run, model, candidates, bracket['n_rungs'], eta,
+                                            train, validation, min_rows, max_rounds,
+                                            threads, number))
+
+    history = pd.DataFrame(history)
+    final = history[history['full_budget']]
+    best = final.loc[final['score'].idxmin()]
+    best_params = dict(best['params'])
+    if model in _ROUND_BUDGET_TRAINERS:
+        best_params['n_estimators'] = int(best['n_estimators'])
+
+    result = {
+        'best_params': best_params,
+        'best_score': float(best['score']),
+        'history': history,
+        'search_time': time.perf_counter() - start,
+    }
+    if refit:
+        result['model'] = MODEL_TRAINERS[model](X, y, **best_params)
+    return result
+
+
+def successive_halving(model: str, X, y, param_space: Optional[Dict[str, List[Any]]] = None,
+                       n_candidates: int = 27, eta: float = 3, min_rows: int = 1000,
+                       max_rounds: int = 300, validation_size: float = 0.2,
+                       X_val=None, y_val=None, random_state: int = 42,
+                       n_jobs: int = -1, refit: bool = True,
+                       temp_dir: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """
+    Tune a tree-model trainer with successive halving.
+
+    Parameters
+    ----------
+    model : str
+        'random_forest' or 'xgboost'
+    X : np.ndarray or scipy.sparse matrix
+        Training features
+    y : array-like
+        Training target
+    param_space : dict, optional
+        ``{parameter: values}`` to sample from (default: ``SEARCH_SPACES``)
+    n_candidates : int
+        Configurations sampled for the first rung
+    eta : float
+        Halving rate: each rung keeps ``1 / eta`` of the candidates and gives
+        them ``eta`` times the budget
+    min_rows : int
+        Smallest row subsample of a rung
+    max_rounds : int
+        Boosting rounds at the full budget (XGBoost only)
+    validation_size : float
+        Share of the rows held out for scoring when no validation set is given
+    X_val, y_val : optional
+        Explicit validation set
+    random_state : int
+        Seed of the split, the subsamples and the sampled configurations
+    n_jobs : int
+        Total number of cores, split between candidates and model threads
+    refit : bool
+        Fit the best configuration on all of ``X`` and return it
+    temp_dir : str, optional
+        Directory for the shared arrays (default: system temp)
+
+    Returns
+    -------
+    dict
+        ``best_params``, ``best_score`` (validation RMSE at the full budget),
+        ``history`` (one row per evaluated candidate and rung),
+        ``search_time`` and, with ``refit``, ``model`` as a
+        ``(model, training_metrics)`` tuple for ``compare_models``
+    """
+    n_rungs = max(int(math.floor(math.log(max(n_candidates, 1), eta))) + 1, 1)
+    brackets = [{'n_candidates': n_candidates, 'n_rungs': n_rungs}]
+    return _search(model, X, y, brackets, param_space, eta, min_rows, max_rounds,
+                   validation_size, X_val, y_val, random_state, n_jobs, refit, temp_dir)
+
+
+def hyperband(model: str, X, y, param_space: Optional[Dict[str, List[Any]]] = None,
+              eta: float = 3, min_rows: int = 1000, max_rounds: int = 300,
+              validation_size: float = 0.2, X_val=None, y_val=None,
+              random_state: int = 42, n_jobs: int = -1, refit: bool = True,
+              temp_dir: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """
+    Tune a tree-model trainer with Hyperband.
+
+    Hyperband runs successive-halving brackets from the most aggressive
+    (many configurations starting at ``min_rows``) to plain random search
+    (a few configurations on the full budget). The number of brackets
+    follows from the ratio of the training rows to ``min_rows``.
+
+    Parameters and return value are as in ``successive_halving``.
+    """
+    n_train = len(y) if X_val is not None else len(y) - max(int(round(validation_size * len(y))), 1)
+    s_max = max(int(math.floor(math.log(max(n_train / min_rows, 1), eta))), 0)
+    brackets = [
+        {'n_candidates': int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), 'n_rungs': s + 1}
+        for s in range(s_max, -1, -1)
+    ]
+    return _search(model, X, y, brackets, param_space, eta, min_rows, max_rounds,
+                   validation_size, X_val, y_val, random_state, n_jobs, refit, temp_dir)
@@ -10,6 +10,7 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
+FEATURE_STORE_DIR = PROCESSED_DATA_DIR / "feature_store"
 
 # Model paths
 MODELS_DIR = PROJECT_ROOT / "models"
@@ -0,0 +1,69 @@
+"""Tests for the single-pass KPI aggregation engine."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.eda.aggregation import (
+    PortfolioStatistics,
+    compute_group_statistics,
+    portfolio_kpis
+)
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample insurance data for aggregation."""
+    np.random.seed(42)
+    n = 500
+    
+    data = {
+        'Province': pd.Categorical(np.random.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)),
+        'Gender': np.random.choice(['Male', 'Female'], n),
+        'TotalPremium': np.random.uniform(10, 1000, n),
+        'TotalClaims': np.random.choice([0, 0, 0, 100, 200, 300], n).astype(float)
+    }
+    
+    return pd.DataFrame(data)
+
+
+def test_statistics_match_groupby(sample_data):
+    """Test sufficient statistics against pandas groupby."""
+    stats = compute_group_statistics(sample_data, ['Province', ('Province', 'Gender')])
+    
+    expected = sample_data.groupby(['Province', 'Gender'], observed=True).agg(
+        n=('TotalPremium', 'size'),
+        premium=('TotalPremium', 'sum'),
+        claims=('TotalClaims', 'sum')
+    )
+    composite = stats[('Province', 'Gender')]
+    
+    np.testing.assert_array_equal(composite['Total_Policies'], expected['n'])
+    np.testing.assert_allclose(composite['Total_Premium'], expected['premium'])
+    np.testing.assert_allclose(composite['Total_Claims'], expected['claims'])
+    assert stats['Province']['Total_Policies'].sum() == len(sample_data)
+
+
+def test_kpis_derived_from_statistics(sample_data):
+    """Test frequency, severity and margin spread derived from the statistics."""
+    kpis = portfolio_kpis(sample_data, ['Gender'])['Gender']
+    
+    claims = sample_data[sample_data['TotalClaims'] > 0]
+    margin = sample_data['TotalPremium'] - sample_data['TotalClaims']
+    
+    np.testing.assert_allclose(
+        kpis['Claim_Frequency'],
+        (sample_data['TotalClaims'] > 0).groupby(sample_data['Gender']).mean()
+    )
+    np.testing.assert_allclose(kpis['Std_Severity'],
+                               claims.groupby('Gender')['TotalClaims'].std())
+    np.testing.assert_allclose(kpis['Std_Margin'], margin.groupby(sample_data['Gender']).std())
+
+
+def test_portfolio_statistics_cache(sample_data):
+    """Test that dimensions are aggregated once and reused."""
+    portfolio = PortfolioStatistics(sample_data)
+    first = portfolio.statistics(['Province', 'Gender'])
+    second = portfolio.statistics('Province')
+    
+    assert second['Province'] is first['Province']
+    assert 'Loss_Ratio' in portfolio.kpis('Gender').columns
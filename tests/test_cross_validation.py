@@ -0,0 +1,71 @@
+"""Tests for the cross-validation engine."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.modeling.cross_validation import CrossValidator, make_folds
+
+
+@pytest.fixture
+def sample_data():
+    """Create policies observed over twelve months with a premium signal."""
+    rng = np.random.default_rng(1)
+    n = 600
+    df = pd.DataFrame({
+        'PolicyID': rng.integers(0, 150, n),
+        'TransactionMonth': pd.to_datetime('2014-01-01') + pd.to_timedelta(rng.integers(0, 12, n) * 31, unit='D'),
+        'Province': pd.Categorical(rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)),
+        'Gender': rng.choice(['Male', 'Female'], n).astype(object),
+        'SumInsured': rng.uniform(1e4, 5e5, n),
+        'RegistrationYear': rng.integers(2000, 2015, n),
+    })
+    df['TotalPremium'] = 20 + df['SumInsured'] / 1000 + rng.normal(0, 5, n)
+    return df
+
+
+def test_group_and_time_folds(sample_data):
+    """Test that group folds keep policies together and time folds look forward."""
+    folds = make_folds(sample_data, n_splits=4, split='group')
+    policies = sample_data['PolicyID'].to_numpy()
+    assert sorted(np.concatenate([test for _, test in folds])) == list(range(len(sample_data)))
+    for train, test in folds:
+        assert not set(policies[train]) & set(policies[test])
+
+    again = make_folds(sample_data, n_splits=4, split='group')
+    assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(folds, again))
+    reseeded = make_folds(sample_data, n_splits=4, split='group', random_state=7)
+    assert not all(np.array_equal(a, b) for (_, a), (_, b) in zip(folds, reseeded))
+
+    months = sample_data['TransactionMonth'].to_numpy()
+    for train, test in make_folds(sample_data, n_splits=3, split='time'):
+        assert months[train].max() < months[test].min()
+
+    with pytest.raises(ValueError):
+        make_folds(sample_data, split='random')
+
+
+def test_cross_validator_reuses_encoded_folds(sample_data, tmp_path):
+    """Test the model grid and that stored folds are reused, not re-encoded."""
+    cv = CrossValidator(sample_data, n_splits=3, use_feature_store=True, store_dir=tmp_path)
+    results = cv.evaluate({'lr': 'linear_regression', 'dt': ('decision_tree', {'max_depth': 4})},
+                          n_jobs=2)
+
+    assert results[['Model', 'Fold']].values.tolist() == [
+        ['lr', 0], ['lr', 1], ['lr', 2], ['dt', 0], ['dt', 1], ['dt', 2]
+    ]
+    assert (results['N_Train'] + results['N_Test'] == len(sample_data)).all()
+    assert (results.loc[results['Model'] == 'lr', 'Test_R2'] > 0.95).all()
+
+    X_train, X_test, y_train, y_test, names, preprocessor = cv.fold(0)
+    assert isinstance(X_train, np.memmap)
+    assert preprocessor['preprocessor'].scaler_.n_samples_seen_ == len(cv.folds[0][0])
+
+    stored = {path: path.stat().st_mtime_ns for path in cv.store_dir.glob('fold_*/*.npy')}
+    again = CrossValidator(sample_data, n_splits=3, use_feature_store=True, store_dir=tmp_path)
+    again.evaluate(['linear_regression'], n_jobs=1)
+    assert again.store_dir == cv.store_dir
+    assert {path: path.stat().st_mtime_ns for path in cv.store_dir.glob('fold_*/*.npy')} == stored
+
+    summary = CrossValidator.summary(results)
+    assert summary.loc['lr', ('Test_R2', 'mean')] == pytest.approx(
+        results.loc[results['Model'] == 'lr', 'Test_R2'].mean())
@@ -25,3 +25,129 @@ def test_get_data_info():
     assert len(info["columns"]) == 3
     assert info["missing_values"]["col1"] == 1
 
+
+
+@pytest.fixture
+def raw_data_file(tmp_path):
+    """Write a small pipe-delimited extract in the raw ACIS layout."""
+    n = 50
+    df = pd.DataFrame({
+        "UnderwrittenCoverID": range(n),
+        "PolicyID": [i % 7 for i in range(n)],
+        "TransactionMonth": ["2015-03-01 00:00:00"] * (n // 2) + ["2015-04-01 00:00:00"] * (n // 2),
+        "Gender": ["Male", "Female"] * (n // 2),
+        "Province": ["Gauteng", "Western Cape", "Limpopo", "Gauteng", "Free State"] * (n // 5),
+        "PostalCode": [2000, 122, 7100, 2000, 1459] * (n // 5),
+        "RegistrationYear": [2010] * n,
+        "SumInsured": [100000.0] * n,
+        "TotalPremium": [float(i) for i in range(n)],
+        "TotalClaims": [0.0] * (n - 5) + [1000.0] * 5,
+    })
+    file_path = tmp_path / "insurance.txt"
+    df.to_csv(file_path, sep="|", index=False)
+    return file_path
+
+
+def test_load_insurance_data_schema(raw_data_file):
+    """Test that declared schema dtypes are applied on load."""
+    df = load_insurance_data(raw_data_file, use_cache=False)
+
+    assert len(df) == 50
+    assert isinstance(df["Province"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Gender"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["PostalCode"].dtype, pd.CategoricalDtype)
+    assert df["RegistrationYear"].dtype == "int16"
+    assert df["TotalClaims"].dtype == "float64"
+    assert pd.api.types.is_datetime64_any_dtype(df["TransactionMonth"])
+
+
+def test_load_insurance_data_chunks(raw_data_file):
+    """Test that chunked loading yields typed frames covering every row."""
+    chunks = list(load_insurance_data(raw_data_file, chunksize=20, use_cache=False))
+
+    assert [len(chunk) for chunk in chunks] == [20, 20, 10]
+    assert all(isinstance(chunk["Province"].dtype, pd.CategoricalDtype) for chunk in chunks)
+    assert sum(chunk["TotalClaims"].sum() for chunk in chunks) == 5000.0
+
+
+def test_load_insurance_data_cache(raw_data_file, tmp_path):
+    """Test that the Parquet cache is reused, projected and rebuilt when stale."""
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "cache"
+
+    full = load_insurance_data(raw_data_file, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("insurance.*.parquet"))) == 1
+
+    cached = load_insurance_data(raw_data_file, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(full, cached)
+
+    projected = load_insurance_data(raw_data_file, columns=["Gender", "TotalClaims"],
+                                    cache_dir=cache_dir)
+    assert list(projected.columns) == ["Gender", "TotalClaims"]
+
+    # Appending a row changes size and hash, so the cache must be rebuilt
+    with open(raw_data_file, "a") as fh:
+        fh.write("50|1|2015-04-01 00:00:00|Male|Gauteng|2000|2010|100000.0|10.0|0.0\n")
+    rebuilt = load_insurance_data(raw_data_file, cache_dir=cache_dir)
+    assert len(rebuilt) == 51
+
+
+def test_cache_per_source_path(raw_data_file, tmp_path):
+    """Test that same-named files in different directories keep separate caches."""
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "cache"
+    other = tmp_path / "other" / raw_data_file.name
+    other.parent.mkdir()
+    lines = raw_data_file.read_text().splitlines(keepends=True)
+    other.write_text("".join(lines[:11]))
+
+    first = load_insurance_data(raw_data_file, cache_dir=cache_dir)
+    second = load_insurance_data(other, cache_dir=cache_dir)
+    assert (len(first), len(second)) == (50, 10)
+    assert len(list(cache_dir.glob("insurance.*.parquet"))) == 2
+
+    # Both caches stay valid, so reloading reads them instead of rewriting
+    written = {path: path.stat().st_mtime_ns for path in cache_dir.glob("*.parquet")}
+    assert len(load_insurance_data(raw_data_file, cache_dir=cache_dir)) == 50
+    assert {path: path.stat().st_mtime_ns for path in cache_dir.glob("*.parquet")} == written
+
+
+def test_load_insurance_data_filters(raw_data_file, tmp_path):
+    """Test that filters and projection agree between the raw and cached scans."""
+    filters = [("Gender", "in", ["Female"]), ("TotalPremium", ">=", 10.0)]
+
+    raw = load_insurance_data(raw_data_file, columns=["PostalCode", "TotalPremium"],
+                              filters=filters, use_cache=False)
+    assert list(raw.columns) == ["PostalCode", "TotalPremium"]
+    assert len(raw) == 20
+    assert raw["TotalPremium"].min() >= 10.0
+
+    with pytest.raises(ValueError):
+        load_insurance_data(raw_data_file, filters=[("Gender", "like", "M")], use_cache=False)
+
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "cache"
+    load_insurance_data(raw_data_file, cache_dir=cache_dir)
+    cached = load_insurance_data(raw_data_file, columns=["PostalCode", "TotalPremium"],
+                                 filters=filters, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(raw, cached)
+
+
+@pytest.mark.parametrize("filters", [
+    [("PostalCode", ">", 2000)],
+    [("PostalCode", "<=", 1459), ("Province", ">=", "Gauteng")],
+])
+def test_range_filters_on_categoricals(raw_data_file, tmp_path, filters):
+    """Test that ordering filters on categorical columns agree between the scans."""
+    raw = load_insurance_data(raw_data_file, filters=filters, use_cache=False)
+    chunked = pd.concat(load_insurance_data(raw_data_file, filters=filters, chunksize=15,
+                                            use_cache=False), ignore_index=True)
+    assert len(raw) > 0
+    pd.testing.assert_frame_equal(raw, chunked, check_categorical=False)
+
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "cache"
+    load_insurance_data(raw_data_file, cache_dir=cache_dir)
+    cached = load_insurance_data(raw_data_file, filters=filters, cache_dir=cache_dir)
+    # The Parquet scan keeps only the categories still in use
+    pd.testing.assert_frame_equal(raw, cached, check_categorical=False)
@@ -0,0 +1,69 @@
+"""Tests for the shared hypothesis test data view."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.ab_testing import hypothesis_tests as ht
+from src.ab_testing import multiple_testing as mt
+from src.ab_testing.data_view import prepare_test_view
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample data for hypothesis testing."""
+    np.random.seed(42)
+    n = 2000
+    
+    data = {
+        'Province': np.random.choice(['Gauteng', 'Western Cape', 'KwaZulu-Natal'], n),
+        'PostalCode': np.random.choice([1000, 2000, 3000, 4000], n),
+        'Gender': np.random.choice(['Male', 'Female'], n),
+        'TotalPremium': np.random.uniform(10, 1000, n),
+        'TotalClaims': np.where(np.random.uniform(size=n) < 0.3,
+                                np.random.gamma(2.0, 1000.0, n), 0.0)
+    }
+    
+    return pd.DataFrame(data)
+
+
+def test_view_shares_source_arrays(sample_data):
+    """Test that the view does not copy float64 columns of the source frame."""
+    view = prepare_test_view(sample_data)
+    
+    assert np.shares_memory(view.total_claims, sample_data['TotalClaims'].to_numpy())
+    assert view.has_claim.sum() == (sample_data['TotalClaims'] > 0).sum()
+    assert view.group_statistics('Province') is view.group_statistics('Province')
+
+
+def test_view_matches_dataframe_results(sample_data):
+    """Test that every test gives the same result on the view and the frame."""
+    view = prepare_test_view(sample_data)
+    
+    for test in (ht.test_province_risk_differences, ht.test_zipcode_risk_differences,
+                 ht.test_zipcode_margin_differences, ht.test_gender_risk_differences):
+        from_df = test(sample_data)
+        from_view = test(view)
+        for key in from_df:
+            if isinstance(from_df[key], dict) and 'p_value' in from_df[key]:
+                assert from_view[key]['p_value'] == pytest.approx(from_df[key]['p_value'])
+    
+    pd.testing.assert_frame_equal(mt.test_all_zipcodes(view), mt.test_all_zipcodes(sample_data))
+
+
+def test_run_hypothesis_suite(sample_data):
+    """Test the batch runner in-process and on a process pool."""
+    from src.ab_testing.suite import run_hypothesis_suite
+    
+    serial = run_hypothesis_suite(sample_data)
+    parallel = run_hypothesis_suite(sample_data, tests=['province', 'gender'], n_jobs=2)
+    
+    assert set(serial['hypothesis']) == {'province', 'zipcode', 'margin', 'gender'}
+    assert (serial['wall_time'] >= 0).all()
+    assert 'preparation_time' in serial.attrs
+    
+    expected = serial[serial['hypothesis'].isin(['province', 'gender'])]
+    np.testing.assert_allclose(parallel['p_value'].to_numpy(dtype=float),
+                               expected['p_value'].to_numpy(dtype=float))
+    
+    with pytest.raises(ValueError):
+        run_hypothesis_suite(sample_data, tests=['unknown'])
@@ -0,0 +1,70 @@
+"""Tests for the memory-mapped feature store."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.modeling.feature_store import (
+    column_store_exists,
+    dataframe_fingerprint,
+    read_column_store,
+    write_column_store
+)
+from src.modeling.data_preparation import prepare_premium_prediction_data
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample insurance data for modeling."""
+    np.random.seed(42)
+    n = 300
+    
+    data = {
+        'Province': pd.Categorical(np.random.choice(['Gauteng', 'Western Cape'], n)),
+        'Gender': pd.Categorical(np.random.choice(['Male', 'Female'], n)),
+        'SumInsured': np.random.uniform(1e4, 5e5, n),
+        'RegistrationYear': np.random.randint(2000, 2015, n),
+        'TotalPremium': np.random.uniform(10, 1000, n),
+        'TotalClaims': np.random.choice([0, 0, 0, 100, 200, 300], n)
+    }
+    
+    return pd.DataFrame(data)
+
+
+def test_column_store_round_trip(tmp_path):
+    """Test that arrays come back memory-mapped with their metadata."""
+    X = np.arange(12, dtype=np.float64).reshape(4, 3)
+    write_column_store(tmp_path / "store", {'X': X}, {'feature_names': ['a', 'b', 'c']})
+    
+    assert column_store_exists(tmp_path / "store")
+    arrays, metadata = read_column_store(tmp_path / "store")
+    
+    assert isinstance(arrays['X'], np.memmap)
+    np.testing.assert_array_equal(arrays['X'], X)
+    assert metadata['feature_names'] == ['a', 'b', 'c']
+
+
+def test_fingerprint_changes_with_data(sample_data):
+    """Test that the fingerprint depends on contents and parameters."""
+    key = dataframe_fingerprint(sample_data, test_size=0.2)
+    
+    assert key == dataframe_fingerprint(sample_data.copy(), test_size=0.2)
+    assert key != dataframe_fingerprint(sample_data, test_size=0.3)
+    
+    changed = sample_data.copy()
+    changed.loc[0, 'TotalPremium'] += 1
+    assert key != dataframe_fingerprint(changed, test_size=0.2)
+
+
+def test_prepare_uses_feature_store(sample_data, tmp_path):
+    """Test that a stored preparation matches a fresh one."""
+    fresh = prepare_premium_prediction_data(sample_data)
+    first = prepare_premium_prediction_data(sample_data, use_feature_store=True,
+                                            store_dir=tmp_path)
+    second = prepare_premium_prediction_data(sample_data, use_feature_store=True,
+                                             store_dir=tmp_path)
+    
+    assert isinstance(second[0], np.memmap)
+    np.testing.assert_allclose(second[0], fresh[0])
+    np.testing.assert_allclose(second[1], first[1])
+    pd.testing.assert_series_equal(second[3], fresh[3], check_index_type=False)
+    assert second[4] == fresh[4]
@@ -0,0 +1,90 @@
+"""Tests for the log-link Tweedie-family GLMs."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import GammaRegressor, TweedieRegressor
+from src.modeling.glm import InsuranceGLM, fit_claim_cost_glms
+
+
+@pytest.fixture
+def design():
+    """Create a sparse one-hot design with known coefficients."""
+    rng = np.random.default_rng(1)
+    n, k = 4000, 12
+    columns = rng.integers(0, k, n)
+    X = sparse.csr_matrix((np.ones(n), (np.arange(n), columns)), shape=(n, k))
+    beta = rng.normal(scale=0.4, size=k)
+    exposure = rng.uniform(0.2, 1.0, n)
+    return X, beta, exposure, rng
+
+
+def test_glm_matches_sklearn(design):
+    """Test Gamma and Tweedie fits against scikit-learn with the same penalty."""
+    X, beta, _, rng = design
+    mu = np.exp(6 + X @ beta)
+    y_gamma = rng.gamma(2.0, mu / 2.0)
+    y_tweedie = np.where(rng.random(len(mu)) < 0.3, y_gamma, 0.0)
+
+    for solver in ('irls', 'lbfgs'):
+        gamma = InsuranceGLM('gamma', alpha=1e-3, solver=solver).fit(X, y_gamma)
+        reference = GammaRegressor(alpha=1e-3, tol=1e-10, max_iter=1000).fit(X, y_gamma)
+        np.testing.assert_allclose(gamma.coef_, reference.coef_, atol=1e-3)
+        assert gamma.intercept_ == pytest.approx(reference.intercept_, abs=1e-3)
+
+        tweedie = InsuranceGLM('tweedie', power=1.5, alpha=1e-3, solver=solver).fit(X, y_tweedie)
+        reference = TweedieRegressor(power=1.5, alpha=1e-3, link='log', tol=1e-10,
+                                     max_iter=1000).fit(X, y_tweedie)
+        np.testing.assert_allclose(tweedie.coef_, reference.coef_, atol=1e-3)
+        assert tweedie.converged_
+
+
+def test_poisson_exposure_offset(design):
+    """Test that the exposure offset recovers the claim rate per unit of exposure."""
+    X, beta, exposure, rng = design
+    counts = rng.poisson(exposure * np.exp(-1 + X @ beta)).astype(float)
+    model = InsuranceGLM('poisson').fit(X, counts, exposure=exposure)
+
+    # With one level per row the MLE rate of a level is its claims per unit of exposure
+    level = X.indices
+    rates = np.bincount(level, weights=counts) / np.bincount(level, weights=exposure)
+    np.testing.assert_allclose(model.predict(X), rates[level], rtol=1e-5)
+    np.testing.assert_allclose(model.predict(X[:5], exposure[:5]),
+                               model.predict(X[:5]) * exposure[:5])
+    assert model.predict(X, exposure).sum() == pytest.approx(counts.sum())
+    assert 0 < model.score(X, counts, exposure) < 1
+    assert model.deviance_ < model.null_deviance_
+
+    with pytest.raises(ValueError):
+        InsuranceGLM('binomial')
+    with pytest.raises(ValueError):
+        InsuranceGLM('tweedie', power=2.5)
+    with pytest.raises(ValueError):
+        InsuranceGLM('gamma').fit(X, counts)
+    with pytest.raises(ValueError):
+        InsuranceGLM('poisson').predict(X)
+
+
+def test_fit_claim_cost_glms():
+    """Test the frequency, severity and pure premium models on one design."""
+    rng = np.random.default_rng(3)
+    n = 2000
+    province = rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)
+    risky = province == 'Gauteng'
+    has_claim = rng.random(n) < np.where(risky, 0.4, 0.1)
+    df = pd.DataFrame({
+        'Province': pd.Categorical(province),
+        'SumInsured': rng.uniform(1e4, 5e5, n),
+        'Exposure': rng.uniform(0.5, 1.0, n),
+        'TotalClaims': np.where(has_claim, rng.gamma(2.0, 3000.0, n), 0.0),
+    })
+    fitted = fit_claim_cost_glms(df, exposure_col='Exposure')
+    assert set(fitted) == {'preprocessor', 'frequency', 'severity', 'pure_premium'}
+
+    X = fitted['preprocessor'].transform(df[['Province', 'SumInsured']])
+    premium = fitted['pure_premium'].predict(X, df['Exposure'])
+    assert premium.sum() == pytest.approx(df['TotalClaims'].sum(), rel=0.1)
+    by_province = pd.Series(premium / df['Exposure']).groupby(province).mean()
+    assert by_province['Gauteng'] > 2 * by_province['Limpopo']
+    assert fitted['severity'].family == 'gamma'
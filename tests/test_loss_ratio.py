@@ -0,0 +1,78 @@
+"""Tests for loss-ratio calculations."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.eda.loss_ratio import (
+    compute_loss_ratio,
+    loss_ratio_by_groups,
+    portfolio_loss_summary
+)
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample insurance data for loss-ratio analysis."""
+    return pd.DataFrame({
+        'PolicyID': [1, 1, 2, 3, 4, 5],
+        'Province': ['Gauteng', 'Gauteng', 'Limpopo', 'Limpopo', 'Gauteng', None],
+        'Gender': pd.Categorical(['Male', 'Male', 'Female', 'Male', 'Female', 'Female']),
+        'TotalPremium': [100.0, 100.0, 50.0, 0.0, 200.0, 10.0],
+        'TotalClaims': [50.0, 0.0, 100.0, 500.0, 0.0, 5.0]
+    })
+
+
+def test_compute_loss_ratio():
+    """Test row-level loss ratio with non-positive premiums."""
+    ratio = compute_loss_ratio(np.array([100.0, 0.0, -5.0]), np.array([50.0, 10.0, 1.0]))
+    
+    np.testing.assert_allclose(ratio, [0.5, 0.0, 0.0])
+
+
+def test_loss_ratio_by_groups_matches_groupby(sample_data):
+    """Test single-scan tables against an explicit pandas groupby."""
+    tables = loss_ratio_by_groups(sample_data, group_cols=['Province', 'Gender'])
+    
+    valid = sample_data[sample_data['TotalPremium'] > 0].copy()
+    valid['LossRatio'] = valid['TotalClaims'] / valid['TotalPremium']
+    expected = valid.groupby('Province').agg({
+        'TotalPremium': 'sum',
+        'TotalClaims': 'sum',
+        'PolicyID': 'nunique',
+        'LossRatio': 'mean'
+    }).reset_index()
+    expected['LossRatio_Overall'] = expected['TotalClaims'] / expected['TotalPremium']
+    expected = expected.sort_values('LossRatio_Overall', ascending=False, ignore_index=True)
+    
+    pd.testing.assert_frame_equal(tables['Province'], expected, check_dtype=False)
+    assert set(tables['Gender']['Gender']) == {'Male', 'Female'}
+
+
+def test_portfolio_loss_summary(sample_data):
+    """Test overall portfolio metrics."""
+    summary = portfolio_loss_summary(sample_data)
+    
+    assert summary['total_premium'] == 460.0
+    assert summary['total_claims'] == 655.0
+    assert summary['total_policies'] == 5
+    assert summary['valid_records'] == 5
+    assert summary['average_claim'] == pytest.approx(655.0 / 4)
+
+
+def test_loss_ratio_by_groups_without_valid_rows(sample_data):
+    """Test that a segment with no positive premium gives empty tables."""
+    tables = loss_ratio_by_groups(sample_data.assign(TotalPremium=0.0), group_cols=['Gender'])
+    
+    assert tables['Gender'].empty
+    assert 'PolicyID' in tables['Gender'].columns
+
+
+def test_loss_ratio_by_groups_missing_ids(sample_data):
+    """Test that missing policy ids are not counted, as in nunique."""
+    df = sample_data.assign(PolicyID=[np.nan, 1.0, np.nan, 3.0, 4.0, np.nan])
+    tables = loss_ratio_by_groups(df, group_cols=['Gender'])
+    
+    valid = df[df['TotalPremium'] > 0]
+    expected = valid.groupby('Gender', observed=True)['PolicyID'].nunique()
+    counts = tables['Gender'].set_index('Gender')['PolicyID']
+    assert counts.to_dict() == expected.to_dict()
@@ -0,0 +1,156 @@
+"""Tests for model training utilities."""
+
+import pytest
+import numpy as np
+from scipy import sparse
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from src.modeling import models
+from src.modeling.models import (
+    compare_models,
+    evaluate_model,
+    train_linear_regression,
+    train_models,
+    shared_training_data,
+    shared_training_pool,
+    train_random_forest,
+    train_xgboost
+)
+
+
+def _column_sum(column):
+    """Task reading the shared training data."""
+    X, y = shared_training_data()
+    return float(X[:, column].sum() + y.sum())
+
+
+@pytest.fixture
+def regression_data():
+    """Create a small linear regression problem."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 6))
+    y = X @ rng.normal(size=6) + rng.normal(scale=0.1, size=500)
+    return X, y
+
+
+def test_train_models_parallel_matches_sequential(regression_data):
+    """Test that worker processes train the same models as in-process training."""
+    X, y = regression_data
+    specs = {
+        'Linear Regression': 'linear_regression',
+        'Random Forest': ('random_forest', {'n_estimators': 10}),
+    }
+    sequential = train_models(specs, X, y, n_jobs=1)
+    parallel = train_models(specs, X, y, n_jobs=2)
+    
+    assert list(parallel) == list(specs)
+    for name in specs:
+        np.testing.assert_allclose(parallel[name][0].predict(X), sequential[name][0].predict(X))
+        assert parallel[name][1]['train_r2'] == pytest.approx(sequential[name][1]['train_r2'])
+        assert parallel[name][1]['train_time'] > 0
+    assert parallel['Random Forest'][0].n_jobs == 1
+    assert sequential['Random Forest'][0].n_jobs == -1
+    
+    comparison = compare_models(parallel, X, y)
+    assert comparison['Model'].tolist() == list(specs)
+
+
+def test_train_models_shared_inputs(regression_data, tmp_path):
+    """Test memory-mapped and sparse training data."""
+    X, y = regression_data
+    np.save(tmp_path / 'X.npy', X)
+    mapped = np.load(tmp_path / 'X.npy', mmap_mode='r')
+    
+    models = train_models(['linear_regression', 'decision_tree'], mapped, y, n_jobs=2)
+    assert models['linear_regression'][1]['train_r2'] > 0.99
+    
+    models = train_models({'lr': 'linear_regression'}, sparse.csr_matrix(X), y, n_jobs=1)
+    assert models['lr'][1]['train_r2'] > 0.99
+    
+    with pytest.raises(ValueError):
+        train_models(['svm'], X, y)
+
+
+def test_train_metrics_modes(regression_data):
+    """Test skipped, out-of-bag and evaluation-history training metrics."""
+    X, y = regression_data
+    
+    _, skipped = train_linear_regression(X, y, train_metrics=None)
+    assert np.isnan(skipped['train_rmse']) and np.isnan(skipped['train_r2'])
+    
+    model, oob = train_random_forest(X, y, n_estimators=20, train_metrics='cheap')
+    _, full = train_random_forest(X, y, n_estimators=20)
+    assert model.oob_score_ == pytest.approx(oob['train_r2'])
+    assert oob['train_rmse'] > full['train_rmse']
+    
+    pytest.importorskip('xgboost')
+    _, history = train_xgboost(X, y, n_estimators=30, train_metrics='cheap')
+    _, full = train_xgboost(X, y, n_estimators=30)
+    for key in ('train_rmse', 'train_r2', 'train_mae'):
+        assert history[key] == pytest.approx(full[key], rel=1e-4)
+    
+    model, history = train_xgboost(X, y, n_estimators=30, train_metrics='cheap',
+                                   eval_metric='mape')
+    assert model.get_params()['eval_metric'] == ['rmse', 'mae', 'mape']
+    assert history['train_rmse'] == pytest.approx(full['train_rmse'], rel=1e-4)
+    
+    with pytest.raises(ValueError):
+        train_linear_regression(X, y, train_metrics='fast')
+
+
+def test_train_metrics_checked_before_fit(regression_data, monkeypatch):
+    """Test that a bad mode fails before fitting and oob_score can be passed through."""
+    X, y = regression_data
+    model, metrics = train_random_forest(X, y, n_estimators=20, oob_score=True)
+    assert model.oob_score_ > 0.5 and metrics['train_r2'] > model.oob_score_
+    
+    def no_fit(*args, **kwargs):
+        raise AssertionError("fit must not run")
+    
+    monkeypatch.setattr(models.RandomForestRegressor, 'fit', no_fit)
+    with pytest.raises(ValueError):
+        train_random_forest(X, y, n_estimators=20, train_metrics='fast')
+
+
+def test_compare_models_segments(regression_data):
+    """Test the fused per-segment metrics against scikit-learn."""
+    X, y = regression_data
+    models = train_models({'lr': 'linear_regression', 'dt': 'decision_tree'}, X[:300], y[:300], n_jobs=1)
+    X_test, y_test = X[300:], y[300:]
+    segments = np.where(X_test[:, 0] > 0, 'Gauteng', 'Limpopo')
+    
+    grid = compare_models(models, X_test, y_test, segments=segments, n_jobs=2)
+    assert grid[['Model', 'Segment']].values.tolist() == [
+        ['lr', 'All'], ['lr', 'Gauteng'], ['lr', 'Limpopo'],
+        ['dt', 'All'], ['dt', 'Gauteng'], ['dt', 'Limpopo'],
+    ]
+    
+    y_pred = models['dt'][0].predict(X_test)
+    mask = segments == 'Limpopo'
+    row = grid.iloc[5]
+    assert row['N_Test'] == mask.sum()
+    assert row['Test_RMSE'] == pytest.approx(np.sqrt(mean_squared_error(y_test[mask], y_pred[mask])))
+    assert row['Test_R2'] == pytest.approx(r2_score(y_test[mask], y_pred[mask]))
+    assert row['Test_MAE'] == pytest.approx(mean_absolute_error(y_test[mask], y_pred[mask]))
+    
+    overall = compare_models(models, X_test, y_test)
+    assert 'Segment' not in overall.columns
+    np.testing.assert_allclose(overall['Test_R2'], grid.loc[grid['Segment'] == 'All', 'Test_R2'])
+    assert evaluate_model(models['dt'][0], X_test, y_test)['r2'] == pytest.approx(r2_score(y_test, y_pred))
+    
+    test_sets = {'Gauteng': (X_test[~mask], y_test[~mask]), 'Limpopo': (X_test[mask], y_test[mask])}
+    stacked = compare_models(models, test_sets)
+    np.testing.assert_allclose(stacked['Test_RMSE'], grid['Test_RMSE'])
+
+
+def test_shared_training_pool(regression_data):
+    """Test that pool workers see the same data as the in-process run."""
+    X, y = regression_data
+    tasks = [(column,) for column in range(X.shape[1])]
+    with shared_training_pool(X, y) as run:
+        local = run(_column_sum, tasks)
+    with shared_training_pool(sparse.csr_matrix(X), y, n_workers=2) as run:
+        pooled = run(_column_sum, tasks)
+    
+    np.testing.assert_allclose(pooled, local)
+    with pytest.raises(RuntimeError):
+        shared_training_data()
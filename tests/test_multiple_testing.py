@@ -0,0 +1,59 @@
+"""Tests for full-population group testing."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import stats
+from src.ab_testing import multiple_testing as mt
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample data where one zip code has a much higher claim rate."""
+    np.random.seed(42)
+    n = 4000
+    
+    postal = np.random.choice([1000, 2000, 3000, 4000, 5000, 6000], n)
+    claim_rate = np.where(postal == 6000, 0.6, 0.2)
+    has_claim = np.random.uniform(size=n) < claim_rate
+    
+    data = {
+        'PostalCode': postal,
+        'TotalPremium': np.random.uniform(10, 1000, n),
+        'TotalClaims': np.where(has_claim, np.random.gamma(2.0, 1000.0, n), 0.0)
+    }
+    
+    return pd.DataFrame(data)
+
+
+def test_adjust_pvalues():
+    """Test Benjamini–Hochberg and Holm adjustments on known values."""
+    p = np.array([0.01, 0.04, 0.03, 0.005])
+    
+    np.testing.assert_allclose(mt.adjust_pvalues(p, 'holm'), [0.03, 0.06, 0.06, 0.02])
+    np.testing.assert_allclose(mt.adjust_pvalues(p, 'fdr_bh'), [0.02, 0.04, 0.04, 0.02])
+
+
+def test_one_vs_rest_ranks_outlier_first(sample_data):
+    """Test that the high-risk zip code is ranked first and rejected."""
+    results = mt.test_all_zipcodes(sample_data, metric='frequency')
+    
+    assert len(results) == 6
+    assert results.loc[0, 'PostalCode'] == 6000
+    assert bool(results.loc[0, 'reject_null'])
+
+
+def test_pairwise_severity_matches_scipy(sample_data):
+    """Test a pairwise Welch comparison against scipy on the raw rows."""
+    results = mt.test_all_groups(sample_data, metric='severity', comparison='pairwise',
+                                 correction='none')
+    row = results[(results['PostalCode'] == 1000) & (results['PostalCode_B'] == 2000)].iloc[0]
+    
+    claims = sample_data[sample_data['TotalClaims'] > 0]
+    expected = stats.ttest_ind(claims.loc[claims['PostalCode'] == 1000, 'TotalClaims'],
+                               claims.loc[claims['PostalCode'] == 2000, 'TotalClaims'],
+                               equal_var=False)
+    
+    assert len(results) == 15
+    assert row['statistic'] == pytest.approx(expected.statistic)
+    assert row['p_value'] == pytest.approx(expected.pvalue)
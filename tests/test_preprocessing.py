@@ -0,0 +1,148 @@
+"""Tests for the fitted preprocessing pipeline."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from src.modeling.preprocessing import InsurancePreprocessor, target_encoding
+from src.modeling.data_preparation import encode_categorical_features, resolve_feature_columns
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample insurance features with missing values."""
+    np.random.seed(42)
+    n = 200
+    
+    data = {
+        'Province': pd.Categorical(np.random.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)),
+        'Gender': np.random.choice(['Male', 'Female'], n).astype(object),
+        'SumInsured': np.random.uniform(1e4, 5e5, n),
+        'RegistrationYear': np.random.randint(2000, 2015, n)
+    }
+    df = pd.DataFrame(data)
+    df.loc[::10, 'SumInsured'] = np.nan
+    df.loc[::15, 'Gender'] = None
+    return df
+
+
+def test_matches_get_dummies_encoding(sample_data):
+    """Test that unscaled output matches the fill + get_dummies pipeline."""
+    preprocessor = InsurancePreprocessor(scale=False)
+    result = preprocessor.fit_transform(sample_data)
+    
+    expected = sample_data.copy()
+    expected['SumInsured'] = expected['SumInsured'].fillna(expected['SumInsured'].median())
+    expected['Gender'] = expected['Gender'].fillna(expected['Gender'].mode()[0])
+    expected = encode_categorical_features(expected, ['Province', 'Gender'])
+    
+    assert preprocessor.feature_names_ == expected.columns.tolist()
+    np.testing.assert_allclose(result, expected.to_numpy(dtype=float))
+
+
+def test_transform_uses_fitted_values(sample_data):
+    """Test that new batches use training statistics and unseen categories."""
+    preprocessor = InsurancePreprocessor().fit(sample_data)
+    batch = sample_data.head(3).copy()
+    batch['Province'] = ['Gauteng', 'Mpumalanga', None]
+    batch['SumInsured'] = np.nan
+    
+    result = InsurancePreprocessor(scale=False).fit(sample_data).transform(batch)
+    names = preprocessor.feature_names_
+    province = [names.index(name) for name in names if name.startswith('Province_')]
+    
+    assert np.all(result[:, names.index('SumInsured')] == preprocessor.medians_['SumInsured'])
+    assert result[1, province].sum() == 0
+    np.testing.assert_allclose(preprocessor.transform(sample_data).mean(axis=0), 0, atol=1e-10)
+
+
+def test_serialization_round_trip(sample_data, tmp_path):
+    """Test that a saved preprocessor transforms identically."""
+    preprocessor = InsurancePreprocessor().fit(sample_data)
+    loaded = InsurancePreprocessor.load(preprocessor.save(tmp_path / "preprocessor.json"))
+    
+    np.testing.assert_array_equal(loaded.transform(sample_data), preprocessor.transform(sample_data))
+    
+    with pytest.raises(ValueError):
+        InsurancePreprocessor().transform(sample_data)
+    with pytest.raises(ValueError):
+        preprocessor.transform(sample_data.drop(columns=['Gender']))
+
+
+def test_sparse_encoding_matches_dense(sample_data):
+    """Test the CSR path of encode_categorical_features against get_dummies."""
+    filled = sample_data.fillna({'Gender': 'Male', 'SumInsured': 0})
+    dense = encode_categorical_features(filled, ['Province', 'Gender'])
+    matrix, names = encode_categorical_features(filled, ['Province', 'Gender'], sparse=True)
+    
+    assert sparse.isspmatrix_csr(matrix)
+    assert names == dense.columns.tolist()
+    np.testing.assert_allclose(matrix.toarray(), dense.to_numpy(dtype=float))
+
+
+def test_sparse_preprocessor_scaling(sample_data):
+    """Test that sparse output only skips centring of the one-hot columns."""
+    dense = InsurancePreprocessor().fit(sample_data)
+    csr = InsurancePreprocessor(sparse=True).fit(sample_data)
+    result = csr.transform(sample_data)
+    
+    assert sparse.isspmatrix_csr(result)
+    expected = dense.transform(sample_data)
+    n_dense = 2
+    expected[:, n_dense:] += dense.scaler_.mean_[n_dense:] / dense.scaler_.scale_[n_dense:]
+    np.testing.assert_allclose(result.toarray(), expected, atol=1e-12)
+    
+    one_hot = result[:, n_dense:].toarray()
+    assert np.all((one_hot == 0) | (one_hot > 1))
+
+
+def test_target_encoding_statistics():
+    """Test smoothed target means, frequencies and out-of-fold values."""
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 5, 500)
+    y = rng.gamma(2.0, 100.0, 500) + codes * 50
+    
+    encoding = target_encoding(codes, 6, y, smoothing=10.0)
+    prior = y.mean()
+    grouped = pd.Series(y).groupby(codes).agg(['sum', 'count'])
+    expected = (grouped['sum'] + 10.0 * prior) / (grouped['count'] + 10.0)
+    
+    np.testing.assert_allclose(encoding['target_mean'][:5], expected.to_numpy())
+    assert encoding['target_mean'][5] == pytest.approx(prior)
+    np.testing.assert_allclose(encoding['frequency'][:5], grouped['count'].to_numpy() / 500)
+    assert encoding['frequency'][5] == 0
+    assert encoding['out_of_fold'].shape == y.shape
+    assert not np.allclose(encoding['out_of_fold'], encoding['target_mean'][codes])
+
+
+def test_target_encoded_preprocessor(sample_data, tmp_path):
+    """Test target encoding replaces one-hot columns and survives serialization."""
+    y = pd.Series(sample_data['SumInsured'].fillna(0) / 100, index=sample_data.index)
+    onehot = InsurancePreprocessor().fit(sample_data)
+    preprocessor = InsurancePreprocessor(target_encoded=['Province'])
+    result = preprocessor.fit_transform(sample_data, y)
+    names = preprocessor.feature_names_
+    
+    assert 'Province_target_mean' in names and 'Province_frequency' in names
+    assert not any(name.startswith('Province_') and name.endswith(('Limpopo', 'Cape')) for name in names)
+    assert len(names) < len(onehot.feature_names_) + 1
+    assert result.shape == (len(sample_data), len(names))
+    
+    loaded = InsurancePreprocessor.load(preprocessor.save(tmp_path / "target.json"))
+    np.testing.assert_allclose(loaded.transform(sample_data), preprocessor.transform(sample_data))
+    
+    unseen = sample_data.head(2).copy()
+    unseen['Province'] = ['Unknown', 'Unknown']
+    raw = InsurancePreprocessor(scale=False, target_encoded=['Province']).fit(sample_data, y).transform(unseen)
+    assert raw[0, names.index('Province_frequency')] == 0
+    assert raw[0, names.index('Province_target_mean')] == pytest.approx(y.mean())
+
+
+def test_resolve_feature_columns():
+    """Test exact and case-insensitive matching of canonical feature names."""
+    columns = ['Make', 'cubiccapacity', 'Kilowatts', 'Province', 'province']
+    resolved = resolve_feature_columns(columns, ['Province', 'make', 'Cubiccapacity', 'kilowatts', 'Gender'])
+    
+    assert resolved == {'Province': 'Province', 'make': 'Make',
+                        'Cubiccapacity': 'cubiccapacity', 'kilowatts': 'Kilowatts'}
+    assert resolve_feature_columns(iter(columns), ['make']) == {'make': 'Make'}
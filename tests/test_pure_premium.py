@@ -0,0 +1,59 @@
+"""Tests for the frequency-severity pure premium model."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.modeling.pure_premium import FrequencySeverityModel
+
+
+@pytest.fixture
+def sample_data():
+    """Create policies whose claim rate and severity depend on the province."""
+    rng = np.random.default_rng(3)
+    n = 2000
+    province = rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)
+    risky = province == 'Gauteng'
+    has_claim = rng.random(n) < np.where(risky, 0.4, 0.1)
+    severity = rng.gamma(2.0, np.where(risky, 5000.0, 2000.0))
+    return pd.DataFrame({
+        'Province': pd.Categorical(province),
+        'Gender': rng.choice(['Male', 'Female'], n).astype(object),
+        'SumInsured': rng.uniform(1e4, 5e5, n),
+        'RegistrationYear': rng.integers(2000, 2015, n),
+        'TotalClaims': np.where(has_claim, severity, 0.0),
+    })
+
+
+def test_pure_premium_components(sample_data):
+    """Test that the pure premium is probability times severity, in any batch size."""
+    model = FrequencySeverityModel('logistic_regression', 'linear_regression').fit(sample_data)
+    components = model.predict_components(sample_data)
+
+    assert components.index.equals(sample_data.index)
+    assert components['ClaimProbability'].between(0, 1).all()
+    assert (components['ExpectedSeverity'] >= 0).all()
+    np.testing.assert_allclose(components['PurePremium'],
+                               components['ClaimProbability'] * components['ExpectedSeverity'])
+    np.testing.assert_allclose(model.predict_pure_premium(sample_data, batch_size=128),
+                               components['PurePremium'])
+
+    by_province = components.groupby(sample_data['Province'], observed=True)['PurePremium'].mean()
+    assert by_province['Gauteng'] > 3 * by_province['Limpopo']
+    assert model.claim_rate_ == pytest.approx((sample_data['TotalClaims'] > 0).mean())
+
+
+def test_pure_premium_xgboost(sample_data):
+    """Test the default boosted stages and the fit checks."""
+    pytest.importorskip('xgboost')
+    model = FrequencySeverityModel(regressor_params={'n_estimators': 30},
+                                   classifier_params={'n_estimators': 30})
+    with pytest.raises(ValueError):
+        model.predict_pure_premium(sample_data)
+
+    premium = model.fit(sample_data).predict_pure_premium(sample_data)
+    assert premium.mean() == pytest.approx(sample_data['TotalClaims'].mean(), rel=0.2)
+
+    with pytest.raises(ValueError):
+        FrequencySeverityModel(classifier='svm')
+    with pytest.raises(ValueError):
+        FrequencySeverityModel().fit(sample_data.assign(TotalClaims=0.0))
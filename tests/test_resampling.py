@@ -0,0 +1,120 @@
+"""Tests for the permutation and bootstrap engine."""
+
+import tracemalloc
+
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import stats
+from src.ab_testing import resampling as rs
+
+
+@pytest.fixture
+def sample_data():
+    """Create skewed claim amounts for two groups."""
+    rng = np.random.default_rng(42)
+    a = rng.gamma(0.5, 2000.0, 300)
+    b = rng.gamma(0.5, 2300.0, 400)
+    values = np.concatenate([a, b])
+    codes = np.repeat([0, 1], [len(a), len(b)])
+    return values, codes
+
+
+def test_permutation_matches_scipy(sample_data):
+    """Test the p-value against scipy's permutation test."""
+    values, codes = sample_data
+    result = rs.permutation_test(values, codes, n_resamples=5000,
+                                 random_state=0, early_stopping=False)
+    reference = stats.permutation_test(
+        (values[codes == 0], values[codes == 1]),
+        lambda x, y: np.mean(x) - np.mean(y),
+        n_resamples=5000, random_state=0
+    )
+    
+    assert result['n_resamples'] == 5000
+    assert abs(result['p_value'] - reference.pvalue) < 0.03
+
+
+def test_permutation_is_reproducible_and_batch_independent(sample_data):
+    """Test that a seed gives the same result for any batching or n_jobs."""
+    values, codes = sample_data
+    kwargs = dict(n_resamples=2000, random_state=1, early_stopping=False,
+                  memory_budget=10 ** 6)
+    
+    serial = rs.permutation_test(values, codes, **kwargs)
+    parallel = rs.permutation_test(values, codes, n_jobs=2, **kwargs)
+    
+    assert serial['p_value'] == parallel['p_value']
+
+
+def test_permutation_stops_early(sample_data):
+    """Test early stopping when the effect is obvious."""
+    values, codes = sample_data
+    shifted = values + np.where(codes == 1, 5000.0, 0.0)
+    
+    result = rs.permutation_test(shifted, codes, random_state=0)
+    
+    assert result['stopped_early']
+    assert result['reject_null']
+    assert result['n_resamples'] < 10_000
+
+
+def test_bootstrap_interval(sample_data):
+    """Test that the bootstrap interval is close to scipy's percentile interval."""
+    values, codes = sample_data
+    result = rs.bootstrap_mean_difference(values, codes, n_resamples=5000, random_state=0)
+    reference = stats.bootstrap(
+        (values[codes == 0], values[codes == 1]),
+        lambda x, y: np.mean(x) - np.mean(y),
+        method='percentile', n_resamples=5000, random_state=0
+    ).confidence_interval
+    
+    assert result['ci_low'] < result['difference'] < result['ci_high']
+    assert result['ci_low'] == pytest.approx(reference.low, rel=0.15)
+    assert result['ci_high'] == pytest.approx(reference.high, rel=0.15)
+
+
+def test_group_wrappers():
+    """Test the dataframe entry points for severity and margin."""
+    rng = np.random.default_rng(0)
+    n = 1000
+    df = pd.DataFrame({
+        'Gender': rng.choice(['Male', 'Female', 'Not specified'], n),
+        'TotalPremium': rng.uniform(10, 1000, n),
+        'TotalClaims': np.where(rng.uniform(size=n) < 0.3, rng.gamma(2.0, 1000.0, n), 0.0)
+    })
+    
+    result = rs.permutation_test_groups(df, 'Gender', groups=['Male', 'Female'], random_state=0)
+    interval = rs.bootstrap_group_difference(df, 'Gender', 'Male', 'Female',
+                                             metric='margin', n_resamples=500, random_state=0)
+    
+    claims = df[df['TotalClaims'] > 0]
+    male_mean = claims.loc[claims['Gender'] == 'Male', 'TotalClaims'].mean()
+    female_mean = claims.loc[claims['Gender'] == 'Female', 'TotalClaims'].mean()
+    margin = df['TotalPremium'] - df['TotalClaims']
+    
+    assert result['statistic'] == pytest.approx(abs(male_mean - female_mean))
+    assert interval['difference'] == pytest.approx(
+        margin[df['Gender'] == 'Male'].mean() - margin[df['Gender'] == 'Female'].mean()
+    )
+    with pytest.raises(ValueError):
+        rs.permutation_test_groups(df, 'Gender', metric='premium')
+
+
+@pytest.mark.parametrize('batch_fn', [rs._permutation_batch, rs._bootstrap_batch])
+def test_batch_memory_within_budget(sample_data, batch_fn):
+    """Test that a batch allocates no more than the per-cell budget assumes."""
+    values, codes = sample_data
+    values, codes = np.tile(values, 50), np.tile(codes, 50)
+    rs._init_state(rs._prepare_groups(values, codes))
+    size = rs._batch_size(len(values), 32 * 2 ** 20, 1000)
+    try:
+        tracemalloc.start()
+        batch_fn(np.random.SeedSequence(0), size)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        rs._STATE.clear()
+    
+    # Allow for the per-row (not per-resample) arrays of the batch
+    assert peak <= size * len(values) * rs._BYTES_PER_CELL + 4 * 8 * len(values)
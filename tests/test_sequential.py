@@ -0,0 +1,104 @@
+"""Tests for sequential A/B testing."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.ab_testing import hypothesis_tests as ht
+from src.ab_testing.sequential import SequentialABTest, alpha_spent, run_sequential_test
+from src.eda.aggregation import compute_group_statistics
+
+
+def split_rows(df, n_chunks):
+    """Split a dataframe into consecutive chunks of rows."""
+    bounds = np.linspace(0, len(df), n_chunks + 1).astype(int)
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+@pytest.fixture
+def sample_data():
+    """Create sample data for hypothesis testing."""
+    np.random.seed(42)
+    n = 2000
+    
+    data = {
+        'Gender': np.random.choice(['Male', 'Female', 'Not specified'], n),
+        'TotalPremium': np.random.uniform(10, 1000, n),
+        'TotalClaims': np.where(np.random.uniform(size=n) < 0.3,
+                                np.random.gamma(2.0, 1000.0, n), 0.0)
+    }
+    
+    return pd.DataFrame(data)
+
+
+def test_alpha_spending():
+    """Test that spending functions increase to alpha."""
+    for spending in ('obrien_fleming', 'pocock'):
+        spent = [alpha_spent(t, 0.05, spending) for t in (0.0, 0.25, 0.5, 1.0)]
+        assert spent[0] == 0
+        assert np.all(np.diff(spent) > 0)
+        assert spent[-1] == pytest.approx(0.05)
+    
+    assert alpha_spent(0.25) < alpha_spent(0.25, spending='pocock')
+
+
+def test_running_statistics_match_batch(sample_data):
+    """Test that chunked updates give the same statistics and tests as one batch."""
+    chunks = split_rows(sample_data, 5)
+    sequential = run_sequential_test(chunks, 'gender', max_looks=5)
+    
+    expected = compute_group_statistics(sample_data, ['Gender'])['Gender']
+    result = sequential.group_statistics().reindex(expected.index)
+    np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float))
+    
+    history = sequential.history
+    final = history[history['look'] == 5].set_index('component')
+    direct = ht.test_gender_risk_differences(sample_data)
+    
+    assert final.loc['severity_test', 'p_value'] == pytest.approx(direct['severity_test']['p_value'])
+    assert history['alpha_spent'].iloc[-1] == pytest.approx(0.05)
+    assert (history['nominal_alpha'] < 0.05).all()
+
+
+def test_welford_summary(sample_data):
+    """Test running means and standard deviations against pandas."""
+    sequential = SequentialABTest('gender')
+    for chunk in split_rows(sample_data, 7):
+        sequential.update(chunk)
+    
+    summary = sequential.summary()
+    claims = sample_data[sample_data['TotalClaims'] > 0]
+    expected = claims.groupby('Gender')['TotalClaims'].agg(['mean', 'std'])
+    
+    np.testing.assert_allclose(summary.loc[expected.index, 'Mean_Severity'], expected['mean'])
+    np.testing.assert_allclose(summary.loc[expected.index, 'Std_Severity'], expected['std'])
+
+
+def test_rejection_persists():
+    """Test that a clear difference is rejected and stays rejected."""
+    rng = np.random.default_rng(0)
+    n = 4000
+    gender = rng.choice(['Male', 'Female'], n)
+    has_claim = rng.uniform(size=n) < np.where(gender == 'Male', 0.5, 0.2)
+    df = pd.DataFrame({
+        'Gender': gender,
+        'TotalPremium': rng.uniform(10, 1000, n),
+        'TotalClaims': np.where(has_claim, rng.gamma(2.0, 1000.0, n), 0.0)
+    })
+    
+    sequential = run_sequential_test(split_rows(df, 4), 'gender', planned_policies=n)
+    frequency = sequential.history.query("component == 'frequency_test'")
+    
+    assert frequency['reject_null'].iloc[-1]
+    first = frequency['rejected_at_look'].dropna().iloc[0]
+    assert frequency.loc[frequency['look'] >= first, 'reject_null'].all()
+
+
+def test_look_past_planned_information(sample_data):
+    """Test that looking after the final planned look is refused."""
+    sequential = run_sequential_test(split_rows(sample_data, 2), 'gender', max_looks=2)
+    assert sequential.history['information_fraction'].iloc[-1] == 1
+    
+    with pytest.raises(ValueError):
+        sequential.update(sample_data).look()
+    with pytest.raises(ValueError):
+        run_sequential_test(split_rows(sample_data, 3), 'gender', planned_policies=1000)
@@ -0,0 +1,70 @@
+"""Tests for out-of-core premium training."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.modeling.streaming import (
+    chunk_source,
+    sample_stream,
+    train_premium_out_of_core
+)
+
+
+@pytest.fixture
+def premium_file(tmp_path):
+    """Write a raw extract whose premium depends on the features."""
+    rng = np.random.default_rng(0)
+    n = 3000
+    province = rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)
+    sum_insured = rng.uniform(1e4, 5e5, n)
+    premium = 50 + sum_insured / 1000 + np.where(province == 'Gauteng', 80.0, 0.0) + rng.normal(0, 10, n)
+    df = pd.DataFrame({
+        'UnderwrittenCoverID': range(n),
+        'PolicyID': np.arange(n) % 500,
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'Province': province,
+        'RegistrationYear': rng.integers(2000, 2015, n),
+        'SumInsured': sum_insured,
+        'TotalPremium': premium,
+        'TotalClaims': 0.0,
+    })
+    df.loc[::50, 'TotalPremium'] = -1.0
+    file_path = tmp_path / 'premium.txt'
+    df.to_csv(file_path, sep='|', index=False)
+    return file_path
+
+
+def test_sample_stream_is_bounded(premium_file):
+    """Test that the sample keeps at most sample_rows valid training rows."""
+    source = chunk_source(premium_file, chunksize=400, use_cache=False)
+    X, y = sample_stream(source, sample_rows=500, test_size=0.2)
+
+    assert len(X) == len(y) == 500
+    assert np.all(y >= 0)
+    assert isinstance(X['Province'].dtype, pd.CategoricalDtype)
+    assert set(X['Province'].dropna()) == {'Gauteng', 'Western Cape', 'Limpopo'}
+
+
+def test_sgd_out_of_core(premium_file):
+    """Test partial_fit training over chunks recovers the premium signal."""
+    source = chunk_source(premium_file, chunksize=400, use_cache=False)
+    model, metrics, preprocessor = train_premium_out_of_core(source, sample_rows=1000, n_epochs=5)
+
+    assert metrics['n_train'] + metrics['n_test'] == 3000 - 60
+    assert 0.15 < metrics['n_test'] / (metrics['n_train'] + metrics['n_test']) < 0.25
+    assert metrics['test_r2'] > 0.95
+    assert preprocessor.feature_names_[0] == 'RegistrationYear'
+
+
+def test_xgboost_out_of_core(premium_file, tmp_path):
+    """Test boosting on the external-memory iterator."""
+    pytest.importorskip('xgboost')
+    source = chunk_source(premium_file, chunksize=400, use_cache=False)
+    model, metrics, _ = train_premium_out_of_core(source, model='xgboost', n_estimators=50,
+                                                  cache_dir=tmp_path)
+
+    assert metrics['test_r2'] > 0.9
+    assert model.num_boosted_rounds() == 50
+
+    with pytest.raises(ValueError):
+        train_premium_out_of_core(source, model='forest')
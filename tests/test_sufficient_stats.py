@@ -0,0 +1,96 @@
+"""Tests for hypothesis tests computed from sufficient statistics."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import stats
+from src.ab_testing import hypothesis_tests as ht
+from src.ab_testing.sufficient_stats import (
+    anova_from_moments,
+    chi2_from_counts,
+    group_moments,
+    ttest_from_moments,
+    welch_ttest_from_moments
+)
+
+
+@pytest.fixture
+def grouped_values():
+    """Skewed values in three groups of different sizes."""
+    rng = np.random.default_rng(42)
+    codes = rng.integers(0, 3, 600)
+    values = rng.gamma(2.0, 1000.0, 600) * (1 + codes)
+    return codes, values
+
+
+def test_anova_matches_f_oneway(grouped_values):
+    """Test ANOVA from moments against scipy on the raw groups."""
+    codes, values = grouped_values
+    moments = group_moments(codes, values)
+    
+    result = anova_from_moments(moments['count'], moments['sum'], moments['sumsq'])
+    expected = stats.f_oneway(*[values[codes == g] for g in range(3)])
+    
+    assert result['statistic'] == pytest.approx(expected.statistic, rel=1e-9)
+    assert result['p_value'] == pytest.approx(expected.pvalue, rel=1e-6)
+
+
+def test_welch_matches_ttest_ind(grouped_values):
+    """Test Welch's t-test from moments against scipy on the raw groups."""
+    codes, values = grouped_values
+    m = group_moments(codes, values)
+    
+    result = welch_ttest_from_moments(m['count'][0], m['sum'][0], m['sumsq'][0],
+                                      m['count'][1], m['sum'][1], m['sumsq'][1])
+    expected = stats.ttest_ind(values[codes == 0], values[codes == 1], equal_var=False)
+    
+    assert result['statistic'] == pytest.approx(expected.statistic, rel=1e-9)
+    assert result['p_value'] == pytest.approx(expected.pvalue, rel=1e-6)
+
+
+def test_pooled_ttest_matches_ttest_ind(grouped_values):
+    """Test the pooled-variance t-test from moments against scipy's default."""
+    codes, values = grouped_values
+    m = group_moments(codes, values)
+    
+    result = ttest_from_moments(m['count'][0], m['sum'][0], m['sumsq'][0],
+                                m['count'][2], m['sum'][2], m['sumsq'][2])
+    expected = stats.ttest_ind(values[codes == 0], values[codes == 2])
+    
+    assert result['statistic'] == pytest.approx(expected.statistic, rel=1e-9)
+    assert result['p_value'] == pytest.approx(expected.pvalue, rel=1e-6)
+
+
+def test_chi2_matches_crosstab(grouped_values):
+    """Test chi-squared from counts against chi2_contingency on a crosstab."""
+    codes, values = grouped_values
+    has_claim = values > 2000
+    
+    totals = np.bincount(codes)
+    events = np.bincount(codes, weights=has_claim)
+    result = chi2_from_counts(events, totals)
+    expected = stats.chi2_contingency(pd.crosstab(codes, has_claim))
+    
+    assert result['statistic'] == pytest.approx(expected[0])
+    assert result['p_value'] == pytest.approx(expected[1])
+    assert result['degrees_of_freedom'] == expected[2]
+
+
+
+def test_gender_severity_is_pooled_ttest():
+    """Test that the gender severity test keeps the original pooled t-test."""
+    rng = np.random.default_rng(7)
+    n = 2000
+    df = pd.DataFrame({
+        'Gender': rng.choice(['Male', 'Female', 'Not specified'], n),
+        'TotalPremium': rng.uniform(10, 1000, n),
+        'TotalClaims': np.where(rng.uniform(size=n) < 0.3, rng.gamma(2.0, 1000.0, n), 0.0),
+    })
+    result = ht.test_gender_risk_differences(df)['severity_test']
+    claims = df[df['TotalClaims'] > 0]
+    expected = stats.ttest_ind(claims.loc[claims['Gender'] == 'Male', 'TotalClaims'],
+                               claims.loc[claims['Gender'] == 'Female', 'TotalClaims'])
+    
+    assert result['test'] == 't-test'
+    assert result['statistic'] == pytest.approx(expected.statistic, rel=1e-9)
+    assert result['p_value'] == pytest.approx(expected.pvalue, rel=1e-9)
@@ -0,0 +1,70 @@
+"""Tests for time-sliced hypothesis testing."""
+
+import pytest
+import pandas as pd
+import numpy as np
+from src.ab_testing import hypothesis_tests as ht
+from src.ab_testing.time_sliced import (
+    monthly_statistics,
+    run_time_sliced_tests,
+    window_statistics
+)
+from src.eda.aggregation import compute_group_statistics
+
+
+@pytest.fixture
+def sample_data():
+    """Create six months of sample policy data."""
+    np.random.seed(42)
+    n = 3000
+    
+    data = {
+        'TransactionMonth': pd.to_datetime(
+            np.random.choice(pd.date_range('2014-02-01', periods=6, freq='MS'), n)
+        ),
+        'Province': np.random.choice(['Gauteng', 'Western Cape', 'KwaZulu-Natal'], n),
+        'PostalCode': np.random.choice([1000, 2000, 3000, 4000], n),
+        'Gender': np.random.choice(['Male', 'Female'], n),
+        'TotalPremium': np.random.uniform(10, 1000, n),
+        'TotalClaims': np.where(np.random.uniform(size=n) < 0.3,
+                                np.random.gamma(2.0, 1000.0, n), 0.0)
+    }
+    
+    return pd.DataFrame(data)
+
+
+def test_window_statistics_match_rescan(sample_data):
+    """Test that a window built from monthly statistics equals a rescan."""
+    months, policies, cubes = monthly_statistics(sample_data, ['Province'])
+    cube, groups = cubes['Province']
+    
+    assert len(months) == 6
+    assert policies.sum() == len(sample_data)
+    
+    window = window_statistics(cube, 3)
+    period = sample_data['TransactionMonth'].dt.to_period('M')
+    subset = sample_data[period.isin(months[2:5])]
+    expected = compute_group_statistics(subset, ['Province'])['Province']
+    
+    assert window.shape[0] == 4
+    np.testing.assert_allclose(window[2], expected.reindex(groups).to_numpy(dtype=float))
+
+
+def test_run_time_sliced_tests(sample_data):
+    """Test per-month and rolling-window results against direct tests."""
+    monthly = run_time_sliced_tests(sample_data)
+    rolling = run_time_sliced_tests(sample_data, window=2, tests=['province'])
+    
+    assert monthly['window_start'].nunique() == 6
+    assert set(monthly['hypothesis']) == {'province', 'zipcode', 'gender'}
+    
+    period = sample_data['TransactionMonth'].dt.to_period('M')
+    first_two = sample_data[period.isin(period.sort_values().unique()[:2])]
+    expected = ht.test_province_risk_differences(first_two)['frequency_test']['p_value']
+    
+    first = rolling[rolling['component'] == 'frequency_test'].iloc[0]
+    assert first['p_value'] == pytest.approx(expected)
+    assert first['policies'] == len(first_two)
+    
+    with pytest.raises(ValueError):
+        run_time_sliced_tests(sample_data, window=7)
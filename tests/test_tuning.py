@@ -0,0 +1,63 @@
+"""Tests for successive-halving hyperparameter search."""
+
+import pytest
+import numpy as np
+from src.modeling.tuning import hyperband, successive_halving
+
+
+@pytest.fixture
+def regression_data():
+    """Create a small nonlinear regression problem."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 5))
+    y = np.sin(X[:, 0]) * 3 + X[:, 1] ** 2 + rng.normal(scale=0.3, size=2000)
+    return X, y
+
+
+def test_successive_halving_rungs(regression_data):
+    """Test that rungs shrink the candidates and grow rows and rounds."""
+    X, y = regression_data
+    space = {'max_depth': [1, 2, 4, 6], 'learning_rate': [0.05, 0.1, 0.3]}
+    result = successive_halving('xgboost', X, y, param_space=space, n_candidates=9,
+                                min_rows=100, max_rounds=90, n_jobs=1)
+    history = result['history']
+
+    assert history.groupby('rung')['candidate'].size().tolist() == [9, 3, 1]
+    assert history.groupby('rung')['n_estimators'].first().tolist() == [10, 30, 90]
+    assert history['n_rows'].is_monotonic_increasing
+    assert history['n_rows'].iloc[-1] == 1600
+
+    final = history[history['full_budget']].iloc[0]
+    assert result['best_score'] == final['score']
+    assert result['best_params'] == dict(final['params'], n_estimators=90)
+    model, metrics = result['model']
+    assert model.get_params()['max_depth'] == result['best_params']['max_depth']
+    assert metrics['train_r2'] > 0.8
+
+
+def test_parallel_search_matches_sequential(regression_data):
+    """Test that workers on the shared matrix reproduce the in-process search."""
+    X, y = regression_data
+    space = {'max_depth': [2, 6], 'min_samples_split': [2, 20], 'n_estimators': [10]}
+    kwargs = dict(param_space=space, n_candidates=4, eta=2, min_rows=200, refit=False)
+    sequential = successive_halving('random_forest', X, y, n_jobs=1, **kwargs)
+    parallel = successive_halving('random_forest', X, y, n_jobs=2, **kwargs)
+
+    np.testing.assert_allclose(parallel['history']['score'], sequential['history']['score'])
+    assert parallel['best_params'] == sequential['best_params']
+
+    with pytest.raises(ValueError):
+        successive_halving('linear_regression', X, y)
+
+
+def test_hyperband_brackets(regression_data):
+    """Test the bracket layout from the rows-to-min_rows ratio."""
+    X, y = regression_data
+    result = hyperband('xgboost', X, y, param_space={'max_depth': [2, 3, 4, 5, 6]},
+                       min_rows=150, max_rounds=27, refit=False, n_jobs=1)
+    history = result['history']
+
+    # 1600 training rows / 150 -> brackets with 3, 2 and 1 rungs
+    assert history.groupby('bracket')['rung'].max().tolist() == [2, 1, 0]
+    assert history.loc[history['full_budget'], 'n_rows'].eq(1600).all()
+    assert result['best_score'] == history.loc[history['full_budget'], 'score'].min()